@@ -1,148 +1,338 @@
-import streamlit as st
+import dataclasses
+import json
+import time
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator
+import pandas as pd
+import streamlit as st
+
+from prover import profiling
+from prover.allocate import Contest, allocate
+from prover.atlas import load_atlas
+from prover.curve import b_plot_limit, efficiency_curve
+from prover.equilibrium import solve_equilibrium
+from prover.frames import load_frames
+from prover.heatmap import heatmap_figure, rasterize
+from prover.history import DEFAULT_POOL_TOLERANCE, HistoryStore
+from prover.live import DEFAULT_STATE_FILE, read_state
+from prover.montecarlo import PoissonArrivals, evaluate, late_arrival_histogram
+from prover.plotting import efficiency_figure, efficiency_figure_png, figure_png
+from prover.rules import Rules, star_prize
+from prover.solver import optimal_bid
 
 # --- 游戏规则和计算函数 ---
 MINIMUM_BID = 500 
 MAX_TOTAL_POOL = 22000
 STAR_MULTIPLIER = 5
 B_PLOT_UPPER_LIMIT = 10000 # 固定X轴“你的出价B”的绘图上限
+RULES = Rules(minimum_bid=MINIMUM_BID, max_total_pool=MAX_TOTAL_POOL, star_multiplier=STAR_MULTIPLIER)
+LIVE_REFRESH_SECONDS = 1.0 # 跟随实时数据时重新读取状态文件的间隔
+MIN_HISTORY_CONTESTS = 20 # 历史分布至少需要这么多场可比的比赛
 
-def get_final_star_prize(p_total):
-    base_stars = 0
-    if p_total <= 0: base_stars = 0
-    elif p_total <= 5000: base_stars = 1
-    elif p_total <= 7500: base_stars = 2
-    elif p_total <= 16000: base_stars = 3
-    elif p_total <= 17000: base_stars = 4
-    elif p_total <= 18000: base_stars = 5
-    elif p_total <= 19000: base_stars = 6
-    elif p_total <= MAX_TOTAL_POOL: base_stars = 7
-    else: base_stars = 0 
-    return base_stars * STAR_MULTIPLIER
-
-def calculate_efficiency(your_bid_b, p_others_current):
-    if your_bid_b < MINIMUM_BID: return 0.0
-    p_total = your_bid_b + p_others_current
-    if p_total <= 0 or p_total > MAX_TOTAL_POOL: return 0.0 
-    star_prize = get_final_star_prize(p_total)
-    if star_prize == 0 or p_total == 0: return 0.0
-    efficiency = star_prize / p_total 
-    return efficiency
 # --- Streamlit 应用代码 ---
 
-st.set_page_config(layout="centered") 
-st.title("Proof Contest - 出价划算度分析器 (X轴固定上限)")
-st.markdown("调整侧边栏“他人点数池”查看在不同情况下的划算度曲线。")
-
-# --- 使用 Session State 初始化和保存P_others的值 ---
-if 'p_others_val' not in st.session_state:
-    st.session_state.p_others_val = 1300  # P_others 初始值
-
-# --- 将P_others控件放到侧边栏 ---
-st.sidebar.subheader("调整参数:")
-current_p_others_input = st.sidebar.slider(
-    label="他人已在池中的点数 (P_others):",
-    min_value=0,
-    max_value=MAX_TOTAL_POOL - MINIMUM_BID, # P_others的上限
-    value=st.session_state.p_others_val,
-    step=100,
-    key="p_others_slider_key_v4" 
-)
-if current_p_others_input != st.session_state.p_others_val:
-    st.session_state.p_others_val = current_p_others_input
-    st.rerun() # 值改变时，重新运行整个脚本
-
-# --- 图表生成和显示 ---
-current_p_others_for_plot = st.session_state.p_others_val
-
-# X轴（你的出价B）的实际绘图上限
-# 它不应超过B_PLOT_UPPER_LIMIT，也不能使得 P_total 超过 MAX_TOTAL_POOL
-actual_b_plot_limit_on_graph = min(B_PLOT_UPPER_LIMIT, MAX_TOTAL_POOL - current_p_others_for_plot)
-if actual_b_plot_limit_on_graph < MINIMUM_BID:
-    actual_b_plot_limit_on_graph = MINIMUM_BID # 至少绘制到最低出价（如果可行）
-
-b_2d_plot_range_streamlit = np.linspace(MINIMUM_BID, actual_b_plot_limit_on_graph, 300) 
-
-# 为了更精确地捕捉断点，可以插入一些关键的B值
-critical_b_values_streamlit = []
-tier_total_pools_streamlit = [5000, 7500, 16000, 17000, 18000, 19000, MAX_TOTAL_POOL]
-for p_thresh in tier_total_pools_streamlit:
-    b_at_thresh = p_thresh - current_p_others_for_plot
-    if MINIMUM_BID <= b_at_thresh <= actual_b_plot_limit_on_graph :
-        critical_b_values_streamlit.append(b_at_thresh)
-        critical_b_values_streamlit.append(b_at_thresh + 1) # 确保捕捉跳变后
-if len(critical_b_values_streamlit) > 0:
-    b_2d_plot_range_streamlit = np.unique(np.sort(np.concatenate((b_2d_plot_range_streamlit, critical_b_values_streamlit))))
-    b_2d_plot_range_streamlit = b_2d_plot_range_streamlit[b_2d_plot_range_streamlit <= actual_b_plot_limit_on_graph]
-    b_2d_plot_range_streamlit = b_2d_plot_range_streamlit[b_2d_plot_range_streamlit >= MINIMUM_BID]
-
-
-efficiency_values_streamlit = []
-if len(b_2d_plot_range_streamlit) > 0 and b_2d_plot_range_streamlit[0] >= MINIMUM_BID : # 仅当有有效B值时计算
-    efficiency_values_streamlit = [calculate_efficiency(b_val, current_p_others_for_plot) for b_val in b_2d_plot_range_streamlit]
-
-fig_streamlit, ax_streamlit = plt.subplots(figsize=(10, 5)) 
-
-if len(b_2d_plot_range_streamlit) > 0 and len(efficiency_values_streamlit) == len(b_2d_plot_range_streamlit):
-    ax_streamlit.plot(b_2d_plot_range_streamlit, efficiency_values_streamlit, marker='.', linestyle='-', markersize=3, color='deepskyblue')
-
-    max_eff_2d_streamlit = 0
-    optimal_b_val_streamlit = -1
-    if len(efficiency_values_streamlit) > 0:
-        valid_efficiencies_streamlit = np.array(efficiency_values_streamlit)
-        if np.any(valid_efficiencies_streamlit > 0):
-            max_eff_2d_streamlit = np.max(valid_efficiencies_streamlit)
-            optimal_b_indices_streamlit = np.where(np.isclose(valid_efficiencies_streamlit, max_eff_2d_streamlit))[0]
-            if len(optimal_b_indices_streamlit) > 0:
-                optimal_b_val_streamlit = b_2d_plot_range_streamlit[optimal_b_indices_streamlit[0]]
-                ax_streamlit.scatter([optimal_b_val_streamlit], [max_eff_2d_streamlit], color='red', s=80, zorder=5, 
-                                     label=f'Optimal B: {optimal_b_val_streamlit:.0f}\nMax Eff: {max_eff_2d_streamlit:.5f}')
-    ax_streamlit.legend(loc='upper right', fontsize='small')
-    current_plot_ylim_top = 0.001 # 默认Y轴上限
-    if max_eff_2d_streamlit > 0:
-        current_plot_ylim_top = max_eff_2d_streamlit * 1.2 
-    ax_streamlit.set_ylim(bottom=0, top=max(0.001, current_plot_ylim_top)) 
-else:
-    ax_streamlit.text(0.5, 0.5, "No valid Bids to plot for current P_others\n (e.g., P_others too high)", 
-                      horizontalalignment='center', verticalalignment='center', transform=ax_streamlit.transAxes)
-
-
-ax_streamlit.set_xlabel(f'Your Bid (B) points (Min {MINIMUM_BID}, Max Displayed {B_PLOT_UPPER_LIMIT})', fontsize=10) 
-ax_streamlit.set_ylabel('Cost-Effectiveness (Efficiency)', fontsize=10) 
-ax_streamlit.set_title(f'Efficiency vs. Your Bid (P_others = {current_p_others_for_plot:.0f})', fontsize=12) 
-
-# --- X轴刻度固定为500 ---
-# 使用 B_PLOT_UPPER_LIMIT 来决定刻度逻辑，而不是动态的 actual_b_plot_limit_on_graph
-# 这样即使用户的B轴实际绘制范围较小，刻度标准也是一致的
-if B_PLOT_UPPER_LIMIT <= 2000:
-    x_tick_step = 100
-elif B_PLOT_UPPER_LIMIT <= 10000: 
-    x_tick_step = 500 # X轴上限为10000时，刻度间隔500
-else:
-    x_tick_step = 1000
-ax_streamlit.xaxis.set_major_locator(MultipleLocator(x_tick_step))
-ax_streamlit.set_xlim(left=0, right=B_PLOT_UPPER_LIMIT + x_tick_step * 0.1) # X轴显示上限固定
-plt.setp(ax_streamlit.get_xticklabels(), rotation=30, ha="right", fontsize=8) 
-plt.setp(ax_streamlit.get_yticklabels(), fontsize=8) 
-ax_streamlit.grid(True, linestyle=':', alpha=0.5)
-
-st.pyplot(fig_streamlit, clear_figure=True) 
-
-# --- 在主页面显示最优策略文本 ---
-st.markdown("---")
-st.subheader(f"当前分析条件下的最优策略 (基于P_others = {current_p_others_for_plot:.0f}的静态分析):")
-if optimal_b_val_streamlit != -1 and max_eff_2d_streamlit > 0:
-    target_p_total_for_optimal_b = optimal_b_val_streamlit + current_p_others_for_plot
-    stars_at_optimal = get_final_star_prize(target_p_total_for_optimal_b)
-    st.success(f"为达到当前计算出的最高划算度 (约 {max_eff_2d_streamlit:.5f} 星星/点):")
-    st.success(f" • 一个关键的出价目标 (B) 是: **{optimal_b_val_streamlit:.0f}** 点")
-    st.success(f" • 这个出价会使总点数池 (P_total) 达到: **{target_p_total_for_optimal_b:.0f}** 点 (预计获得 {stars_at_optimal} 星)")
-    st.markdown("...") #之前的风险提示
-else:
-    st.warning(f"在当前 P_others={current_p_others_for_plot:.0f} 下，未能找到划算度为正的出价策略 (在B的分析上限 {actual_b_plot_limit_on_graph:.0f} 之内)。")
-    st.warning(f"这可能是因为在当前P_others下，即使是最低出价 {MINIMUM_BID} 点也会导致总池超过 {MAX_TOTAL_POOL} 点。")
-    st.warning(f"如果你的可用点数大于等于 {MINIMUM_BID} 点，且 {MINIMUM_BID + current_p_others_for_plot <= MAX_TOTAL_POOL}，可以考虑出价 {MINIMUM_BID} 点作为尝试，但请自行评估其划算度。")
-
-st.caption("这是一个交互式分析工具。调整左侧边栏的参数，图表和最优策略会自动更新。")
\ No newline at end of file
+@st.cache_resource
+def get_atlas():
+    # 预计算图谱按规则版本存放在磁盘上，规则常量改变时自动重建
+    return load_atlas(RULES)
+
+@st.cache_data(max_entries=32)
+def get_late_histogram(late_rate, late_mean_bid, n_scenarios):
+    # 后续加注量的分布与 P_others 无关，每组分布参数只抽样一次
+    return late_arrival_histogram(PoissonArrivals(late_rate, late_mean_bid, MINIMUM_BID), n_scenarios, RULES, seed=0)
+
+@st.cache_resource
+def get_history():
+    # 历史比赛的列式存储（python -m prover.history import 导入），查询时自动读取新追加的数据
+    return HistoryStore()
+
+@st.cache_data(max_entries=256)
+def get_history_histogram(p_others, minutes_before_close, pool_tolerance, row_counts):
+    # 距截止同一时刻池子与 P_others 相近的历史比赛，其后续加注量的经验分布。
+    # row_counts 只用作缓存键：追加了新数据后行数变化，缓存自然失效
+    return get_history().final_pool_distribution(p_others, minutes_before_close, pool_tolerance).histogram(RULES)
+
+def late_histogram(simulation, p_others):
+    """simulation 为 ("poisson", late_rate, late_mean_bid, n_scenarios) 或 ("history", minutes_before_close, pool_tolerance, row_counts)。"""
+    if simulation[0] == "history":
+        return get_history_histogram(p_others, *simulation[1:])
+    return get_late_histogram(*simulation[1:])
+
+@st.cache_data(max_entries=256)
+def get_simulated_figure(p_others, simulation, optimal_b, max_eff, equilibrium_p_others):
+    histogram = late_histogram(simulation, p_others)
+    b_range, _ = efficiency_curve(p_others, RULES, B_PLOT_UPPER_LIMIT)
+    band = evaluate(p_others, b_range, histogram, RULES)
+    fig = efficiency_figure(p_others, RULES, B_PLOT_UPPER_LIMIT, optimal_b, max_eff, band=band,
+                            equilibrium_p_others=equilibrium_p_others)
+    return figure_png(fig), band
+
+@st.cache_data(max_entries=32)
+def get_equilibrium(n_bidders, budget_low, budget_high):
+    # 其他参与者的预算在 [budget_low, budget_high] 上均匀分布（固定随机种子，结果可复现）。
+    # 只用纯策略均衡：mixed（虚拟对局）在这里的人数下会停在人人出价、爆池的弱均衡上
+    budgets = np.random.default_rng(0).uniform(budget_low, budget_high, n_bidders)
+    return solve_equilibrium(budgets, RULES, mode="pure", seed=0)
+
+@st.cache_resource
+def get_frame_cache():
+    # 每一档 P_others 的图预先渲染进磁盘上的雪碧图，按规则版本缓存，规则常量改变时才重新渲染
+    return load_frames(RULES, B_PLOT_UPPER_LIMIT, gif=True)
+
+@st.cache_resource
+def get_heatmap_raster():
+    # 完整整数网格 (P_others × B 约 4.6 亿个点) 分块聚合成 800 × 600 的栅格，只算一次
+    return rasterize(np.arange(0, MAX_TOTAL_POOL - MINIMUM_BID + 1), np.arange(MINIMUM_BID, MAX_TOTAL_POOL + 1), RULES)
+
+@st.cache_data(max_entries=256)
+def get_heatmap_png(p_others):
+    return figure_png(heatmap_figure(get_heatmap_raster(), p_others_marker=p_others))
+
+def show_analysis(current_p_others_for_plot, simulation, equilibrium_streamlit):
+    """主页面：划算度曲线和最优策略。simulation 为 None 或 late_histogram 接受的分布描述。"""
+    use_simulation = simulation is not None
+    if use_simulation and simulation[0] == "history":
+        # 带上历史数据的行数：追加新数据后，直方图和带模拟带的图都不会再命中旧缓存
+        simulation = simulation + (get_history().row_counts(),)
+    if use_simulation:
+        histogram = late_histogram(simulation, current_p_others_for_plot)
+        if simulation[0] == "history":
+            if histogram.sum() < MIN_HISTORY_CONTESTS:
+                st.warning(f"历史数据中距截止 {simulation[1]:g} 分钟时池子接近 {current_p_others_for_plot:.0f} 的比赛只有 "
+                           f"{histogram.sum()} 场，样本太少，本次不考虑后续加注。")
+                use_simulation = False
+            else:
+                st.caption(f"后续加注分布来自 {histogram.sum()} 场可比的历史比赛。")
+    equilibrium_p_others = None if equilibrium_streamlit is None else round(equilibrium_streamlit.pool)
+
+    # X轴（你的出价B）的实际绘图上限
+    # 它不应超过B_PLOT_UPPER_LIMIT，也不能使得 P_total 超过 MAX_TOTAL_POOL
+    actual_b_plot_limit_on_graph = b_plot_limit(current_p_others_for_plot, RULES, B_PLOT_UPPER_LIMIT)
+
+    # 整数 P_others（滑块步长100）的最优出价直接查预计算图谱；实时数据可能是小数或已超出图谱范围，
+    # 这时以及图谱里的最优出价超出绘图上限时，用分档断点精确求解带上限的最优解
+    with profiling.phase("prove.optimal"):
+        if float(current_p_others_for_plot).is_integer():
+            optimal_b_val_streamlit, max_eff_2d_streamlit = get_atlas().optimal(current_p_others_for_plot)
+        else:
+            optimal_b_val_streamlit, max_eff_2d_streamlit = -1, 0.0
+        if optimal_b_val_streamlit == -1 or optimal_b_val_streamlit > actual_b_plot_limit_on_graph:
+            optimum_streamlit = optimal_bid(current_p_others_for_plot, RULES, max_bid=actual_b_plot_limit_on_graph)
+            optimal_b_val_streamlit, max_eff_2d_streamlit = optimum_streamlit.bid, optimum_streamlit.efficiency
+    optimal_b_val_streamlit, max_eff_2d_streamlit = int(optimal_b_val_streamlit), float(max_eff_2d_streamlit)
+
+    # --- 图表生成和显示 ---
+    # 曲线数据和渲染好的PNG都按 (P_others, 规则) 放在有界LRU缓存里，拖动滑块时重复的取值直接命中缓存
+    with profiling.phase("prove.figure"):
+        if use_simulation:
+            figure_png_streamlit, band_streamlit = get_simulated_figure(current_p_others_for_plot, simulation,
+                                                                        optimal_b_val_streamlit, max_eff_2d_streamlit,
+                                                                        equilibrium_p_others)
+        else:
+            figure_png_streamlit = efficiency_figure_png(current_p_others_for_plot, RULES, B_PLOT_UPPER_LIMIT,
+                                                         optimal_b_val_streamlit, max_eff_2d_streamlit,
+                                                         equilibrium_p_others)
+    with profiling.phase("prove.image"):
+        st.image(figure_png_streamlit)
+
+    # --- 在主页面显示最优策略文本 ---
+    st.markdown("---")
+    st.subheader(f"当前分析条件下的最优策略 (基于P_others = {current_p_others_for_plot:g}的静态分析):")
+    if optimal_b_val_streamlit != -1 and max_eff_2d_streamlit > 0:
+        target_p_total_for_optimal_b = optimal_b_val_streamlit + current_p_others_for_plot
+        stars_at_optimal = star_prize(target_p_total_for_optimal_b, RULES)
+        st.success(f"为达到当前计算出的最高划算度 (约 {max_eff_2d_streamlit:.5f} 星星/点):")
+        st.success(f" • 一个关键的出价目标 (B) 是: **{optimal_b_val_streamlit:.0f}** 点")
+        st.success(f" • 这个出价会使总点数池 (P_total) 达到: **{target_p_total_for_optimal_b:g}** 点 (预计获得 {stars_at_optimal:g} 星)")
+        if use_simulation:
+            at_optimal = evaluate(current_p_others_for_plot, [optimal_b_val_streamlit], histogram, RULES)
+            best_expected = band_streamlit.expected_efficiency.argmax()
+            st.info(f" • 考虑后续加注后，该出价的期望划算度约 {at_optimal.expected_efficiency[0]:.5f}，"
+                    f"期望获得 {at_optimal.expected_stars[0]:.1f} 星，爆池 (超过 {MAX_TOTAL_POOL}) 概率 {at_optimal.overflow_probability[0]:.1%}")
+            st.info(f" • 按期望划算度最优的出价约为 **{band_streamlit.bids[best_expected]:.0f}** 点 "
+                    f"(期望划算度 {band_streamlit.expected_efficiency[best_expected]:.5f}，"
+                    f"爆池概率 {band_streamlit.overflow_probability[best_expected]:.1%})")
+        st.markdown("...") #之前的风险提示
+    else:
+        st.warning(f"在当前 P_others={current_p_others_for_plot:g} 下，未能找到划算度为正的出价策略 (在B的分析上限 {actual_b_plot_limit_on_graph:.0f} 之内)。")
+        st.warning(f"这可能是因为在当前P_others下，即使是最低出价 {MINIMUM_BID} 点也会导致总池超过 {MAX_TOTAL_POOL} 点。")
+        st.warning(f"如果你的可用点数大于等于 {MINIMUM_BID} 点，且 {MINIMUM_BID + current_p_others_for_plot <= MAX_TOTAL_POOL}，可以考虑出价 {MINIMUM_BID} 点作为尝试，但请自行评估其划算度。")
+
+    if equilibrium_streamlit is not None:
+        st.markdown("---")
+        st.subheader("均衡池 (其他参与者也在优化自己的划算度):")
+        active_bidders = int((equilibrium_streamlit.participation > 0).sum())
+        st.info(f" • {len(equilibrium_streamlit.bids)} 名其他参与者的均衡总池约为 **{equilibrium_streamlit.pool:.0f}** 点，"
+                f"其中 {active_bidders} 人出价 (迭代 {equilibrium_streamlit.iterations} 轮，"
+                f"{'已收敛' if equilibrium_streamlit.converged else f'未收敛，最优反应残差 {equilibrium_streamlit.residual:.1%}'})")
+        eq_optimum = optimal_bid(equilibrium_p_others, RULES, max_bid=b_plot_limit(equilibrium_p_others, RULES, B_PLOT_UPPER_LIMIT))
+        if eq_optimum.bid != -1:
+            st.info(f" • 若其他人按均衡出价，你的最优出价为 **{eq_optimum.bid}** 点 (划算度 {eq_optimum.efficiency:.5f})")
+        else:
+            st.info(" • 若其他人按均衡出价，池子已满，再出价不划算。")
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def show_live_analysis(live_state_file, simulation, equilibrium_streamlit):
+    # 只有这个片段按固定间隔重新运行，侧边栏控件不受影响
+    state = read_state(live_state_file)
+    if state is None:
+        st.warning(f"还没有实时数据：请先运行 python -m prover.live --file <数据流> --state-file {live_state_file}")
+        return
+    # 按原值分析：池子已满时应提示“不划算”，而不是截断到某个还能出价的池子
+    p_others = float(state["p_others"])
+    st.caption(f"实时数据 #{state['seq']}: P_others = {p_others:g}，"
+               f"处理延迟 {state['latency_us']:.0f} µs，合并了 {state['coalesced']} 个更新")
+    show_analysis(int(p_others) if p_others.is_integer() else p_others, simulation, equilibrium_streamlit)
+
+def show_allocation():
+    """多场比赛共用一份预算：在每场比赛的断点出价中选择，使赢得的星星总数最大。"""
+    budget = st.number_input("总预算 (点):", min_value=0, value=20000, step=500)
+    contests_table = st.data_editor(
+        pd.DataFrame({"P_others": [1300, 4800, 9000, 16200, 17900, 20500], "档位阈值 (留空使用默认)": [""] * 6}),
+        num_rows="dynamic", key="allocation_contests")
+    contests = []
+    for p_others, thresholds in contests_table.itertuples(index=False):
+        if pd.isna(p_others):
+            continue
+        rules = RULES
+        if isinstance(thresholds, str) and thresholds.strip():
+            try:
+                rules = dataclasses.replace(RULES, thresholds=tuple(float(v) for v in thresholds.split(",")))
+            except ValueError:
+                st.error(f"无法解析档位阈值: {thresholds}（应为逗号分隔的数字，例如 5000,7500,16000）")
+                return
+        contests.append(Contest(float(p_others), rules))
+    allocation = allocate(contests, budget)
+    st.dataframe(pd.DataFrame({
+        "P_others": [c.p_others for c in contests],
+        "出价 B": allocation.bids,
+        "P_total": [c.p_others + b for c, b in zip(contests, allocation.bids)],
+        "星星": allocation.stars,
+    }), hide_index=True)
+    st.success(f"总计 **{allocation.total_stars:.0f}** 星，花费 {allocation.spent} / {budget} 点")
+
+def show_frame_sweep():
+    """从预渲染的帧缓存中取图：拖动时不画图、不求解，只切出雪碧图中的一帧。"""
+    with st.spinner("正在渲染全部帧（只在规则改变后的第一次需要）..."):
+        cache = get_frame_cache()
+    step = cache.index["step"]
+    p_others = st.slider("P_others (预渲染):", min_value=0, max_value=step * (len(cache.frames) - 1), value=1300,
+                         step=step, key="frame_sweep_p_others")
+    i = cache.nearest(p_others)
+    st.image(cache.frame(i))
+    frame = cache.frames[i]
+    if frame["optimal_b"] is None:
+        st.caption(f"P_others = {frame['p_others']:.0f}：没有划算度为正的出价")
+    else:
+        st.caption(f"P_others = {frame['p_others']:.0f}：最优出价 {frame['optimal_b']}，P_total {frame['p_total']:.0f}，"
+                   f"{frame['stars']:.0f} 星，划算度 {frame['efficiency']:.5f}")
+    if cache.gif_path:
+        with open(cache.gif_path, "rb") as f:
+            st.download_button("下载 GIF 动画", f.read(), file_name="efficiency_sweep.gif", mime="image/gif")
+
+def show_profiling():
+    """侧边栏面板：各阶段的耗时统计（进程级，所有会话共享），可导出 JSON。"""
+    data = profiling.snapshot()
+    if not data["phases"]:
+        st.caption("还没有计时数据：打开开关后操作页面即可。")
+        return
+    st.dataframe(pd.DataFrame([{
+        "阶段": name,
+        "次数": stats["count"],
+        "总计 ms": stats["total_s"] * 1e3,
+        "平均 ms": stats["mean_s"] * 1e3,
+        "p95 ms": stats["p95_s"] * 1e3,
+        "最大 ms": stats["max_s"] * 1e3,
+    } for name, stats in data["phases"].items()]), hide_index=True)
+    if data["counters"]:
+        st.json(data["counters"])
+    st.download_button("导出 JSON", json.dumps(data, indent=2, ensure_ascii=False), file_name="prover-profile.json",
+                       mime="application/json")
+    if st.button("清空统计"):
+        profiling.reset()
+
+# 页面只在作为脚本运行时渲染（streamlit run 以 __main__ 执行本文件），import prove 不会产生任何界面副作用
+def main():
+    st.set_page_config(layout="centered") 
+    st.title("Proof Contest - 出价划算度分析器 (X轴固定上限)")
+    st.markdown("调整侧边栏“他人点数池”查看在不同情况下的划算度曲线。")
+
+    # --- 将P_others控件放到侧边栏 ---
+    # 滑块的值由 Streamlit 通过 key 保存在 session state 中，值改变时脚本自动重新运行，不需要手动 st.rerun()
+    st.sidebar.subheader("调整参数:")
+    # 跟随 python -m prover.live --state-file 写出的最新池子数据，页面每秒自动刷新，不需要手动拖动滑块
+    follow_live = st.sidebar.checkbox("跟随实时池子数据 (prover.live)", value=False)
+    if follow_live:
+        live_state_file = st.sidebar.text_input("实时状态文件:", value=DEFAULT_STATE_FILE)
+    current_p_others_for_plot = st.sidebar.slider(
+        label="他人已在池中的点数 (P_others):",
+        min_value=0,
+        max_value=MAX_TOTAL_POOL - MINIMUM_BID, # P_others的上限
+        value=1300, # P_others 初始值
+        step=100,
+        key="p_others_slider_key_v4",
+        disabled=follow_live
+    )
+
+    # --- 蒙特卡洛：出价之后其他人还会继续加注，最终的池子大小不确定 ---
+    st.sidebar.subheader("后续加注 (蒙特卡洛):")
+    use_simulation = st.sidebar.checkbox("考虑出价后他人的继续加注", value=False)
+    simulation = None
+    if use_simulation:
+        late_source = st.sidebar.radio("后续加注的分布:", options=["Poisson 假设", "历史数据"], horizontal=True)
+        if late_source == "历史数据":
+            minutes_before_close = st.sidebar.number_input("现在距截止的分钟数:", min_value=0.0, value=30.0, step=1.0)
+            pool_tolerance = st.sidebar.number_input("池子相近的范围 (±点):", min_value=0.0,
+                                                     value=float(DEFAULT_POOL_TOLERANCE), step=50.0)
+            simulation = ("history", minutes_before_close, pool_tolerance)
+        else:
+            late_rate = st.sidebar.number_input("预计后续加注笔数 (Poisson均值):", min_value=0.0, value=5.0, step=1.0)
+            late_mean_bid = st.sidebar.number_input("每笔加注的平均点数:", min_value=float(MINIMUM_BID), value=800.0, step=100.0)
+            n_scenarios = st.sidebar.select_slider("模拟情景数:", options=[100_000, 1_000_000, 5_000_000], value=1_000_000)
+            simulation = ("poisson", late_rate, late_mean_bid, n_scenarios)
+
+    # --- 多人均衡：其他参与者也在做同样的优化 ---
+    st.sidebar.subheader("均衡池 (多人博弈):")
+    use_equilibrium = st.sidebar.checkbox("叠加其他人按均衡出价时的曲线", value=False)
+    equilibrium_streamlit = None
+    if use_equilibrium:
+        n_bidders = st.sidebar.slider("其他参与者人数:", min_value=2, max_value=1000, value=50)
+        budget_low, budget_high = st.sidebar.slider("每人预算范围:", min_value=MINIMUM_BID, max_value=MAX_TOTAL_POOL,
+                                                    value=(MINIMUM_BID, 5000), step=100)
+        equilibrium_streamlit = get_equilibrium(n_bidders, budget_low, budget_high)
+
+    # --- 性能计时：每个阶段（求解、曲线、画图、PNG、传给浏览器）的耗时，关闭时几乎没有开销 ---
+    profiling_panel = st.sidebar.expander("性能计时 (profiling)")
+    profiling.enable(profiling_panel.checkbox("记录各阶段耗时", value=profiling.enabled(),
+                                              help="对整个进程生效；也可以用环境变量 PROVER_PROFILE=1 打开"))
+    run_start = time.perf_counter()
+
+    if follow_live:
+        show_live_analysis(live_state_file, simulation, equilibrium_streamlit)
+    else:
+        show_analysis(current_p_others_for_plot, simulation, equilibrium_streamlit)
+
+    # --- 池子逐渐变大时曲线如何变化：预渲染的全部滑块档位 ---
+    with st.expander("P_others 扫描动画 (预渲染帧)"):
+        if st.checkbox("使用预渲染的帧（首次渲染约需数十秒）", value=False):
+            show_frame_sweep()
+
+    # --- 整个 (P_others, B) 平面：档位边界和最优出价的位置 ---
+    with st.expander("完整的划算度热力图 (P_others × B)"):
+        if st.checkbox("显示热力图（首次计算约需 2 秒）", value=False):
+            st.image(get_heatmap_png(None if follow_live else current_p_others_for_plot))
+
+    # --- 多场比赛的预算分配 ---
+    with st.expander("多场比赛的预算分配"):
+        show_allocation()
+
+    st.caption("这是一个交互式分析工具。调整左侧边栏的参数，图表和最优策略会自动更新。")
+
+    if profiling.enabled():
+        profiling.record("prove.run", time.perf_counter() - run_start)
+    with profiling_panel:
+        show_profiling()
+
+
+if __name__ == "__main__":
+    main()
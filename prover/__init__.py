@@ -0,0 +1,69 @@
+"""
+Proof Contest 出价分析的共享逻辑（规则、求解等），供 prove.py / 1.py / 2.py / 3.py 和各命令行工具使用。
+
+导入本包没有任何副作用，子模块在第一次访问对应名字时才加载：
+只需要规则和求解器时不会导入 pandas / matplotlib / streamlit。
+"""
+import importlib
+
+_EXPORTS = {
+    "Allocation": "allocate",
+    "Contest": "allocate",
+    "allocate": "allocate",
+    "Atlas": "atlas",
+    "build_atlas": "atlas",
+    "load_atlas": "atlas",
+    "b_plot_limit": "curve",
+    "efficiency_curve": "curve",
+    "EquilibriumResult": "equilibrium",
+    "best_responses": "equilibrium",
+    "solve_equilibrium": "equilibrium",
+    "Raster": "heatmap",
+    "rasterize": "heatmap",
+    "FrameCache": "frames",
+    "build_frames": "frames",
+    "load_frames": "frames",
+    "HistoryQuery": "history",
+    "HistoryStore": "history",
+    "LiveOptimizer": "live",
+    "LiveUpdate": "live",
+    "EmpiricalArrivals": "montecarlo",
+    "MonteCarloResult": "montecarlo",
+    "PoissonArrivals": "montecarlo",
+    "evaluate": "montecarlo",
+    "late_arrival_histogram": "montecarlo",
+    "simulate": "montecarlo",
+    "DEFAULT_RULES": "rules",
+    "MAX_TOTAL_POOL": "rules",
+    "MINIMUM_BID": "rules",
+    "STAR_MULTIPLIER": "rules",
+    "TIER_THRESHOLDS": "rules",
+    "Rules": "rules",
+    "base_stars": "rules",
+    "efficiency": "rules",
+    "star_prize": "rules",
+    "OptimalBidService": "service",
+    "SequentialPolicy": "sequential",
+    "solve_sequential": "sequential",
+    "OptimalBid": "solver",
+    "optimal_bid": "solver",
+    "optimal_bids": "solver",
+    "tier_candidates": "solver",
+    "SweepResult": "sweep",
+    "sweep": "sweep",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,36 @@
+"""
+最快的“P_others = X 时该出多少”查询：只导入 rules 和 solver（numpy），不加载任何绘图 / 界面库，
+适合在脚本或 cron 任务里调用。
+
+用法:
+    python -m prover 1300
+    python -m prover 1300 16200 --minimum-bid 500 --json
+"""
+import argparse
+import json
+
+from .rules import add_rule_arguments, rules_from_args
+from .solver import optimal_bid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover", description="给定 P_others，输出精确的最优出价")
+    parser.add_argument("p_others", type=float, nargs="+")
+    parser.add_argument("--max-bid", type=float, default=None, help="可用点数上限")
+    parser.add_argument("--json", action="store_true", help="每行输出一个 JSON 对象")
+    add_rule_arguments(parser)
+    args = parser.parse_args(argv)
+
+    rules = rules_from_args(args)
+    for p_others in args.p_others:
+        result = optimal_bid(p_others, rules, args.max_bid)
+        if args.json:
+            print(json.dumps({"p_others": p_others, "bid": int(result.bid), "p_total": float(result.p_total),
+                              "stars": float(result.stars), "efficiency": float(result.efficiency)}))
+        else:
+            print(f"P_others={p_others:g} optimal_B={result.bid} P_total={result.p_total:g} "
+                  f"stars={result.stars:g} efficiency={result.efficiency:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+预计算的划算度图谱 (atlas)：整数分辨率下整个 (P_others, B) 定义域的划算度、档位和每行的最优出价。
+
+划算度只取决于 P_total = B + P_others（外加 B 是否达到最低出价），
+所以磁盘上按 P_total 存一维数组（uint8 档位、float32 划算度），
+二维网格 grid[P_others, B - minimum_bid] 用 as_strided 在其上做零拷贝视图，整个图谱只有几百 KB。
+文件用 np.load(mmap_mode="r") 打开，查表不复制数据。
+
+图谱目录以 Rules.version_key 命名，MINIMUM_BID / STAR_MULTIPLIER / 阈值任何一个改变都会自动重建。
+
+用法:
+    python -m prover.atlas build --minimum-bid 500
+    python -m prover.atlas lookup 1300 --minimum-bid 500
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from . import profiling
+from .rules import DEFAULT_RULES, add_rule_arguments, base_stars, rules_from_args
+from .solver import optimal_bids
+from .storage import publish_directory
+
+ATLAS_FORMAT = 1
+DEFAULT_ATLAS_DIR = os.environ.get(
+    "PROVER_ATLAS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".atlas"),
+)
+
+
+def atlas_path(rules=DEFAULT_RULES, directory=None):
+    return os.path.join(directory or DEFAULT_ATLAS_DIR, f"v{ATLAS_FORMAT}-{rules.version_key}")
+
+
+@profiling.timed("atlas.build")
+def build_atlas(rules=DEFAULT_RULES, directory=None):
+    """计算并写出图谱，返回图谱目录。通过 publish_directory 整体发布，读者不会看到写了一半的文件。"""
+    path = atlas_path(rules, directory)
+    minimum_bid = int(np.ceil(rules.minimum_bid))
+    max_total_pool = int(rules.max_total_pool)
+    max_p_others = max_total_pool - minimum_bid
+
+    # 按 P_total 索引，覆盖 grid 视图能访问到的全部下标 (max_p_others + max_total_pool)
+    p_total = np.arange(max_p_others + max_total_pool + 1)
+    tiers = base_stars(p_total, rules).astype(np.uint8)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = np.where(tiers > 0, tiers * rules.star_multiplier / p_total, 0.0).astype(np.float32)
+
+    opt_bids, opt_effs = optimal_bids(np.arange(max_p_others + 1), rules)
+
+    with publish_directory(path) as tmp:
+        np.save(os.path.join(tmp, "tiers.npy"), tiers)
+        np.save(os.path.join(tmp, "efficiency.npy"), eff)
+        np.save(os.path.join(tmp, "optimal_bid.npy"), opt_bids.astype(np.int32))
+        np.save(os.path.join(tmp, "optimal_efficiency.npy"), opt_effs.astype(np.float32))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": ATLAS_FORMAT,
+                "version_key": rules.version_key,
+                "minimum_bid": minimum_bid,
+                "max_total_pool": max_total_pool,
+                "star_multiplier": rules.star_multiplier,
+                "thresholds": list(rules.thresholds),
+            }, f, indent=2)
+    return path
+
+
+class Atlas:
+    """以 memmap 方式打开的图谱。所有查询都接受整数标量或数组。"""
+
+    def __init__(self, path, rules):
+        self.path = path
+        self.rules = rules
+        self.minimum_bid = int(np.ceil(rules.minimum_bid))
+        self.max_total_pool = int(rules.max_total_pool)
+        self.max_p_others = self.max_total_pool - self.minimum_bid
+        self.tiers_by_total = self._load("tiers.npy")
+        self.efficiency_by_total = self._load("efficiency.npy")
+        self.optimal_bid_by_p_others = self._load("optimal_bid.npy")
+        self.optimal_efficiency_by_p_others = self._load("optimal_efficiency.npy")
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    @property
+    def grid(self):
+        """零拷贝的二维划算度网格：grid[P_others, B - minimum_bid]，P_others 与 B 均为整数。"""
+        eff = self.efficiency_by_total
+        shape = (self.max_p_others + 1, self.max_total_pool - self.minimum_bid + 1)
+        return as_strided(eff[self.minimum_bid:], shape=shape, strides=(eff.strides[0], eff.strides[0]), writeable=False)
+
+    def tiers(self, p_total):
+        """P_total 对应的星星基数（档位），超出范围为 0。返回 int64（磁盘上是 uint8，乘以倍数会溢出）。"""
+        p_total = np.asarray(p_total, dtype=np.int64)
+        inside = (p_total >= 0) & (p_total < len(self.tiers_by_total))
+        tiers = self.tiers_by_total[np.where(inside, p_total, 0)].astype(np.int64)
+        return np.where(inside, tiers, 0)[()]
+
+    def efficiency(self, your_bid_b, p_others):
+        """查表得到划算度（float32 精度），与 rules.efficiency 对整数输入的结果一致。"""
+        your_bid_b = np.asarray(your_bid_b, dtype=np.int64)
+        p_total = your_bid_b + np.asarray(p_others, dtype=np.int64)
+        inside = (your_bid_b >= self.minimum_bid) & (p_total >= 0) & (p_total < len(self.efficiency_by_total))
+        return np.where(inside, self.efficiency_by_total[np.where(inside, p_total, 0)], 0.0)[()]
+
+    def optimal(self, p_others):
+        """整数 P_others 下的最优出价与最高划算度，无正划算度出价时为 (-1, 0)。"""
+        p_others = np.asarray(p_others, dtype=np.int64)
+        inside = (p_others >= 0) & (p_others <= self.max_p_others)
+        idx = np.where(inside, p_others, 0)
+        bids = np.where(inside, self.optimal_bid_by_p_others[idx], -1)
+        effs = np.where(inside, self.optimal_efficiency_by_p_others[idx], 0.0)
+        return bids[()], effs[()]
+
+
+@profiling.timed("atlas.load")
+def load_atlas(rules=DEFAULT_RULES, directory=None, build=True):
+    """打开与 rules 对应版本的图谱；不存在时（规则改过或第一次运行）自动构建。"""
+    path = atlas_path(rules, directory)
+    if not os.path.isdir(path):
+        if not build:
+            raise FileNotFoundError(f"atlas for rules {rules.version_key} not found at {path}")
+        build_atlas(rules, directory)
+    return Atlas(path, rules)
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default=None, help=f"图谱目录 (默认 {DEFAULT_ATLAS_DIR}，可用 PROVER_ATLAS_DIR 覆盖)")
+    add_rule_arguments(common)
+    parser = argparse.ArgumentParser(prog="python -m prover.atlas", description="构建 / 查询预计算的划算度图谱")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", parents=[common], help="(重新) 构建图谱")
+    lookup = sub.add_parser("lookup", parents=[common], help="查询 P_others 的最优出价")
+    lookup.add_argument("p_others", type=int, nargs="+")
+    args = parser.parse_args(argv)
+
+    rules = rules_from_args(args)
+    if args.command == "build":
+        print(build_atlas(rules, args.dir))
+        return
+    atlas = load_atlas(rules, args.dir)
+    bids, effs = atlas.optimal(args.p_others)
+    for p_others, bid, eff in zip(args.p_others, np.atleast_1d(bids), np.atleast_1d(effs)):
+        print(f"P_others={p_others} optimal_B={bid} P_total={p_others + bid if bid >= 0 else p_others} "
+              f"tier={atlas.tiers(p_others + bid) if bid >= 0 else 0} efficiency={eff:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+无界面的批量计算：按块向量化计算星星、奖励、划算度和最优出价，并流式写出到 CSV / Parquet。
+
+情景可以来自范围的笛卡尔积 (--p-others 0:21900:100 --bids 100:10000:1)，
+也可以来自输入文件（包含 p_others 列，可选 bid 列）。不给出价时每个 P_others 只输出一行最优解。
+每次只在内存中保留一个块 (--chunk-rows)，所以 10^8 行也不会占满内存。
+本模块不导入 matplotlib / streamlit。
+
+用法:
+    python -m prover.batch --p-others 0:21900:1 --bids 100:22000:1 -o table.parquet
+    python -m prover.batch --input scenarios.csv -o result.csv --minimum-bid 500
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .ranges import parse_range
+from .rules import DEFAULT_RULES, add_rule_arguments, base_stars, efficiency, rules_from_args
+from .solver import optimal_bids
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+COLUMNS = ["p_others", "bid", "p_total", "stars", "star_prize", "efficiency", "optimal_bid", "optimal_efficiency"]
+# 每一块都用同样的列类型，Parquet 的 schema 和 CSV 的数字格式不会随输入的块而变
+DTYPES = {
+    "p_others": np.float64,
+    "bid": np.int64,
+    "p_total": np.float64,
+    "stars": np.uint8,
+    "star_prize": np.float64,
+    "efficiency": np.float64,
+    "optimal_bid": np.int64,
+    "optimal_efficiency": np.float64,
+}
+
+
+def _check_rows(bad, message, first_row):
+    """bad 中有真值时报 ValueError，列出前几个出错的行号（第一行为 first_row）。"""
+    if bad.any():
+        rows = np.flatnonzero(bad) + first_row
+        listed = ", ".join(map(str, rows[:5])) + (f" 等 {len(rows)} 行" if len(rows) > 5 else "")
+        raise ValueError(f"{message}（第 {listed} 行）")
+
+
+def scenario_table(p_others, bids, rules=DEFAULT_RULES, optimal=None, first_row=1):
+    """
+    对一块情景计算全部输出列（列类型见 DTYPES）。bids 为 None 时使用每个 P_others 的最优出价，
+    bids 中的 NaN（输入文件里空着的出价）也按该行的最优出价计算。
+    optimal 可传入预先算好的 (optimal_bid, optimal_efficiency)，避免对重复的 P_others 重算。
+    P_others 不是有限数、出价为负或不是整数时报 ValueError，错误信息里的行号从 first_row 开始。
+    """
+    p_others = np.asarray(p_others, dtype=np.float64)
+    _check_rows(~np.isfinite(p_others), "p_others 必须是有限的数", first_row)
+    opt_bids, opt_effs = optimal if optimal is not None else optimal_bids(p_others, rules)
+    if bids is None:
+        bids = opt_bids
+    else:
+        bids = np.asarray(bids, dtype=np.float64)
+        blank = np.isnan(bids)
+        _check_rows(bids < 0, "bid 不能为负", first_row)
+        finite = np.isfinite(bids)
+        _check_rows(~blank & (~finite | (np.mod(np.where(finite, bids, 0), 1) != 0)), "bid 必须是整数点数", first_row)
+        bids = np.where(blank, opt_bids, bids)
+    # 没有正划算度出价时 optimal_bid 为 -1，按 0 出价输出
+    bids = np.maximum(bids, 0).astype(np.int64)
+    p_total = p_others + bids
+    stars = np.where(bids >= rules.minimum_bid, base_stars(p_total, rules), 0)
+    return pd.DataFrame({
+        "p_others": p_others,
+        "bid": bids,
+        "p_total": p_total,
+        "stars": stars,
+        "star_prize": stars * rules.star_multiplier,
+        "efficiency": efficiency(bids, p_others, rules),
+        "optimal_bid": opt_bids,
+        "optimal_efficiency": opt_effs,
+    }, columns=COLUMNS).astype(DTYPES)
+
+
+def iter_range_chunks(p_others_values, bid_values, rules=DEFAULT_RULES, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """P_others × B 的笛卡尔积，按行号分块生成，不会物化整张表。"""
+    opt = optimal_bids(p_others_values, rules)
+    if bid_values is None:
+        for start in range(0, len(p_others_values), chunk_rows):
+            sl = slice(start, start + chunk_rows)
+            yield scenario_table(p_others_values[sl], None, rules, (opt[0][sl], opt[1][sl]), start + 1)
+        return
+    n_bids = len(bid_values)
+    total = len(p_others_values) * n_bids
+    for start in range(0, total, chunk_rows):
+        rows = np.arange(start, min(start + chunk_rows, total))
+        p_idx, b_idx = np.divmod(rows, n_bids)
+        yield scenario_table(p_others_values[p_idx], bid_values[b_idx], rules, (opt[0][p_idx], opt[1][p_idx]),
+                             start + 1)
+
+
+def iter_file_chunks(path, rules=DEFAULT_RULES, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    逐块读取输入文件 (CSV 或 Parquet)，需要 p_others 列，bid 列可选（空着的出价按最优出价计算）。
+    错误信息里的行号是数据行的序号，从 1 开始，不含表头。
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        frames = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    else:
+        frames = pd.read_csv(path, chunksize=chunk_rows)
+    first_row = 1
+    for frame in frames:
+        bids = frame["bid"].to_numpy(dtype=np.float64, na_value=np.nan) if "bid" in frame.columns else None
+        yield scenario_table(frame["p_others"].to_numpy(dtype=np.float64, na_value=np.nan), bids, rules,
+                             first_row=first_row)
+        first_row += len(frame)
+
+
+def write_chunks(chunks, output):
+    """把 DataFrame 块流式写到 output：.parquet 用 pyarrow 的 ParquetWriter，其他（含 '-' 标准输出）写 CSV。"""
+    rows = 0
+    if output.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("writing Parquet needs pyarrow (pip install pyarrow); use a .csv output instead")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    stream = sys.stdout if output == "-" else open(output, "w", newline="", encoding="utf-8")
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(stream, header=(i == 0), index=False)
+            rows += len(chunk)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.batch", description="批量计算划算度表并流式写出")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="情景文件 (.csv / .parquet)，包含 p_others 列，可选 bid 列")
+    source.add_argument("--p-others", type=parse_range, help="P_others 范围 start:stop:step（含 stop）")
+    parser.add_argument("--bids", type=parse_range, help="出价 B 范围 start:stop:step；省略时只输出每个 P_others 的最优出价")
+    parser.add_argument("-o", "--output", default="-", help="输出文件 (.csv / .parquet)，默认 CSV 写到标准输出")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    add_rule_arguments(parser)
+    args = parser.parse_args(argv)
+
+    rules = rules_from_args(args)
+    if args.input:
+        chunks = iter_file_chunks(args.input, rules, args.chunk_rows)
+    else:
+        p_others = args.p_others
+        if p_others is None:
+            p_others = np.arange(0, int(rules.max_total_pool - rules.minimum_bid) + 1, 100)
+        chunks = iter_range_chunks(p_others, args.bids, rules, args.chunk_rows)
+    try:
+        rows = write_chunks(chunks, args.output)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}") from None
+    if args.output != "-":
+        print(f"wrote {rows} rows to {os.path.abspath(args.output)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+基准测试：规则计算、最优出价搜索、整网格生成和绘图的耗时。
+
+每个用例重复运行到 --min-time 秒，输出每次调用的 p50 / p99 延迟和吞吐量（每秒处理的点数），
+结果为 JSON。和记录在 benchmarks/baseline.json 里的基线比较，p50 变慢超过 --tolerance 倍即视为回归，
+退出码为 1，方便在改动规则或绘图代码后发现性能退化。
+
+用法:
+    python -m prover.bench                                   # 打印结果
+    python -m prover.bench --compare benchmarks/baseline.json
+    python -m prover.bench --filter render --json out.json
+    python -m prover.bench --update-baseline benchmarks/baseline.json
+"""
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from .rules import Rules, efficiency
+from .solver import optimal_bid, optimal_bids
+from .surface import refined_surface
+
+# prove.py 的最低出价是 500，2.py / 3.py 是 100
+PROVE_RULES = Rules(minimum_bid=500)
+SCRIPT_RULES = Rules(minimum_bid=100)
+
+CASES = {}
+
+
+def case(name, items):
+    """注册一个用例；items 为每次调用处理的点数，用于计算吞吐量。"""
+    def register(func):
+        CASES[name] = (func, items)
+        return func
+    return register
+
+
+def _legacy_efficiency(your_bid_b, p_others_current, rules):
+    # 重构前各脚本里的逐点 if/elif 实现，作为标量路径的对照
+    if your_bid_b < rules.minimum_bid:
+        return 0.0
+    p_total = your_bid_b + p_others_current
+    if p_total <= 0 or p_total > rules.max_total_pool:
+        return 0.0
+    base_stars = 0
+    for i, bound in enumerate(rules.bounds):
+        if p_total <= bound:
+            base_stars = i + 1
+            break
+    return base_stars * rules.star_multiplier / p_total
+
+
+_B_300 = np.linspace(100, 10000, 300)
+_B_1M = np.random.default_rng(0).uniform(100, 22000, 1_000_000)
+_P_1M = np.random.default_rng(1).uniform(0, 21900, 1_000_000)
+_P_ALL = np.arange(0, 21901)
+
+
+@case("efficiency.scalar_legacy_300", 300)
+def _efficiency_scalar_legacy_300():
+    return [_legacy_efficiency(b, 1300.0, SCRIPT_RULES) for b in _B_300]
+
+
+@case("efficiency.scalar_calls_300", 300)
+def _efficiency_scalar_calls_300():
+    return [efficiency(b, 1300.0, SCRIPT_RULES) for b in _B_300]
+
+
+@case("efficiency.batched_300", 300)
+def _efficiency_batched_300():
+    return efficiency(_B_300, 1300.0, SCRIPT_RULES)
+
+
+@case("efficiency.batched_1m", 1_000_000)
+def _efficiency_batched_1m():
+    return efficiency(_B_1M, _P_1M, SCRIPT_RULES)
+
+
+@case("optimal.linspace_argmax", 1)
+def _optimal_linspace_argmax():
+    # prove.py 原来的做法：300 点 linspace 加关键点，再取 argmax
+    p_others = 16200
+    limit = min(10000, PROVE_RULES.max_total_pool - p_others)
+    b = np.linspace(PROVE_RULES.minimum_bid, limit, 300)
+    critical = PROVE_RULES.bounds - p_others
+    critical = critical[(critical >= PROVE_RULES.minimum_bid) & (critical <= limit)]
+    b = np.unique(np.concatenate((b, critical, critical + 1)))
+    effs = efficiency(b, p_others, PROVE_RULES)
+    return b[np.argmax(effs)]
+
+
+@case("optimal.exact", 1)
+def _optimal_exact():
+    return optimal_bid(16200, PROVE_RULES)
+
+
+@case("optimal.exact_vectorized_21901", len(_P_ALL))
+def _optimal_exact_vectorized():
+    return optimal_bids(_P_ALL, SCRIPT_RULES)
+
+
+_ALLOCATION_CONTESTS = None
+_P_SWEEP = np.arange(0, 22001, 100)
+_P_HEATMAP = np.arange(0, 20000, 4)
+_B_HEATMAP = np.arange(100, 20100, 4)
+
+
+@case("allocate.100x50000", 100)
+def _allocate_100x50000():
+    global _ALLOCATION_CONTESTS
+    from .allocate import Contest, allocate
+    if _ALLOCATION_CONTESTS is None:
+        p_others = np.random.default_rng(2).integers(0, 21000, 100)
+        _ALLOCATION_CONTESTS = [Contest(float(p), SCRIPT_RULES) for p in p_others]
+    return allocate(_ALLOCATION_CONTESTS, 50_000)
+
+
+@case("sweep.1000_variants", 1000)
+def _sweep_1000_variants():
+    from .ranges import parse_range
+    from .sweep import sweep
+    vary = [("minimum_bid", parse_range("100:1000:100")), ("shift", parse_range("-2000:2000:40"))]
+    return sweep(vary, _P_SWEEP, SCRIPT_RULES, workers=1)
+
+
+@case("sequential.50_bidders", 50)
+def _sequential_50_bidders():
+    from .sequential import solve_sequential
+    return solve_sequential(50, SCRIPT_RULES)
+
+
+@case("heatmap.rasterize_5000x5000", 25_000_000)
+def _heatmap_rasterize_5000x5000():
+    from .heatmap import rasterize
+    return rasterize(_P_HEATMAP, _B_HEATMAP, SCRIPT_RULES)
+
+
+@case("grid.loop_50x50", 2500)
+def _grid_loop_50x50():
+    # 3.py 原来的双重循环
+    p = np.linspace(0, 21900, 50)
+    b = np.logspace(np.log10(100), np.log10(5000), 50)
+    Z = np.zeros((50, 50))
+    for i in range(50):
+        for j in range(50):
+            Z[i, j] = _legacy_efficiency(b[i], p[j], SCRIPT_RULES)
+    return Z
+
+
+@case("grid.refined_50x50", 2500)
+def _grid_refined_50x50():
+    return refined_surface(np.linspace(0, 21900, 50), np.logspace(np.log10(100), np.log10(5000), 50), SCRIPT_RULES)
+
+
+@case("grid.refined_1000x1000", 1_000_000)
+def _grid_refined_1000x1000():
+    return refined_surface(np.linspace(0, 21900, 1000), np.linspace(100, 5000, 1000), SCRIPT_RULES)
+
+
+@case("render.prove_figure_png", 1)
+def _render_prove_figure_png():
+    # prove.py：构建 Figure 并序列化成 PNG（绕过缓存）
+    from .plotting import efficiency_figure, figure_png
+    return figure_png(efficiency_figure(16200, PROVE_RULES, 10000, 2801, 0.00184))
+
+
+@case("render.slider_redraw", 1)
+def _render_slider_redraw():
+    # 2.py：滑块移动时更新曲线数据并重画整块画布
+    fig, line = _slider_figure()
+    line.set_ydata(efficiency(_B_300, np.random.default_rng().integers(0, 219) * 100, SCRIPT_RULES))
+    fig.canvas.draw()
+
+
+@case("render.slider_blit", 1)
+def _render_slider_blit():
+    # 2.py 现在的做法：查预计算曲线，只 blit 曲线、最优点和信息框
+    redraw = _slider_blit()
+    redraw.request(float(np.random.default_rng().integers(0, 220) * 100))
+
+
+_SLIDER_FIGURE = None
+_SLIDER_BLIT = None
+
+
+def _slider_figure():
+    global _SLIDER_FIGURE
+    if _SLIDER_FIGURE is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(14, 9))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        line, = ax.plot(_B_300, efficiency(_B_300, 1300, SCRIPT_RULES), lw=2, color='deepskyblue')
+        ax.set_ylim(-0.0001, 0.01)
+        _SLIDER_FIGURE = (fig, line)
+    return _SLIDER_FIGURE
+
+
+def _slider_blit():
+    global _SLIDER_BLIT
+    if _SLIDER_BLIT is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from .redraw import BlitRedraw, EfficiencyCurves, ylim_level
+        fig = Figure(figsize=(14, 9))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        curves = EfficiencyCurves(_B_300, np.arange(0, 21901, 100), SCRIPT_RULES, max_bid=10000)
+        line, = ax.plot(_B_300, curves.curves[13], lw=2, color='deepskyblue')
+        marker, = ax.plot([], [], 'ro', markersize=8)
+        info = ax.text(0.02, 0.95, '', transform=ax.transAxes, verticalalignment='top',
+                       bbox=dict(boxstyle='round,pad=0.5', fc='wheat', alpha=0.5))
+
+        def update(p_others):
+            ydata, bid, eff = curves.lookup(p_others)
+            line.set_ydata(ydata)
+            marker.set_data([bid], [eff])
+            info.set_text(f'P_others: {p_others:.0f}\nOptimal B: {bid}\nMax Efficiency: {eff:.5f}')
+            return ylim_level(eff)
+
+        _SLIDER_BLIT = BlitRedraw(ax, [line, marker, info], update, interval_ms=0)
+        fig.canvas.draw()
+    return _SLIDER_BLIT
+
+
+def run_case(func, items, min_time=0.5, max_runs=10_000, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_runs and (len(samples) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    samples = np.asarray(samples) / 1e9
+    return {
+        "runs": len(samples),
+        "p50_s": float(np.percentile(samples, 50)),
+        "p99_s": float(np.percentile(samples, 99)),
+        "mean_s": float(samples.mean()),
+        "items_per_call": items,
+        "throughput_items_per_s": float(items / np.median(samples)),
+    }
+
+
+def run(pattern="*", min_time=0.5):
+    results = {}
+    for name, (func, items) in CASES.items():
+        if fnmatch.fnmatch(name, pattern) or pattern in name:
+            results[name] = run_case(func, items, min_time)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """返回回归的用例列表 [(名称, 当前 p50, 基线 p50)]。"""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base and result["p50_s"] > base["p50_s"] * tolerance:
+            regressions.append((name, result["p50_s"], base["p50_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.bench", description="规则计算 / 最优搜索 / 网格 / 绘图的基准测试")
+    parser.add_argument("--filter", default="*", help="只运行名字匹配的用例（通配符或子串）")
+    parser.add_argument("--min-time", type=float, default=0.5, help="每个用例至少运行的秒数")
+    parser.add_argument("--json", help="把结果写到这个 JSON 文件")
+    parser.add_argument("--compare", help="与基线 JSON 比较，p50 超过 tolerance 倍时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update-baseline", metavar="PATH", help="把本次结果写成新的基线")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    report = run(args.filter, args.min_time)
+    text = json.dumps(report, indent=2)
+    for path in filter(None, (args.json, args.update_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, current, base in regressions:
+            print(f"REGRESSION {name}: p50 {current * 1e3:.3f} ms vs baseline {base * 1e3:.3f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+单个 P_others 下“划算度 vs 你的出价 B”曲线的数据序列，带有界 LRU 缓存。
+
+P_others 滑块只有约 215 个取值，缓存键为 (P_others, rules, 绘图上限, 采样点数)，
+拖动滑块时重复出现的取值直接命中缓存。返回的数组是只读的，可以安全地在会话之间共享。
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from . import profiling
+from .rules import DEFAULT_RULES, efficiency
+
+CURVE_CACHE_SIZE = 1024
+
+
+def b_plot_limit(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000):
+    """
+    X轴（你的出价B）的实际绘图上限：
+    不超过 b_plot_upper_limit，也不能使 P_total 超过 max_total_pool，但至少绘制到最低出价。
+    """
+    return max(min(b_plot_upper_limit, rules.max_total_pool - p_others), rules.minimum_bid)
+
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+@profiling.timed("curve.efficiency")  # 只统计缓存未命中时的计算
+def efficiency_curve(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000, num=300):
+    """
+    返回 (b_range, efficiencies)：在 [minimum_bid, 绘图上限] 上均匀取 num 个点，
+    并插入每个档位边界 (threshold - P_others) 及其后一点，以便准确画出跳变。
+    """
+    limit = b_plot_limit(p_others, rules, b_plot_upper_limit)
+    b_range = np.linspace(rules.minimum_bid, limit, num)
+    critical = rules.bounds - p_others
+    critical = critical[(critical >= rules.minimum_bid) & (critical <= limit)]
+    if critical.size:
+        b_range = np.unique(np.concatenate((b_range, critical, critical + 1)))
+        b_range = b_range[(b_range >= rules.minimum_bid) & (b_range <= limit)]
+    effs = efficiency(b_range, p_others, rules)
+    b_range.setflags(write=False)
+    effs.setflags(write=False)
+    return b_range, effs
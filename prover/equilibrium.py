@@ -0,0 +1,143 @@
+"""
+多人出价均衡：所有参与者都在做同样的“划算度最大化”，用最优反应迭代求均衡。
+
+每个玩家 i 面对的 P_others 是其他所有人出价之和，最优反应由 solver.optimal_bids 一次性
+对全部玩家（各自的预算作为出价上限）求出。分档断点论证保证这等价于在完整整数出价区间上搜索，
+所以 pure 模式每一轮的代价是 O(玩家数 × 档位数)，1000 人的均衡在毫秒级完成。
+找不到正划算度出价（预算不足或加入就会爆池）的玩家不出价 (B = 0)。
+
+- pure:  带惯性的最优反应动态。每轮随机让一部分“想改出价”的玩家改为最优反应，
+         避免所有人同步跳动造成的振荡；没有人想改时即为纯策略纳什均衡。
+- mixed: 虚拟对局 (fictitious play)。第 0 轮所有人不出价；之后每一轮，每个玩家对“其他人过去各轮出价”
+         的经验分布（每一轮的 P_others 等概率）求期望划算度最高的出价。返回的出价是各玩家历史出价的平均值，
+         participation 是出价 > 0 的频率，efficiencies 是各自的混合策略在该分布下的期望划算度。
+         residual 为相对可剥削度：Σ(最优反应的期望划算度 − 混合策略的期望划算度) / Σ 最优反应的期望划算度，
+         不超过 tol 时视为收敛。人数多到“所有人都出最低价就爆池”时，虚拟对局会停在人人出价、池子爆掉的
+         弱均衡上（谁改出价都拿不到正划算度），这个结果没有参考价值。
+"""
+from typing import NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import profiling
+from .rules import DEFAULT_RULES, efficiency, star_prize
+from .solver import optimal_bids
+
+
+class EquilibriumResult(NamedTuple):
+    bids: np.ndarray  # 每个玩家的出价（mixed 模式下为期望出价）
+    participation: np.ndarray  # 每个玩家出价的概率（pure 模式下为 0/1）
+    pool: float  # 均衡时的总点数池
+    efficiencies: np.ndarray  # 每个玩家在均衡池下的划算度（mixed 模式下为期望划算度）
+    converged: bool
+    iterations: int
+    pool_history: np.ndarray  # 每轮的总池，用于观察收敛过程
+    residual: float  # pure：sum|BR - 出价| / 总池；mixed：相对可剥削度。0 表示没有人想改策略
+
+
+def best_responses(bids, budgets, rules=DEFAULT_RULES):
+    """对当前出价向量，所有玩家同时计算的最优反应 (出价, 划算度)。"""
+    others = bids.sum() - bids
+    br, eff = optimal_bids(others, rules, max_bid=budgets)
+    return np.where(br >= 0, br, 0), eff
+
+
+def best_response_residual(bids, br):
+    """最优反应残差：所有玩家的最优反应与当前出价之差的绝对值之和，相对总池。"""
+    return float(np.abs(br - bids).sum() / max(bids.sum(), 1.0))
+
+
+@profiling.timed("equilibrium.solve")
+def solve_equilibrium(budgets, rules=DEFAULT_RULES, mode="pure", max_iter=20_000, inertia=0.1, tol=1e-3, seed=None):
+    """
+    budgets: 每个玩家可用的点数（数组）。
+    inertia: pure 模式下每轮让想改出价的玩家中约多大比例真正改动。
+    tol:     mixed 模式下相对可剥削度不超过 tol 时视为收敛。
+    """
+    budgets = np.asarray(budgets, dtype=float)
+    rng = np.random.default_rng(seed)
+    bids = np.zeros(len(budgets), dtype=np.int64)
+    history = []
+
+    if mode == "pure":
+        converged = False
+        for iteration in range(1, max_iter + 1):
+            br, _ = best_responses(bids, budgets, rules)
+            unstable = br != bids
+            history.append(bids.sum())
+            if not unstable.any():
+                converged = True
+                break
+            movers = unstable & (rng.random(len(bids)) < inertia)
+            if not movers.any():
+                movers[rng.choice(np.flatnonzero(unstable))] = True
+            bids = np.where(movers, br, bids)
+        participation = (bids > 0).astype(float)
+        expected_bids = bids.astype(float)
+    elif mode == "mixed":
+        return _fictitious_play(budgets, rules, max_iter, tol)
+    else:
+        raise ValueError(f"unknown mode {mode!r}, expected 'pure' or 'mixed'")
+
+    pool = float(expected_bids.sum())
+    effs = efficiency(expected_bids, pool - expected_bids, rules)
+    residual = best_response_residual(expected_bids, best_responses(expected_bids, budgets, rules)[0])
+    return EquilibriumResult(expected_bids, participation, pool, effs, converged, iteration, np.asarray(history),
+                             residual)
+
+
+def _fictitious_play(budgets, rules, max_iter, tol):
+    """
+    mixed 模式。acc[i, B] 累计玩家 i 出价 B 在过去各轮 P_others 下的划算度，最优反应就是按行取 argmax
+    （并列时取较小的 B）。各玩家出过的 (玩家, 出价) 及次数存成稀疏的 keys / counts。
+    内存和每轮的代价都是 O(玩家数 × 最大预算)。
+    """
+    n = len(budgets)
+    cap = int(rules.max_total_pool)
+    lowest = int(np.ceil(rules.minimum_bid))
+    cols = max(int(min(budgets.max(initial=0), cap)), lowest) + 1
+    # table[x] = 总池为 x 时单位出价的划算度，超过上限为 0；每个玩家的一行是其中从 P_others 开始的一段
+    x = np.arange(cap + cols + 1, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = np.where((x > 0) & (x <= cap), star_prize(x, rules) / x, 0.0)
+    windows = sliding_window_view(table, cols - lowest)
+    allowed = np.arange(cols) <= np.floor(budgets)[:, None]
+    allowed[:, :lowest] = False
+    players = np.arange(n)
+
+    acc = np.zeros((n, cols))
+    keys = np.zeros(0, dtype=np.int64)  # 玩家 * cols + 出价
+    counts = np.zeros(0)
+    bids = np.zeros(n, dtype=np.int64)
+    total_bid = 0.0
+    history = []
+    converged = False
+    for iteration in range(1, max_iter + 1):
+        # 记下这一轮实际出现的出价
+        p_others = bids.sum() - bids
+        acc[:, lowest:] += windows[np.minimum(p_others + lowest, len(windows) - 1)]
+        played = players * cols + bids
+        pos = np.searchsorted(keys, played)
+        seen = pos < len(keys)
+        seen[seen] = keys[pos[seen]] == played[seen]
+        counts[pos[seen]] += 1
+        keys = np.insert(keys, pos[~seen], played[~seen])
+        counts = np.insert(counts, pos[~seen], 1.0)
+        total_bid += bids.sum()
+        history.append(total_bid / iteration)
+
+        masked = np.where(allowed, acc, -np.inf)
+        br = masked.argmax(axis=1)
+        best = np.maximum(masked[players, br], 0.0) / iteration
+        mixed = np.bincount(keys // cols, weights=counts * acc.ravel()[keys], minlength=n) / iteration ** 2
+        residual = float((best - mixed).sum() / best.sum()) if best.sum() > 0 else 0.0
+        if residual <= tol:
+            converged = True
+            break
+        bids = np.where(best > 0, br, 0)
+
+    expected_bids = np.bincount(keys // cols, weights=counts * (keys % cols), minlength=n) / iteration
+    participation = np.bincount(keys // cols, weights=counts * (keys % cols > 0), minlength=n) / iteration
+    return EquilibriumResult(expected_bids, participation, float(expected_bids.sum()), mixed, converged, iteration,
+                             np.asarray(history), residual)
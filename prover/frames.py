@@ -0,0 +1,257 @@
+"""
+预渲染的 P_others 扫描帧缓存：滑块的每一档（约 216 档）渲染一次，之后拖动 / 播放时直接取帧，不再重新画图。
+
+每一帧就是 prove.py 的“划算度 vs 你的出价 B”图（plotting.efficiency_figure，带最优点），
+以固定尺寸栅格化后拼进一张 PNG 雪碧图 (sprite sheet)，可选再导出一个循环播放的 GIF。
+index.json 记录每帧在雪碧图中的位置和该帧的最优出价 / 总池 / 星星 / 划算度，页面不需要再求解。
+
+渲染在进程池中并行：各进程把自己负责的帧直接写入共享内存中的雪碧图数组（同 sweep），不经过 pickle。
+缓存目录以 Rules.version_key 和渲染参数命名，规则常量改变时自动重建，否则直接复用。
+
+用法:
+    python -m prover.frames build --minimum-bid 500 --gif
+    python -m prover.frames info --minimum-bid 500
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import profiling
+from .curve import b_plot_limit
+from .rules import DEFAULT_RULES, add_rule_arguments, rules_from_args, star_prize
+from .solver import optimal_bid
+from .storage import SharedArray, fill_shared, publish_directory
+
+FRAMES_FORMAT = 1
+DEFAULT_FRAMES_DIR = os.environ.get(
+    "PROVER_FRAMES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".frames"),
+)
+DEFAULT_STEP = 100  # 与 prove.py 滑块的步长相同
+DEFAULT_DPI = 60  # 10 x 5 英寸的图 → 600 x 300 像素的帧
+SHEET_COLUMNS = 12
+GIF_FRAME_MS = 80
+
+
+def frame_p_others(rules=DEFAULT_RULES, step=DEFAULT_STEP):
+    """滑块的全部取值：0 到 max_total_pool - minimum_bid，步长 step。"""
+    return np.arange(0, int(rules.max_total_pool - rules.minimum_bid) + 1, step)
+
+
+def frames_path(rules=DEFAULT_RULES, b_plot_upper_limit=10000, step=DEFAULT_STEP, dpi=DEFAULT_DPI, directory=None):
+    settings = hashlib.sha1(repr((b_plot_upper_limit, step, dpi)).encode()).hexdigest()[:8]
+    return os.path.join(directory or DEFAULT_FRAMES_DIR, f"v{FRAMES_FORMAT}-{rules.version_key}-{settings}")
+
+
+def frame_optimum(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000):
+    """与 prove.py 相同：在绘图上限之内的精确最优出价。"""
+    optimum = optimal_bid(p_others, rules, max_bid=b_plot_limit(p_others, rules, b_plot_upper_limit))
+    if optimum.bid == -1 or optimum.efficiency <= 0:
+        return {"p_others": float(p_others), "optimal_b": None, "p_total": float(p_others), "stars": 0.0,
+                "efficiency": 0.0}
+    return {"p_others": float(p_others), "optimal_b": int(optimum.bid), "p_total": float(optimum.p_total),
+            "stars": float(star_prize(optimum.p_total, rules)), "efficiency": float(optimum.efficiency)}
+
+
+def render_frame(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000, dpi=DEFAULT_DPI):
+    """一帧的 RGB 像素 (height, width, 3)。所有帧的尺寸相同（不裁边）。"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    from .plotting import efficiency_figure
+
+    optimum = frame_optimum(p_others, rules, b_plot_upper_limit)
+    optimal_b = -1 if optimum["optimal_b"] is None else optimum["optimal_b"]
+    fig = efficiency_figure(float(p_others), rules, b_plot_upper_limit, optimal_b, optimum["efficiency"])
+    fig.set_dpi(dpi)
+    fig.tight_layout()  # 尺寸固定，只调整边距使坐标轴标签完整
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[..., :3]
+
+
+def _render_into(sheet, frame_shape, indices, p_others, rules, b_plot_upper_limit, dpi):
+    """渲染 indices 对应的帧并写进雪碧图；进程池里由 fill_shared 调用，sheet 在共享内存中。"""
+    height, width = frame_shape
+    for i, p in zip(indices, p_others):
+        row, col = divmod(i, SHEET_COLUMNS)
+        sheet[row * height:(row + 1) * height, col * width:(col + 1) * width] = render_frame(
+            p, rules, b_plot_upper_limit, dpi)
+    return len(indices)
+
+
+def _save_gif(sheet, index, path):
+    """按 index 里各帧的位置从雪碧图切出帧，写成循环播放的 GIF。"""
+    from PIL import Image
+
+    height, width = index["frame_height"], index["frame_width"]
+    frames = [Image.fromarray(sheet[f["y"]:f["y"] + height, f["x"]:f["x"] + width]).quantize(colors=64)
+              for f in index["frames"]]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=GIF_FRAME_MS, loop=0, optimize=True)
+
+
+def _write_index(directory, index):
+    with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+
+
+@profiling.timed("frames.build")
+def build_frames(rules=DEFAULT_RULES, b_plot_upper_limit=10000, step=DEFAULT_STEP, dpi=DEFAULT_DPI, directory=None,
+                 workers=None, gif=False):
+    """渲染全部帧，写出 sprite.png、index.json（以及可选的 animation.gif），返回缓存目录。"""
+    from PIL import Image
+
+    path = frames_path(rules, b_plot_upper_limit, step, dpi, directory)
+    p_others = frame_p_others(rules, step)
+    first = render_frame(p_others[0], rules, b_plot_upper_limit, dpi)
+    height, width = first.shape[:2]
+    columns = min(SHEET_COLUMNS, len(p_others))
+    rows = math.ceil(len(p_others) / SHEET_COLUMNS)
+    sheet_shape = (rows * height, columns * width, 3)
+    rest = np.arange(1, len(p_others))
+    workers = min(workers or os.cpu_count() or 1, len(rest))
+
+    if workers > 1:
+        with SharedArray(sheet_shape, np.uint8, fill=255) as shared:
+            shared.array[:height, :width] = first
+            # spawn 而不是 fork：构建可能由多线程的 Streamlit 进程发起
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = [pool.submit(fill_shared, (shared.spec,), _render_into, (height, width), chunk.tolist(),
+                                       p_others[chunk].tolist(), rules, b_plot_upper_limit, dpi)
+                           for chunk in np.array_split(rest, workers * 4) if len(chunk)]
+                for future in futures:
+                    future.result()
+            sheet = shared.copy()
+    else:
+        sheet = np.full(sheet_shape, 255, dtype=np.uint8)
+        sheet[:height, :width] = first
+        _render_into(sheet, (height, width), rest.tolist(), p_others[rest].tolist(), rules, b_plot_upper_limit, dpi)
+
+    index = {
+        "format": FRAMES_FORMAT,
+        "rules": {"minimum_bid": rules.minimum_bid, "max_total_pool": rules.max_total_pool,
+                  "star_multiplier": rules.star_multiplier, "thresholds": list(rules.thresholds)},
+        "version_key": rules.version_key,
+        "b_plot_upper_limit": b_plot_upper_limit,
+        "step": step,
+        "dpi": dpi,
+        "frame_width": width,
+        "frame_height": height,
+        "columns": SHEET_COLUMNS,
+        "sprite": "sprite.png",
+        "gif": "animation.gif" if gif else None,
+        "frames": [dict(frame_optimum(p, rules, b_plot_upper_limit),
+                        x=(i % SHEET_COLUMNS) * width, y=(i // SHEET_COLUMNS) * height)
+                   for i, p in enumerate(p_others)],
+    }
+    with publish_directory(path) as tmp:
+        Image.fromarray(sheet).save(os.path.join(tmp, "sprite.png"), optimize=True)
+        if gif:
+            _save_gif(sheet, index, os.path.join(tmp, index["gif"]))
+        _write_index(tmp, index)
+    return path
+
+
+@profiling.timed("frames.add_gif")
+def add_gif(cache):
+    """给没有 GIF 的帧缓存补上 animation.gif：直接用已有的雪碧图，不重新渲染。返回新的 FrameCache。"""
+    index = dict(cache.index, gif="animation.gif")
+    with publish_directory(cache.path) as tmp:
+        shutil.copyfile(os.path.join(cache.path, index["sprite"]), os.path.join(tmp, index["sprite"]))
+        _save_gif(cache.sheet, index, os.path.join(tmp, index["gif"]))
+        _write_index(tmp, index)
+    return FrameCache(cache.path)
+
+
+class FrameCache:
+    """已构建的帧缓存：index 为 index.json 的内容，frame(i) 返回雪碧图中第 i 帧的只读视图。"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+        self._sheet = None
+
+    @property
+    def frames(self):
+        return self.index["frames"]
+
+    @property
+    def sheet(self):
+        if self._sheet is None:
+            from PIL import Image
+
+            with Image.open(os.path.join(self.path, self.index["sprite"])) as image:
+                sheet = np.asarray(image.convert("RGB"))
+            sheet.setflags(write=False)
+            self._sheet = sheet
+        return self._sheet
+
+    @property
+    def gif_path(self):
+        return os.path.join(self.path, self.index["gif"]) if self.index.get("gif") else None
+
+    def nearest(self, p_others):
+        """最接近 p_others 的帧下标。"""
+        return int(np.clip(round(p_others / self.index["step"]), 0, len(self.frames) - 1))
+
+    def frame(self, i):
+        info = self.frames[i]
+        return self.sheet[info["y"]:info["y"] + self.index["frame_height"],
+                          info["x"]:info["x"] + self.index["frame_width"]]
+
+
+def load_frames(rules=DEFAULT_RULES, b_plot_upper_limit=10000, step=DEFAULT_STEP, dpi=DEFAULT_DPI, directory=None,
+                build=True, workers=None, gif=False):
+    """
+    打开与规则和渲染参数对应的帧缓存；不存在时（规则改过或第一次运行）自动构建。
+    gif=True 时保证缓存带 animation.gif：已有缓存缺 GIF 时由雪碧图补上（add_gif）。
+    """
+    path = frames_path(rules, b_plot_upper_limit, step, dpi, directory)
+    if not os.path.isfile(os.path.join(path, "index.json")):
+        if not build:
+            raise FileNotFoundError(f"frame cache for rules {rules.version_key} not found at {path}")
+        build_frames(rules, b_plot_upper_limit, step, dpi, directory, workers, gif)
+    cache = FrameCache(path)
+    if gif and cache.gif_path is None and build:
+        cache = add_gif(cache)
+    return cache
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default=None, help=f"缓存目录 (默认 {DEFAULT_FRAMES_DIR}，可用 PROVER_FRAMES_DIR 覆盖)")
+    common.add_argument("--b-plot-upper-limit", type=int, default=10000, help="X 轴（出价 B）的绘图上限")
+    common.add_argument("--step", type=int, default=DEFAULT_STEP, help="相邻两帧 P_others 的间隔")
+    common.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    add_rule_arguments(common)
+    parser = argparse.ArgumentParser(prog="python -m prover.frames", description="预渲染 P_others 扫描的帧缓存")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", parents=[common], help="(重新) 渲染全部帧")
+    build.add_argument("--gif", action="store_true", help="同时导出 animation.gif")
+    build.add_argument("--workers", type=int, default=None, help="渲染进程数 (默认 CPU 核数)")
+    sub.add_parser("info", parents=[common], help="查看缓存内容")
+    args = parser.parse_args(argv)
+
+    rules = rules_from_args(args)
+    if args.command == "build":
+        print(build_frames(rules, args.b_plot_upper_limit, args.step, args.dpi, args.dir, args.workers, args.gif))
+        return
+    cache = load_frames(rules, args.b_plot_upper_limit, args.step, args.dpi, args.dir, build=False)
+    index = cache.index
+    print(f"{cache.path}: {len(cache.frames)} frames of {index['frame_width']}x{index['frame_height']}, "
+          f"gif={'yes' if index.get('gif') else 'no'}")
+    for frame in cache.frames[::max(1, len(cache.frames) // 10)]:
+        print(f"P_others={frame['p_others']:g} optimal_B={frame['optimal_b']} P_total={frame['p_total']:g} "
+              f"stars={frame['stars']:g} efficiency={frame['efficiency']:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+任意大的 (P_others, B) 划算度网格的栅格化热力图，替代大网格下的 plot_surface。
+
+plot_surface 每个网格点都是一个面片，几百个点每轴之后就又慢又占内存。这里把网格按行（P_others）分块计算，
+每块沿 B 方向用 reduceat 聚合到输出像素，再合并到 (height, width) 的栅格上，从不物化完整的 float64 网格：
+内存只与输出分辨率和块大小有关，与网格大小无关。
+P_others 和 B 都是整数时，划算度只取决于 P_total，直接查按 P_total 预先算好的一维表（同 atlas），不再逐点分档。
+
+每个像素的值为其覆盖的网格点划算度的最大值 (max，保留细窄的高划算度带) 或平均值 (mean)。
+图上叠加档位边界 B + P_others = 阈值（直线）和每个 P_others 的最优出价（最优 B 脊线）。
+
+用法:
+    python -m prover.heatmap --p-others 0:21900:1 --bids 100:22000:1 -o heatmap.png
+    python -m prover.heatmap --p-others 0:21500:1 --bids 500:10000:1 --reduce mean --minimum-bid 500
+"""
+import argparse
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from . import profiling
+from .ranges import parse_range
+from .rules import DEFAULT_RULES, Rules, add_rule_arguments, base_stars, efficiency, rules_from_args
+from .solver import optimal_bids
+
+DEFAULT_WIDTH = 800
+DEFAULT_HEIGHT = 600
+DEFAULT_CHUNK_CELLS = 2_000_000
+RIDGE_SAMPLES_PER_PIXEL = 4
+COLOR_QUANTILE = 0.99
+
+
+class Raster(NamedTuple):
+    values: np.ndarray  # (height, width) float32：行为 B（从小到大），列为 P_others（从小到大）
+    extent: tuple  # (p_min, p_max, b_min, b_max)，可直接交给 imshow
+    reduce: str
+    rules: Rules
+
+
+def _pixel_starts(n, pixels):
+    """把 n 个有序样本连续地分给 pixels 个像素，返回每个像素的第一个样本下标（每个像素至少一个样本）。"""
+    return np.arange(pixels) * n // pixels
+
+
+def _efficiency_table(rules):
+    """整数 P_total = 0..max_total_pool + 1 的划算度，最后一格代表爆池。"""
+    p_total = np.arange(int(rules.max_total_pool) + 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = np.where(p_total > 0, base_stars(p_total, rules) * rules.star_multiplier / p_total, 0.0)
+    return table.astype(np.float32)
+
+
+@profiling.timed("heatmap.rasterize")
+def rasterize(p_others_values, b_values, rules=DEFAULT_RULES, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT,
+              reduce="max", chunk_cells=DEFAULT_CHUNK_CELLS):
+    """
+    把 p_others_values × b_values（均为升序一维数组）上的划算度聚合成最多 height × width 的栅格。
+    样本数少于像素数的方向上，每个样本占一个像素。
+    """
+    if reduce not in ("max", "mean"):
+        raise ValueError(f"unknown reduce {reduce!r}, expected 'max' or 'mean'")
+    p_others_values = np.asarray(p_others_values, dtype=float)
+    b_values = np.asarray(b_values, dtype=float)
+    width = min(width, len(p_others_values))
+    height = min(height, len(b_values))
+    p_starts = _pixel_starts(len(p_others_values), width)
+    b_starts = _pixel_starts(len(b_values), height)
+    p_pixel = np.repeat(np.arange(width), np.diff(np.append(p_starts, len(p_others_values))))
+    ufunc = np.maximum if reduce == "max" else np.add
+
+    integral = (np.array_equal(p_others_values, np.round(p_others_values))
+                and np.array_equal(b_values, np.round(b_values)))
+    if integral:
+        table = _efficiency_table(rules)
+        b_int = b_values.astype(np.int64)
+        # b_values 升序，低于最低出价的是一段前缀
+        n_invalid = int(np.searchsorted(b_values, rules.minimum_bid, side="left"))
+
+    acc = np.zeros((width, height), dtype=np.float64 if reduce == "mean" else np.float32)
+    rows = max(1, chunk_cells // len(b_values))
+    for lo in range(0, len(p_others_values), rows):
+        p_chunk = p_others_values[lo:lo + rows]
+        if integral:
+            # 超出表范围的 P_total 都是爆池，mode="clip" 落到最后一格
+            eff = np.take(table, p_chunk.astype(np.int64)[:, None] + b_int[None, :], mode="clip")
+            eff[:, :n_invalid] = 0
+        else:
+            eff = efficiency(b_values[None, :], p_chunk[:, None], rules).astype(np.float32)
+        block = ufunc.reduceat(eff, b_starts, axis=1)
+        # 块内的行按像素列合并；一个像素列可能跨两个块，合并到 acc 时再取 max / 累加
+        pixels = p_pixel[lo:lo + rows]
+        starts = np.flatnonzero(np.r_[True, pixels[1:] != pixels[:-1]])
+        block = ufunc.reduceat(block, starts, axis=0)
+        target = pixels[starts]
+        acc[target] = ufunc(acc[target], block)
+
+    if reduce == "mean":
+        counts = np.outer(np.diff(np.append(p_starts, len(p_others_values))),
+                          np.diff(np.append(b_starts, len(b_values))))
+        acc /= counts
+    extent = (float(p_others_values[0]), float(p_others_values[-1]), float(b_values[0]), float(b_values[-1]))
+    return Raster(acc.T.astype(np.float32), extent, reduce, rules)
+
+
+def optimal_ridge(raster):
+    """栅格范围内每个 P_others 的最优出价 (P_others, B)，每个像素列取 RIDGE_SAMPLES_PER_PIXEL 个点。"""
+    p_min, p_max, b_min, b_max = raster.extent
+    p_others = np.linspace(p_min, p_max, raster.values.shape[1] * RIDGE_SAMPLES_PER_PIXEL).round()
+    bids, _ = optimal_bids(p_others, raster.rules)
+    keep = (bids >= b_min) & (bids <= b_max)
+    return p_others[keep], bids[keep]
+
+
+def draw_heatmap(ax, raster, tiers=True, ridge=True, p_others_marker=None):
+    """在 ax 上画出栅格、档位边界、最优 B 脊线，p_others_marker 不为 None 时标出当前的 P_others。"""
+    p_min, p_max, b_min, b_max = raster.extent
+    # P_total 很小时划算度极高（最低出价附近），颜色上限取正值的 99% 分位数，否则其余区域都是同一种颜色
+    positive = raster.values[raster.values > 0]
+    vmax = float(np.quantile(positive, COLOR_QUANTILE)) if positive.size else None
+    image = ax.imshow(raster.values, origin="lower", extent=raster.extent, aspect="auto", cmap="viridis",
+                      interpolation="nearest", vmin=0, vmax=vmax)
+    if tiers:
+        x = np.array([p_min, p_max])
+        for i, bound in enumerate(raster.rules.bounds):
+            ax.plot(x, bound - x, color="white", linestyle="--", linewidth=0.8, alpha=0.7,
+                    label="Tier boundary (B + P_others = threshold)" if i == 0 else None)
+    if ridge:
+        ridge_p, ridge_b = optimal_ridge(raster)
+        ax.scatter(ridge_p, ridge_b, s=1, color="red", label="Optimal B")
+    if p_others_marker is not None:
+        ax.axvline(p_others_marker, color="orange", linewidth=1, label=f"P_others = {p_others_marker:.0f}")
+    ax.set_xlim(p_min, p_max)
+    ax.set_ylim(b_min, b_max)
+    ax.set_xlabel("Sum of Others' Bids (P_others)")
+    ax.set_ylabel("Your Bid (B)")
+    ax.set_title(f"Efficiency ({raster.reduce} per pixel, P_total <= {raster.rules.max_total_pool:g})")
+    if tiers or ridge or p_others_marker is not None:
+        ax.legend(loc="upper right", fontsize="small", markerscale=5)
+    return image
+
+
+@profiling.timed("heatmap.figure")
+def heatmap_figure(raster, tiers=True, ridge=True, p_others_marker=None, figsize=(10, 7)):
+    """draw_heatmap 画在一个独立的 Figure 上（不使用 pyplot，可在 Streamlit 中并发渲染）。"""
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    image = draw_heatmap(ax, raster, tiers, ridge, p_others_marker)
+    fig.colorbar(image, ax=ax, label="Efficiency (Star_Prize / P_total)", extend="max")
+    return fig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.heatmap", description="大网格划算度热力图")
+    parser.add_argument("--p-others", type=parse_range, default=None,
+                        help="P_others 范围 start:stop:step（默认 0:max_total_pool - minimum_bid:1）")
+    parser.add_argument("--bids", type=parse_range, default=None,
+                        help="B 范围 start:stop:step（默认 minimum_bid:max_total_pool:1）")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument("--reduce", choices=("max", "mean"), default="max", help="像素内的聚合方式")
+    parser.add_argument("--chunk-cells", type=int, default=DEFAULT_CHUNK_CELLS, help="每块计算的网格点数")
+    parser.add_argument("-o", "--output", default="efficiency_heatmap.png")
+    add_rule_arguments(parser)
+    args = parser.parse_args(argv)
+
+    rules = rules_from_args(args)
+    minimum_bid = int(np.ceil(rules.minimum_bid))
+    max_total_pool = int(rules.max_total_pool)
+    p_others = args.p_others if args.p_others is not None else np.arange(0, max_total_pool - minimum_bid + 1)
+    bids = args.bids if args.bids is not None else np.arange(minimum_bid, max_total_pool + 1)
+    t0 = time.perf_counter()
+    raster = rasterize(p_others, bids, rules, args.width, args.height, args.reduce, args.chunk_cells)
+    print(f"{len(p_others)} x {len(bids)} grid -> {raster.values.shape[1]} x {raster.values.shape[0]} pixels "
+          f"in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    heatmap_figure(raster).savefig(args.output, bbox_inches="tight", dpi=120)
+    print(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+历史比赛数据的本地列式存储：池子变化轨迹和每场比赛的结果。
+
+每张表是一个目录：schema.json 加上每列一个原始二进制文件 (<列名>.bin)。
+追加数据就是在每个列文件末尾写入，读取用 np.memmap，不复制、不解析。
+写到一半中断时各列长度可能不一致，表长按最短的一列计算，下次追加前先截齐。
+
+- trajectories: contest_id, minutes_before_close, pool   （距截止 T 分钟时池子里已有的点数）
+- outcomes:     contest_id, final_pool, tier, my_bid, stars  （最终 P_total、达到的档位、我的出价、赢得的星星）
+
+查询“距截止 T 分钟时 P_others 约为 X 的比赛，最终池子如何分布”用轨迹表上的排序索引：
+键为 (整数分钟 << 32) | 整数池子，一次查询只是对 2 × 分钟窗口个边界做 searchsorted，
+几年的数据（上千万行快照）也在毫秒级完成。索引保存在磁盘上，追加新数据后只对新增的行排序，
+再和已排序的旧键合并（timsort 识别出两段有序序列，近似线性）。
+
+用法:
+    python -m prover.history import --trajectories traj.csv --outcomes outcomes.csv
+    python -m prover.history query 16200 30 --pool-tolerance 250
+    python -m prover.history info
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from . import profiling
+from .rules import DEFAULT_RULES, add_rule_arguments, base_stars, rules_from_args
+
+HISTORY_FORMAT = 1
+DEFAULT_HISTORY_DIR = os.environ.get(
+    "PROVER_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".history"),
+)
+TRAJECTORY_SCHEMA = {"contest_id": "int64", "minutes_before_close": "float32", "pool": "float32"}
+OUTCOME_SCHEMA = {"contest_id": "int64", "final_pool": "float32", "tier": "uint8", "my_bid": "float32",
+                  "stars": "float32"}
+KEY_SHIFT = 32
+DEFAULT_POOL_TOLERANCE = 250
+DEFAULT_MINUTES_TOLERANCE = 1
+
+
+class ColumnTable:
+    """一张追加写入的列式表，schema 为 {列名: dtype}。"""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        os.makedirs(path, exist_ok=True)
+        schema_path = os.path.join(path, "schema.json")
+        stored = {"format": HISTORY_FORMAT, "columns": {name: dtype.str for name, dtype in self.schema.items()}}
+        if os.path.exists(schema_path):
+            with open(schema_path, encoding="utf-8") as f:
+                if json.load(f) != stored:
+                    raise ValueError(f"schema of {path} does not match {stored['columns']}")
+        else:
+            with open(schema_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, indent=2)
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __len__(self):
+        sizes = []
+        for name, dtype in self.schema.items():
+            try:
+                sizes.append(os.path.getsize(self._file(name)) // dtype.itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(sizes)
+
+    def append(self, **columns):
+        arrays = {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in self.schema.items()}
+        lengths = {len(a) for a in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"columns have different lengths: { {n: len(a) for n, a in arrays.items()} }")
+        rows = len(self)
+        for name, array in arrays.items():
+            with open(self._file(name), "ab") as f:
+                # 丢掉上次中断留下的半截数据，保证各列对齐
+                f.truncate(rows * array.itemsize)
+                f.write(array.tobytes())
+        return rows + lengths.pop()
+
+    def column(self, name, rows=None):
+        """只读的 memmap 列（前 rows 行，默认全部）。"""
+        rows = len(self) if rows is None else rows
+        if rows == 0:
+            return np.empty(0, dtype=self.schema[name])
+        return np.memmap(self._file(name), dtype=self.schema[name], mode="r", shape=(rows,))
+
+
+class HistoryQuery(NamedTuple):
+    contest_ids: np.ndarray
+    pool_at_t: np.ndarray  # 距截止 T 分钟时的池子（即当时的 P_others）
+    final_pool: np.ndarray  # 最终 P_total
+    my_bid: np.ndarray
+    tier: np.ndarray
+    stars: np.ndarray
+
+    @property
+    def late_arrivals(self):
+        """T 之后其他人又加了多少点（扣除我自己的出价）。"""
+        return np.maximum(self.final_pool - self.my_bid - self.pool_at_t, 0.0)
+
+    def histogram(self, rules=DEFAULT_RULES):
+        """后续加注量的整数直方图，格式与 montecarlo.late_arrival_histogram 相同，可直接交给 evaluate。"""
+        n_bins = int(rules.max_total_pool) + 2
+        late = np.clip(np.rint(self.late_arrivals), 0, n_bins - 1).astype(np.int64)
+        return np.bincount(late, minlength=n_bins)
+
+
+def _keys(minutes_before_close, pool):
+    minutes = np.floor(np.maximum(minutes_before_close, 0)).astype(np.int64)
+    pool = np.clip(np.floor(pool), 0, (1 << KEY_SHIFT) - 1).astype(np.int64)
+    return (minutes << KEY_SHIFT) | pool
+
+
+class HistoryStore:
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_HISTORY_DIR
+        self.trajectories = ColumnTable(os.path.join(self.directory, "trajectories"), TRAJECTORY_SCHEMA)
+        self.outcomes = ColumnTable(os.path.join(self.directory, "outcomes"), OUTCOME_SCHEMA)
+        self._index = None
+        self._outcome_index = None
+
+    def row_counts(self):
+        """(轨迹行数, 结果行数)，追加数据后就会变化，可以作为查询结果缓存的键。"""
+        return len(self.trajectories), len(self.outcomes)
+
+    def add_contest(self, contest_id, minutes_before_close, pools, final_pool, my_bid=0.0, stars=None,
+                    rules=DEFAULT_RULES):
+        """追加一场比赛：轨迹快照（距截止的分钟数和对应的池子）和最终结果。stars 省略时按规则计算。"""
+        minutes_before_close = np.asarray(minutes_before_close, dtype=float)
+        tier = int(base_stars(final_pool, rules))
+        if stars is None:
+            stars = tier * rules.star_multiplier if my_bid >= rules.minimum_bid else 0.0
+        self.trajectories.append(contest_id=np.full(len(minutes_before_close), contest_id),
+                                 minutes_before_close=minutes_before_close, pool=pools)
+        self.outcomes.append(contest_id=[contest_id], final_pool=[final_pool], tier=[tier], my_bid=[my_bid],
+                             stars=[stars])
+
+    def _index_files(self):
+        base = self.trajectories.path
+        return os.path.join(base, "index.json"), os.path.join(base, "index-keys.npy"), os.path.join(base, "index-rows.npy")
+
+    def trajectory_index(self):
+        """(排序后的键, 对应的行号)。索引过期时只对新增的行排序并合并，然后写回磁盘。"""
+        rows = len(self.trajectories)
+        if self._index is not None and self._index[0] == rows:
+            return self._index[1], self._index[2]
+
+        meta_path, keys_path, rows_path = self._index_files()
+        indexed, keys, order = 0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if self._index is not None and self._index[0] <= rows:
+            indexed, keys, order = self._index
+        elif os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                stored = json.load(f)["rows"]
+            if stored <= rows:
+                indexed, keys, order = stored, np.load(keys_path, mmap_mode="r"), np.load(rows_path, mmap_mode="r")
+
+        if indexed < rows:
+            new_keys = _keys(self.trajectories.column("minutes_before_close", rows)[indexed:],
+                             self.trajectories.column("pool", rows)[indexed:])
+            new_order = np.arange(indexed, rows, dtype=np.int64)
+            sort = np.argsort(new_keys, kind="stable")
+            keys = np.concatenate((keys, new_keys[sort]))
+            order = np.concatenate((order, new_order[sort]))
+            merge = np.argsort(keys, kind="stable")
+            keys, order = keys[merge], order[merge]
+            for path, array in ((keys_path, keys), (rows_path, order)):
+                tmp = path + ".tmp.npy"
+                np.save(tmp, array)
+                os.replace(tmp, path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"rows": rows}, f)
+
+        self._index = (rows, keys, order)
+        return keys, order
+
+    def _outcome_lookup(self):
+        rows = len(self.outcomes)
+        if self._outcome_index is None or self._outcome_index[0] != rows:
+            ids = np.asarray(self.outcomes.column("contest_id", rows))
+            order = np.argsort(ids, kind="stable")
+            self._outcome_index = (rows, ids[order], order)
+        return self._outcome_index[1], self._outcome_index[2]
+
+    @profiling.timed("history.query")
+    def final_pool_distribution(self, p_others, minutes_before_close, pool_tolerance=DEFAULT_POOL_TOLERANCE,
+                                minutes_tolerance=DEFAULT_MINUTES_TOLERANCE):
+        """
+        距截止 minutes_before_close (± minutes_tolerance) 分钟时池子在 p_others ± pool_tolerance 之内的比赛，
+        每场只取最接近该时刻的一个快照，返回这些比赛的 HistoryQuery（按 contest_id 排序）。
+        """
+        keys, order = self.trajectory_index()
+        minutes = np.arange(max(0, int(np.floor(minutes_before_close - minutes_tolerance))),
+                            int(np.floor(minutes_before_close + minutes_tolerance)) + 1, dtype=np.int64)
+        low = (minutes << KEY_SHIFT) | max(0, int(np.floor(p_others - pool_tolerance)))
+        high = (minutes << KEY_SHIFT) | max(0, int(np.floor(p_others + pool_tolerance)))
+        starts, ends = np.searchsorted(keys, low, "left"), np.searchsorted(keys, high, "right")
+        rows = np.sort(np.concatenate([order[s:e] for s, e in zip(starts, ends)] or [np.empty(0, np.int64)]))
+
+        table = self.trajectories
+        contest = table.column("contest_id")[rows]
+        pool = table.column("pool")[rows].astype(float)
+        distance = np.abs(table.column("minutes_before_close")[rows].astype(float) - minutes_before_close)
+        # 键只精确到整数分钟和整数点，索引给出的是候选行，这里再按精确的容差筛一遍
+        exact = (np.abs(pool - p_others) <= pool_tolerance) & (distance <= minutes_tolerance)
+        contest, pool, distance = contest[exact], pool[exact], distance[exact]
+        first = np.lexsort((distance, contest))
+        contest, pool = contest[first], pool[first]
+        keep = np.r_[True, contest[1:] != contest[:-1]] if len(contest) else np.empty(0, dtype=bool)
+        contest, pool = contest[keep], pool[keep]
+
+        outcome_ids, outcome_rows = self._outcome_lookup()
+        pos = np.clip(np.searchsorted(outcome_ids, contest), 0, max(len(outcome_ids) - 1, 0))
+        found = (outcome_ids[pos] == contest) if len(outcome_ids) else np.zeros(len(contest), dtype=bool)
+        contest, pool, rows = contest[found], pool[found], outcome_rows[pos[found]]
+        outcomes = self.outcomes
+        return HistoryQuery(contest, pool,
+                            outcomes.column("final_pool")[rows].astype(float),
+                            outcomes.column("my_bid")[rows].astype(float),
+                            outcomes.column("tier")[rows],
+                            outcomes.column("stars")[rows].astype(float))
+
+    def import_csv(self, trajectories_csv=None, outcomes_csv=None, rules=DEFAULT_RULES, chunk_rows=1_000_000):
+        """
+        按块导入 CSV。轨迹需要 contest_id, minutes_before_close, pool 列；
+        结果需要 contest_id, final_pool 列，tier / my_bid / stars 可选（缺省时按规则计算）。
+        """
+        import pandas as pd
+
+        imported = {}
+        if trajectories_csv:
+            for chunk in pd.read_csv(trajectories_csv, chunksize=chunk_rows):
+                self.trajectories.append(**{name: chunk[name].to_numpy() for name in TRAJECTORY_SCHEMA})
+                imported["trajectories"] = imported.get("trajectories", 0) + len(chunk)
+        if outcomes_csv:
+            for chunk in pd.read_csv(outcomes_csv, chunksize=chunk_rows):
+                final_pool = chunk["final_pool"].to_numpy(dtype=float)
+                my_bid = chunk["my_bid"].to_numpy(dtype=float) if "my_bid" in chunk else np.zeros(len(chunk))
+                tier = chunk["tier"].to_numpy() if "tier" in chunk else base_stars(final_pool, rules)
+                if "stars" in chunk:
+                    stars = chunk["stars"].to_numpy()
+                else:
+                    stars = np.where(my_bid >= rules.minimum_bid, tier * rules.star_multiplier, 0.0)
+                self.outcomes.append(contest_id=chunk["contest_id"].to_numpy(), final_pool=final_pool, tier=tier,
+                                     my_bid=my_bid, stars=stars)
+                imported["outcomes"] = imported.get("outcomes", 0) + len(chunk)
+        return imported
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--dir", default=None, help=f"数据目录 (默认 {DEFAULT_HISTORY_DIR}，可用 PROVER_HISTORY_DIR 覆盖)")
+    parser = argparse.ArgumentParser(prog="python -m prover.history", description="历史比赛数据的导入与查询")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", parents=[common], help="从 CSV 追加轨迹 / 结果")
+    importer.add_argument("--trajectories", help="contest_id, minutes_before_close, pool")
+    importer.add_argument("--outcomes", help="contest_id, final_pool[, tier, my_bid, stars]")
+    add_rule_arguments(importer)
+    query = sub.add_parser("query", parents=[common], help="距截止 T 分钟时 P_others 约为 X 的比赛的最终池子分布")
+    query.add_argument("p_others", type=float)
+    query.add_argument("minutes_before_close", type=float)
+    query.add_argument("--pool-tolerance", type=float, default=DEFAULT_POOL_TOLERANCE)
+    query.add_argument("--minutes-tolerance", type=float, default=DEFAULT_MINUTES_TOLERANCE)
+    sub.add_parser("info", parents=[common], help="表的行数")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.dir)
+    if args.command == "import":
+        imported = store.import_csv(args.trajectories, args.outcomes, rules_from_args(args))
+        store.trajectory_index()
+        print(json.dumps(imported))
+    elif args.command == "info":
+        print(json.dumps({"directory": store.directory, "trajectories": len(store.trajectories),
+                          "outcomes": len(store.outcomes)}))
+    else:
+        store.trajectory_index()
+        start = time.perf_counter()
+        result = store.final_pool_distribution(args.p_others, args.minutes_before_close, args.pool_tolerance,
+                                               args.minutes_tolerance)
+        elapsed_ms = (time.perf_counter() - start) * 1e3
+        if len(result.contest_ids) == 0:
+            print("no matching contests", file=sys.stderr)
+            sys.exit(1)
+        percentiles = [5, 25, 50, 75, 95]
+        tiers, counts = np.unique(result.tier, return_counts=True)
+        print(json.dumps({
+            "contests": len(result.contest_ids),
+            "final_pool_percentiles": dict(zip(map(str, percentiles),
+                                               np.percentile(result.final_pool, percentiles).round(1).tolist())),
+            "late_arrival_percentiles": dict(zip(map(str, percentiles),
+                                                 np.percentile(result.late_arrivals, percentiles).round(1).tolist())),
+            "tier_frequency": {str(t): round(c / len(result.tier), 4) for t, c in zip(tiers.tolist(), counts)},
+            "query_ms": round(elapsed_ms, 3),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
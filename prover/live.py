@@ -0,0 +1,385 @@
+"""
+实时模式：跟踪池子更新数据流，每次更新后重新计算最优出价、档位和距爆池 (max_total_pool) 的余量。
+
+数据源（代替比赛 API 的本地数据流），每行一个事件：
+- JSONL 文件，像 tail -f 一样从末尾开始跟踪（--file）
+- 标准输入管道（--stdin）
+- 本地 Unix socket 或 TCP 端口，可以有多个写入方同时连接（--socket / --tcp）
+
+事件是 JSON 对象 {"p_others": 16200, "max_bid": 3000}（max_bid 可选），或者一行一个数字。
+
+突发更新会被合并：读取协程只把最新一行放进一个槽位，计算协程每次只处理槽位里最新的事件，
+中间被覆盖的事件既不解析也不计算。整数 P_others 直接在预计算图谱里查表，其余情况用分档断点精确求解，
+与上一次相同的输入不会重复计算和推送，因此从收到一行到算出结果只需微秒级。
+
+结果推送到若干 sink：标准输出、webhook (HTTP POST JSON) 和状态文件（原子替换写入，
+prove.py 侧边栏的“跟随实时数据”读取它来驱动页面）。状态文件默认放在仓库根目录的 .live/state.json
+（与 .atlas / .history / .frames 相同，和当前工作目录无关），可用 PROVER_LIVE_STATE 覆盖。
+
+用法:
+    python -m prover.live --file feed.jsonl --state-file --minimum-bid 500
+    producer | python -m prover.live --stdin --json
+    python -m prover.live --socket /tmp/prover.sock --webhook http://127.0.0.1:8080/hook
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import NamedTuple
+
+from . import profiling
+from .rules import DEFAULT_RULES, add_rule_arguments, base_stars, rules_from_args
+from .solver import optimal_bid
+
+DEFAULT_STATE_FILE = os.environ.get(
+    "PROVER_LIVE_STATE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".live", "state.json"),
+)
+POLL_INTERVAL = 0.01  # 跟踪文件时没有新数据的轮询间隔（秒）
+
+
+class LiveUpdate(NamedTuple):
+    seq: int  # 已推送结果的序号
+    p_others: float
+    max_bid: float  # 无上限时为 None
+    bid: int  # 最优出价，-1 表示没有划算度为正的出价
+    p_total: float
+    tier: int  # 最优出价所在的档位（星星基数）
+    efficiency: float
+    overflow_margin: float  # 按最优出价出价后距离 max_total_pool 还剩多少点（不出价时按 P_others 计算）
+    coalesced: int  # 这次结果合并了多少个事件
+    latency_us: float  # 从收到最新一行到算出结果、交给 sink 之前的时间（微秒），不含 sink 本身的耗时
+
+    def as_dict(self):
+        return self._asdict()
+
+
+def _finite_number(value):
+    # bool 是 int 的子类，json 还会把 NaN / Infinity 解析成 float，这些都不是合法的点数
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def parse_event(line):
+    """把一行解析成 (p_others, max_bid)，无法识别（包括非有限值和 true / false）时返回 None。"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if _finite_number(event):
+        return float(event), None
+    if isinstance(event, dict):
+        p_others = event.get("p_others", event.get("pool"))
+        max_bid = event.get("max_bid")
+        if _finite_number(p_others) and (max_bid is None or _finite_number(max_bid)):
+            return float(p_others), None if max_bid is None else float(max_bid)
+    return None
+
+
+class LiveOptimizer:
+    """
+    逐个事件的最优出价计算。atlas 给出时整数 P_others 直接读 memmap 数组（不经过 numpy 的向量化路径），
+    否则调用 solver.optimal_bid；与上一次输入相同时返回 None。
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, atlas=None):
+        self.rules = rules
+        self.atlas = atlas
+        self.seq = 0
+        self._last_input = None
+
+    @profiling.timed("live.update")
+    def update(self, p_others, max_bid=None, coalesced=1):
+        if (p_others, max_bid) == self._last_input:
+            return None
+        self._last_input = (p_others, max_bid)
+
+        atlas = self.atlas
+        if atlas is not None and max_bid is None and p_others.is_integer() and 0 <= p_others <= atlas.max_p_others:
+            bid = int(atlas.optimal_bid_by_p_others[int(p_others)])
+            eff = float(atlas.optimal_efficiency_by_p_others[int(p_others)])
+            tier = int(atlas.tiers_by_total[int(p_others) + bid]) if bid >= 0 else 0
+        else:
+            result = optimal_bid(p_others, self.rules, max_bid)
+            bid, eff = int(result.bid), float(result.efficiency)
+            tier = int(base_stars(p_others + bid, self.rules)) if bid >= 0 else 0
+
+        p_total = p_others + max(bid, 0)
+        self.seq += 1
+        return LiveUpdate(self.seq, p_others, max_bid, bid, p_total, tier, eff,
+                          self.rules.max_total_pool - p_total, coalesced, 0.0)
+
+
+class LatestSlot:
+    """只保留最新一行的邮箱：put 覆盖旧值并计数，get 等到有值后取走。"""
+
+    def __init__(self):
+        self._line = None
+        self._received = 0
+        self._pending = 0
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def put(self, line):
+        self._line = line
+        self._received = time.perf_counter_ns()
+        self._pending += 1
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self):
+        """返回 (line, 收到的时间, 合并的事件数)；数据源全部结束且没有剩余事件时返回 None。"""
+        await self._ready.wait()
+        self._ready.clear()
+        if self._pending == 0:
+            return None
+        item = (self._line, self._received, self._pending)
+        self._line, self._pending = None, 0
+        if self.closed:
+            self._ready.set()
+        return item
+
+
+# --- 数据源：把每一行放进 LatestSlot ---
+
+async def tail_file(path, slot, from_start=False, poll=POLL_INTERVAL):
+    """像 tail -F 一样跟踪文件；文件被截断或替换时从头重新读取。"""
+    # 文件还不存在时，等它出现后从头读起
+    while not os.path.exists(path):
+        from_start = True
+        await asyncio.sleep(poll)
+    f = open(path, "r", encoding="utf-8")
+    try:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ""
+        while True:
+            line = f.readline()
+            if line:
+                # 写入方可能只写了半行，等换行符到了再处理
+                partial += line
+                if partial.endswith("\n"):
+                    slot.put(partial)
+                    partial = ""
+                continue
+            await asyncio.sleep(poll)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_ino != os.fstat(f.fileno()).st_ino or stat.st_size < f.tell():
+                f.close()
+                f = open(path, "r", encoding="utf-8")
+                partial = ""
+    finally:
+        f.close()
+
+
+async def read_stream(reader, slot):
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        slot.put(line.decode("utf-8", "replace"))
+
+
+async def read_stdin(slot):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    await read_stream(reader, slot)
+
+
+async def serve_socket(slot, path=None, host="127.0.0.1", port=None):
+    """接受任意多个连接，每个连接的每一行都是一个事件。"""
+    async def handle(reader, writer):
+        try:
+            await read_stream(reader, slot)
+        finally:
+            writer.close()
+
+    if path is not None:
+        server = await asyncio.start_unix_server(handle, path=path)
+    else:
+        server = await asyncio.start_server(handle, host=host, port=port)
+    async with server:
+        await server.serve_forever()
+
+
+# --- sink：接收 LiveUpdate ---
+
+class StdoutSink:
+    def __init__(self, as_json=False, stream=None):
+        self.as_json = as_json
+        self.stream = stream or sys.stdout
+
+    def __call__(self, update):
+        if self.as_json:
+            text = json.dumps(update.as_dict())
+        else:
+            text = (f"#{update.seq} P_others={update.p_others:g} optimal_B={update.bid} P_total={update.p_total:g} "
+                    f"tier={update.tier} efficiency={update.efficiency:.5f} margin={update.overflow_margin:g} "
+                    f"coalesced={update.coalesced}")
+        self.stream.write(text + "\n")
+        self.stream.flush()
+
+
+def write_state(path, update):
+    """原子地写出状态文件：先写临时文件再 os.replace，读者永远不会读到写了一半的 JSON。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".state-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(update.as_dict(), f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_state(path=DEFAULT_STATE_FILE):
+    """读取 write_state 写出的最新结果（dict），文件不存在或 p_others 不是有限数（旧版本写出的 NaN）时返回 None。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    return state if isinstance(state, dict) and _finite_number(state.get("p_others")) else None
+
+
+class StateFileSink:
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+
+    def __call__(self, update):
+        write_state(self.path, update)
+
+
+class WebhookSink:
+    """
+    把结果以 JSON POST 到 url。请求在线程池里发送，不阻塞事件循环；
+    上一个请求还没完成时只保留最新的一个结果，慢的接收方只会少收到中间结果，不会拖慢计算。
+    """
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+        self._pending = None
+        self._task = None
+
+    def __call__(self, update):
+        self._pending = update
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        while self._pending is not None:
+            update, self._pending = self._pending, None
+            try:
+                await loop.run_in_executor(None, self._post, update)
+            except OSError as e:
+                print(f"webhook {self.url} failed: {e}", file=sys.stderr)
+
+    def _post(self, update):
+        request = urllib.request.Request(self.url, data=json.dumps(update.as_dict()).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+async def consume(slot, optimizer, sinks):
+    """计算协程：每次取最新事件，重新求解并推送给所有 sink。"""
+    skipped = 0
+    while True:
+        item = await slot.get()
+        if item is None:
+            return
+        line, received, coalesced = item
+        event = parse_event(line)
+        if event is None:
+            skipped += coalesced
+            continue
+        update = optimizer.update(*event, coalesced=coalesced + skipped)
+        skipped = 0
+        if update is None:
+            continue
+        latency_us = (time.perf_counter_ns() - received) / 1e3
+        update = update._replace(latency_us=latency_us)
+        for sink in sinks:
+            sink(update)
+
+
+async def run(sources, optimizer, sinks):
+    """运行所有数据源和计算协程，直到数据源全部结束（文件和 socket 数据源不会自行结束）。"""
+    slot = LatestSlot()
+    consumer = asyncio.create_task(consume(slot, optimizer, sinks))
+    try:
+        await asyncio.gather(*(source(slot) for source in sources))
+    finally:
+        slot.close()
+    await consumer
+    # 等还在发送的 webhook 请求完成
+    await asyncio.gather(*(sink._task for sink in sinks if getattr(sink, "_task", None)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.live", description="跟踪池子更新，实时计算最优出价")
+    source = parser.add_argument_group("数据源（可同时使用多个）")
+    source.add_argument("--file", help="跟踪的 JSONL 文件")
+    source.add_argument("--from-start", action="store_true", help="从文件开头读起，而不是只读新追加的行")
+    source.add_argument("--stdin", action="store_true", help="从标准输入管道读取")
+    source.add_argument("--socket", help="监听的 Unix socket 路径")
+    source.add_argument("--tcp", metavar="[HOST:]PORT", help="监听的本地 TCP 端口")
+    sink = parser.add_argument_group("输出")
+    sink.add_argument("--json", action="store_true", help="标准输出每行一个 JSON 对象")
+    sink.add_argument("--quiet", action="store_true", help="不写标准输出")
+    sink.add_argument("--state-file", nargs="?", const=DEFAULT_STATE_FILE,
+                      help=f"原子写入最新结果的状态文件；不带路径时写到 prove.py 默认读取的 {DEFAULT_STATE_FILE}")
+    sink.add_argument("--webhook", action="append", default=[], help="POST 每个结果的 URL，可重复")
+    parser.add_argument("--no-atlas", action="store_true", help="不使用预计算图谱，始终用分档断点求解")
+    add_rule_arguments(parser)
+    args = parser.parse_args(argv)
+
+    sources = []
+    if args.file:
+        sources.append(lambda slot: tail_file(args.file, slot, args.from_start))
+    if args.stdin:
+        sources.append(read_stdin)
+    if args.socket:
+        sources.append(lambda slot: serve_socket(slot, path=args.socket))
+    if args.tcp:
+        host, _, port = args.tcp.rpartition(":")
+        sources.append(lambda slot: serve_socket(slot, host=host or "127.0.0.1", port=int(port)))
+    if not sources:
+        parser.error("need at least one of --file / --stdin / --socket / --tcp")
+
+    rules = rules_from_args(args)
+    atlas = None
+    if not args.no_atlas:
+        from .atlas import load_atlas
+        atlas = load_atlas(rules)
+    sinks = [] if args.quiet else [StdoutSink(args.json)]
+    if args.state_file:
+        sinks.append(StateFileSink(args.state_file))
+    sinks.extend(WebhookSink(url) for url in args.webhook)
+
+    try:
+        asyncio.run(run(sources, LiveOptimizer(rules, atlas), sinks))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+最终点数池不确定时的蒙特卡洛分析。
+
+出价时看到的 P_others 只是当时的池子，之后其他人还会继续加注。
+给定“后续加注总量”的分布（经验样本，或 Poisson 次数 × 单笔出价大小），
+对每个候选出价 B 估计期望星星、期望划算度、超过 MAX_TOTAL_POOL 的概率以及划算度的分位数区间。
+
+后续加注量与 P_others、B 无关，所以先把所有情景压缩成一个整数直方图（可分块、可多进程），
+之后对任意 P_others / B 的评估只是直方图上的加权求和，拖动滑块时不需要重新抽样。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from . import profiling
+from .rules import DEFAULT_RULES, efficiency, star_prize
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class PoissonArrivals:
+    """
+    后续加注 = N 笔出价之和，N ~ Poisson(rate)，
+    每笔出价 = min_bid + Exponential(mean_bid - min_bid)。
+    N 笔指数分布之和服从 Gamma(N, scale)，所以每个情景只需一次抽样。
+    """
+    rate: float
+    mean_bid: float
+    min_bid: float = DEFAULT_RULES.minimum_bid
+
+    def __call__(self, rng, size):
+        counts = rng.poisson(self.rate, size)
+        scale = max(self.mean_bid - self.min_bid, 0.0)
+        extra = np.zeros(size)
+        positive = counts > 0
+        if scale > 0:
+            extra[positive] = rng.gamma(counts[positive], scale)
+        return counts * self.min_bid + extra
+
+
+@dataclass(frozen=True)
+class EmpiricalArrivals:
+    """从历史观测到的后续加注量中有放回地抽样。"""
+    samples: tuple
+
+    def __call__(self, rng, size):
+        return rng.choice(np.asarray(self.samples, dtype=float), size)
+
+
+class MonteCarloResult(NamedTuple):
+    bids: np.ndarray
+    expected_stars: np.ndarray  # 期望 Star_Prize
+    expected_efficiency: np.ndarray
+    overflow_probability: np.ndarray  # 最终 P_total > max_total_pool 的概率
+    efficiency_low: np.ndarray  # 划算度的下分位数
+    efficiency_high: np.ndarray  # 划算度的上分位数
+
+
+def _histogram_chunk(sampler, size, seed, n_bins):
+    late = sampler(np.random.default_rng(seed), size)
+    late = np.clip(np.rint(late), 0, n_bins - 1).astype(np.int64)
+    return np.bincount(late, minlength=n_bins)
+
+
+@profiling.timed("montecarlo.histogram")
+def late_arrival_histogram(sampler, n_scenarios, rules=DEFAULT_RULES, chunk_size=DEFAULT_CHUNK_SIZE,
+                           workers=None, seed=None):
+    """
+    抽取 n_scenarios 个后续加注量，返回长度为 max_total_pool + 2 的整数直方图。
+    最后一格汇总所有 > max_total_pool 的加注量（无论出价多少都会爆池）。
+    按 chunk_size 分块抽样，内存只与块大小有关；workers > 1 时用进程池并行。
+    """
+    if n_scenarios <= 0 or chunk_size <= 0:
+        raise ValueError(f"n_scenarios and chunk_size must be positive, got {n_scenarios} and {chunk_size}")
+    n_bins = int(rules.max_total_pool) + 2
+    sizes = [chunk_size] * (n_scenarios // chunk_size)
+    if n_scenarios % chunk_size:
+        sizes.append(n_scenarios % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers and workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(_histogram_chunk, [sampler] * len(sizes), sizes, seeds, [n_bins] * len(sizes))
+            return sum(parts)
+    return sum(_histogram_chunk(sampler, size, s, n_bins) for size, s in zip(sizes, seeds))
+
+
+@profiling.timed("montecarlo.evaluate")
+def evaluate(p_others, bids, histogram, rules=DEFAULT_RULES, quantiles=(0.05, 0.95), chunk=64):
+    """
+    在后续加注直方图上评估每个候选出价 B。
+    只使用直方图中非零的格子，并按 chunk 个出价一组计算，内存为 O(chunk × 非零格数)。
+    """
+    bids = np.asarray(bids, dtype=float)
+    if histogram.sum() <= 0:
+        raise ValueError("histogram has no scenarios")
+    late = np.flatnonzero(histogram)
+    counts = histogram[late]
+    total = counts.sum()
+    weights = counts / total
+
+    n = len(bids)
+    expected_stars, expected_eff, overflow, low, high = (np.zeros(n) for _ in range(5))
+    for start in range(0, n, chunk):
+        b = bids[start:start + chunk, None]
+        p_total = p_others + b + late
+        prizes = np.where(b >= rules.minimum_bid, star_prize(p_total, rules), 0)
+        effs = efficiency(b, p_others + late, rules)
+        expected_stars[start:start + chunk] = prizes @ weights
+        expected_eff[start:start + chunk] = effs @ weights
+        overflow[start:start + chunk] = (p_total > rules.max_total_pool) @ weights
+
+        # 加权分位数：每一行按划算度排序后找累积情景数首次达到 q × 总数的位置（用整数累加，避免浮点误差）
+        order = np.argsort(effs, axis=1)
+        sorted_effs = np.take_along_axis(effs, order, axis=1)
+        cum = np.cumsum(counts[order], axis=1)
+        rows = np.arange(len(b))
+        last = len(late) - 1
+        low[start:start + chunk] = sorted_effs[rows, np.minimum((cum < quantiles[0] * total).sum(axis=1), last)]
+        high[start:start + chunk] = sorted_effs[rows, np.minimum((cum < quantiles[1] * total).sum(axis=1), last)]
+    return MonteCarloResult(bids, expected_stars, expected_eff, overflow, low, high)
+
+
+def simulate(p_others, bids, sampler, n_scenarios=1_000_000, rules=DEFAULT_RULES, quantiles=(0.05, 0.95),
+             chunk_size=DEFAULT_CHUNK_SIZE, workers=None, seed=None):
+    """抽样 + 评估的便捷入口。需要对多个 P_others 评估时，先调 late_arrival_histogram 再复用直方图。"""
+    histogram = late_arrival_histogram(sampler, n_scenarios, rules, chunk_size, workers, seed)
+    return evaluate(p_others, bids, histogram, rules, quantiles)
@@ -0,0 +1,123 @@
+"""
+prove.py 的“划算度 vs 你的出价 B”图，以及按滑块取值缓存的 PNG 渲染结果。
+
+这里直接使用 matplotlib.figure.Figure 而不是 pyplot：不依赖全局状态，
+多个 Streamlit 会话并发渲染时也是线程安全的。
+
+1.py / 2.py / 3.py 通过 pyplot() 延迟导入 pyplot：没有图形界面时（服务器、cron）自动改用 Agg，
+show_or_save() 在非交互式后端下把图保存成 PNG，而不是调用一个什么也不显示的 plt.show()。
+"""
+import io
+import os
+import sys
+from functools import lru_cache
+
+from matplotlib.figure import Figure
+from matplotlib.ticker import MultipleLocator
+
+from . import profiling
+from .curve import efficiency_curve
+from .rules import DEFAULT_RULES
+
+FIGURE_CACHE_SIZE = 256  # 滑块约 215 个取值，全部缓存下来
+NON_INTERACTIVE_BACKENDS = ("agg", "cairo", "pdf", "pgf", "ps", "svg", "template")
+
+
+def headless():
+    """Linux 上没有 X11 / Wayland 显示，且用户没有用 MPLBACKEND 指定后端。"""
+    return (sys.platform.startswith("linux") and "MPLBACKEND" not in os.environ
+            and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"))
+
+
+def pyplot():
+    """导入并返回 matplotlib.pyplot，无图形界面时先切换到 Agg。"""
+    if headless():
+        import matplotlib
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def interactive_backend(plt):
+    return plt.get_backend().lower() not in NON_INTERACTIVE_BACKENDS
+
+
+@profiling.timed("plot.show_or_save")
+def show_or_save(fig, filename):
+    """交互式后端下弹出窗口；非交互式后端下把 fig 保存为 filename 并返回路径。"""
+    plt = pyplot()
+    if interactive_backend(plt):
+        plt.show()
+        return None
+    fig.savefig(filename, bbox_inches="tight")
+    print(f"no display available, figure saved to {os.path.abspath(filename)}")
+    return filename
+
+
+@profiling.timed("plot.figure")
+def efficiency_figure(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000, optimal_b=-1, max_eff=0.0, band=None,
+                      equilibrium_p_others=None):
+    """
+    画出给定 P_others 下的划算度曲线，optimal_b != -1 时标出最优点。
+    band 为 montecarlo.MonteCarloResult 时，在曲线周围画出期望划算度和分位数区间。
+    equilibrium_p_others 不为 None 时，叠加一条“其他人按均衡出价”时的划算度曲线。
+    """
+    b_range, effs = efficiency_curve(p_others, rules, b_plot_upper_limit)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    if len(b_range) > 0:
+        ax.plot(b_range, effs, marker='.', linestyle='-', markersize=3, color='deepskyblue')
+        if band is not None:
+            ax.fill_between(band.bids, band.efficiency_low, band.efficiency_high, color='orange', alpha=0.25,
+                            label='Efficiency band (late arrivals)')
+            ax.plot(band.bids, band.expected_efficiency, linestyle='--', color='darkorange', label='Expected efficiency')
+        if equilibrium_p_others is not None:
+            eq_b_range, eq_effs = efficiency_curve(equilibrium_p_others, rules, b_plot_upper_limit)
+            ax.plot(eq_b_range, eq_effs, linestyle='-.', color='gray',
+                    label=f'Equilibrium pool (P_others = {equilibrium_p_others:.0f})')
+        if optimal_b != -1:
+            ax.scatter([optimal_b], [max_eff], color='red', s=80, zorder=5,
+                       label=f'Optimal B: {optimal_b:.0f}\nMax Eff: {max_eff:.5f}')
+        if optimal_b != -1 or band is not None or equilibrium_p_others is not None:
+            ax.legend(loc='upper right', fontsize='small')
+        y_top = max_eff if band is None else max(max_eff, float(band.efficiency_high.max()))
+        ax.set_ylim(bottom=0, top=max(0.001, y_top * 1.2))
+    else:
+        ax.text(0.5, 0.5, "No valid Bids to plot for current P_others\n (e.g., P_others too high)",
+                horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+
+    ax.set_xlabel(f'Your Bid (B) points (Min {rules.minimum_bid}, Max Displayed {b_plot_upper_limit})', fontsize=10)
+    ax.set_ylabel('Cost-Effectiveness (Efficiency)', fontsize=10)
+    ax.set_title(f'Efficiency vs. Your Bid (P_others = {p_others:g})', fontsize=12)
+
+    # X轴刻度由固定的绘图上限决定，而不是动态的实际绘图范围，这样刻度标准始终一致
+    if b_plot_upper_limit <= 2000:
+        x_tick_step = 100
+    elif b_plot_upper_limit <= 10000:
+        x_tick_step = 500
+    else:
+        x_tick_step = 1000
+    ax.xaxis.set_major_locator(MultipleLocator(x_tick_step))
+    ax.set_xlim(left=0, right=b_plot_upper_limit + x_tick_step * 0.1)
+    ax.tick_params(axis='x', labelrotation=30, labelsize=8)
+    ax.tick_params(axis='y', labelsize=8)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.grid(True, linestyle=':', alpha=0.5)
+    return fig
+
+
+@profiling.timed("plot.png")
+def figure_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def efficiency_figure_png(p_others, rules=DEFAULT_RULES, b_plot_upper_limit=10000, optimal_b=-1, max_eff=0.0,
+                          equilibrium_p_others=None):
+    """efficiency_figure 渲染成的 PNG 字节。同一组参数只渲染一次。"""
+    return figure_png(efficiency_figure(p_others, rules, b_plot_upper_limit, optimal_b, max_eff,
+                                        equilibrium_p_others=equilibrium_p_others))
@@ -0,0 +1,225 @@
+"""
+轻量的阶段计时：在各分析器的关键阶段（求解、曲线、画图、PNG 编码、传给 Streamlit ……）埋点，
+找出一次交互的时间到底花在哪里。
+
+    with profiling.phase("plot.figure"):
+        fig = efficiency_figure(...)
+
+    @profiling.timed("curve.efficiency")
+    def efficiency_curve(...): ...
+
+关闭时（默认）phase() 直接返回一个共享的空上下文，timed() 包装的函数只多一次标志检查，每次埋点的开销约 0.2 微秒。
+用环境变量 PROVER_PROFILE=1、profiling.enable() 或 prove.py 侧边栏的开关打开。
+打开后每个阶段记录次数、总耗时、最小 / 最大值，以及按 2 的幂微秒分桶的直方图（用于估计分位数）；
+count() 记录任意计数器。数据是进程级的，多个 Streamlit 会话 / 线程共享同一份统计。
+
+命令行：在计时打开的情况下运行一个模块或脚本，结束后打印各阶段统计，可导出 JSON 或 cProfile 数据:
+    python -m prover.profiling --json phases.json prover.heatmap -o /tmp/heatmap.png
+    python -m prover.profiling --cprofile 3.prof 3.py --heatmap
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+
+N_BUCKETS = 32  # 第 k 个桶为 [2^(k-1), 2^k) 微秒，第 0 个桶为 < 1 微秒
+
+_enabled = os.environ.get("PROVER_PROFILE", "") not in ("", "0")
+_lock = threading.Lock()
+_phases = {}
+_counters = Counter()
+
+
+class PhaseStats:
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * N_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[min(int(seconds * 1e6).bit_length(), N_BUCKETS - 1)] += 1
+
+    def quantile(self, q):
+        """由直方图估计的分位数（秒），取所在桶的上界，不超过最大值。"""
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(2 ** k * 1e-6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "min_s": self.min if self.count else 0.0,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "max_s": self.max,
+            "histogram_us": {f"<{2 ** k}": n for k, n in enumerate(self.buckets) if n},
+        }
+
+
+def record(name, seconds):
+    with _lock:
+        stats = _phases.get(name)
+        if stats is None:
+            stats = _phases[name] = PhaseStats()
+        stats.add(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def phase(name):
+    """计时上下文；计时关闭时返回共享的空上下文。"""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(name):
+    """函数装饰器版的 phase(name)。开关在调用时检查，运行中打开 / 关闭计时都会生效。"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """当前全部统计，可直接 json.dumps。阶段按总耗时从高到低排列。"""
+    with _lock:
+        phases = {name: stats.as_dict() for name, stats in _phases.items()}
+        counters = dict(_counters)
+    phases = dict(sorted(phases.items(), key=lambda item: -item[1]["total_s"]))
+    return {"enabled": _enabled, "phases": phases, "counters": counters}
+
+
+def to_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+
+
+def format_report(data=None):
+    data = snapshot() if data is None else data
+    lines = [f"{'phase':<28} | {'count':>7} | {'total ms':>10} | {'mean ms':>9} | {'p50 ms':>8} | "
+             f"{'p95 ms':>8} | {'max ms':>8}"]
+    for name, stats in data["phases"].items():
+        lines.append(f"{name:<28} | {stats['count']:>7} | {stats['total_s'] * 1e3:>10.2f} | "
+                     f"{stats['mean_s'] * 1e3:>9.3f} | {stats['p50_s'] * 1e3:>8.3f} | "
+                     f"{stats['p95_s'] * 1e3:>8.3f} | {stats['max_s'] * 1e3:>8.3f}")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<28} | {value:>7}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.profiling",
+                                     description="打开阶段计时运行一个模块 (prover.xxx) 或脚本 (xxx.py)")
+    parser.add_argument("--json", help="把阶段统计写成 JSON")
+    parser.add_argument("--cprofile", help="同时用 cProfile 运行，并把统计数据写到这个文件 (pstats / snakeviz 可读)")
+    parser.add_argument("--top", type=int, default=20, help="cProfile 按累计耗时输出前几个函数")
+    parser.add_argument("target", help="模块名 (例如 prover.heatmap) 或脚本路径 (例如 3.py)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="传给目标的参数")
+    args = parser.parse_args(argv)
+
+    enable()
+    sys.argv = [args.target] + args.args
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if args.target.endswith(".py"):
+            runpy.run_path(args.target, run_name="__main__")
+        else:
+            runpy.run_module(args.target, run_name="__main__", alter_sys=True)
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            print(f"{args.target} exited with {exc.code}", file=sys.stderr)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            import pstats
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(args.top)
+        print(format_report(), file=sys.stderr)
+        if args.json:
+            to_json(args.json)
+
+
+if __name__ == "__main__":
+    # python -m 运行时本文件是 __main__，计时开关和统计必须用各模块导入的那个 prover.profiling
+    from prover.profiling import main
+    main()
@@ -0,0 +1,18 @@
+"""
+命令行的范围参数 (start:stop:step)。只依赖 numpy，batch / heatmap / sweep 共用，
+heatmap 和 sweep 不必为了解析参数而导入 batch（及 pandas / pyarrow）。
+"""
+import numpy as np
+
+
+def parse_range(text):
+    """'start:stop:step'（包含 stop）或单个数值，返回数组。"""
+    parts = [float(v) for v in text.split(":")]
+    if len(parts) == 1:
+        return np.array(parts)
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) > 2 else 1.0
+    values = np.arange(start, stop + step / 2, step)
+    if all(v.is_integer() for v in parts):
+        values = values.astype(np.int64)
+    return values
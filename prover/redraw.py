@@ -0,0 +1,135 @@
+"""
+2.py 滑块工具的重绘引擎：拖动滑块时只重画变化的部分，而不是每个鼠标事件都重画整块画布。
+
+- 预计算：滑块每一档 P_others 的整条划算度曲线和精确最优解一次算好，拖动时只查表
+  （文本框输入的不在档位上的值才现算）。
+- 节流：第一个事件立即重绘，之后每个帧间隔 (interval_ms) 内最多重绘一次，只画最新的值，
+  拖动产生的大量中间事件被直接丢弃。
+- 防重入：重绘过程中触发的 set_val 回调不会再次进入重绘。
+- blitting：曲线、最优点、信息框和滑块 / 文本框所在的 Axes 标记为 animated，
+  完整绘制时缓存不含它们的背景，之后每帧只恢复背景并画这几个对象。
+  Y 轴上限按固定的几何级数取档，只有最优划算度跨档时才需要完整重画（刻度会变）。
+
+非交互式后端（Agg 等）下没有事件循环，也不需要 blitting，引擎退化为同步更新 + draw_idle。
+"""
+import math
+
+import numpy as np
+
+from . import profiling
+from .rules import DEFAULT_RULES, efficiency
+from .solver import optimal_bid, optimal_bids
+
+FRAME_INTERVAL_MS = 16  # 约 60 帧/秒
+Y_LEVEL_BASE = 0.001  # 原来 2.py 的最小 Y 轴上限
+Y_LEVEL_RATIO = 1.25
+Y_HEADROOM = 1.15  # 最优点上方留出的空间，与原来 2.py 相同
+
+
+def ylim_level(max_eff):
+    """能容纳 max_eff × Y_HEADROOM 的最小一档 Y 轴上限。"""
+    needed = max(Y_LEVEL_BASE, max_eff * Y_HEADROOM)
+    return Y_LEVEL_BASE * Y_LEVEL_RATIO ** math.ceil(math.log(needed / Y_LEVEL_BASE, Y_LEVEL_RATIO) - 1e-9)
+
+
+class EfficiencyCurves:
+    """b_values 上的划算度曲线，按滑块档位 p_others_steps 预先算好；max_bid 为最优出价的搜索上限。"""
+
+    def __init__(self, b_values, p_others_steps, rules=DEFAULT_RULES, max_bid=None):
+        self.b_values = np.asarray(b_values, dtype=float)
+        self.steps = np.asarray(p_others_steps, dtype=float)
+        self.rules = rules
+        self.max_bid = max_bid
+        self.curves = efficiency(self.b_values[None, :], self.steps[:, None], rules)
+        self.optimal_bids, self.optimal_effs = optimal_bids(self.steps, rules, max_bid)
+
+    def lookup(self, p_others):
+        """返回 (曲线的 y 值, 最优出价, 最高划算度)。"""
+        i = np.searchsorted(self.steps, p_others)
+        if i < len(self.steps) and self.steps[i] == p_others:
+            return self.curves[i], int(self.optimal_bids[i]), float(self.optimal_effs[i])
+        optimum = optimal_bid(p_others, self.rules, self.max_bid)
+        return efficiency(self.b_values, p_others, self.rules), int(optimum.bid), float(optimum.efficiency)
+
+
+class BlitRedraw:
+    """
+    update(value) 修改 artists 并返回新的 Y 轴上限档位；档位变化时完整重画，否则只 blit animated artists。
+    request(value) 供控件回调使用（节流 + 防重入）；interval_ms=0 时不节流，每次请求同步重绘。
+    """
+
+    def __init__(self, ax, artists, update, blit=True, interval_ms=FRAME_INTERVAL_MS):
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.artists = list(artists)
+        self.update = update
+        self.blit = blit
+        self.level = None
+        self._background = None
+        self._pending = None
+        self._busy = False
+        self._timer = None
+        self._timer_running = False
+        if blit:
+            for artist in self.artists:
+                artist.set_animated(True)
+            self.canvas.mpl_connect("draw_event", self._on_draw)
+        if blit and interval_ms:
+            self._timer = self.canvas.new_timer(interval=interval_ms)
+            self._timer.add_callback(self._on_timer)
+
+    def request(self, value):
+        if self._busy:
+            profiling.count("redraw.reentrant")
+            return
+        if self._pending is not None:
+            profiling.count("redraw.coalesced")
+        self._pending = value
+        if self._timer is None:
+            self._flush()
+        elif not self._timer_running:
+            self._flush()
+            self._timer_running = True
+            self._timer.start()
+
+    def _on_timer(self):
+        if self._pending is None:
+            self._timer.stop()
+            self._timer_running = False
+        else:
+            self._flush()
+
+    def _flush(self):
+        value, self._pending = self._pending, None
+        self._busy = True
+        try:
+            with profiling.phase("redraw.update"):
+                level = self.update(value)
+            if level != self.level:
+                self.level = level
+                self.ax.set_ylim(bottom=-0.0001, top=level)
+                self._background = None
+            if self._background is None or not self.blit:
+                profiling.count("redraw.full")
+                self.canvas.draw_idle()
+            else:
+                with profiling.phase("redraw.blit"):
+                    self._blit()
+        finally:
+            self._busy = False
+
+    @profiling.timed("redraw.cache_background")
+    def _on_draw(self, event):
+        # 完整绘制结束：缓存不含 animated artists 的背景，再把它们画上去
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.fig.bbox)
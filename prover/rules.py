@@ -0,0 +1,120 @@
+"""
+Proof Contest 星星规则：分档阈值表 + 向量化的星星/划算度计算。
+
+所有函数都接受标量或任意形状的 NumPy 数组（按广播规则），
+标量输入返回标量，数组输入返回同形状数组。
+"""
+import hashlib
+import math
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+# --- 默认规则常量 ---
+MINIMUM_BID = 100
+MAX_TOTAL_POOL = 22000
+STAR_MULTIPLIER = 5
+# 各档 P_total 上限（含），最后一档的上限是 MAX_TOTAL_POOL
+TIER_THRESHOLDS = (5000, 7500, 16000, 17000, 18000, 19000)
+
+
+@dataclass(frozen=True)
+class Rules:
+    """一套比赛规则。不可变、可哈希，可以直接作为缓存的键。"""
+    minimum_bid: float = MINIMUM_BID
+    max_total_pool: float = MAX_TOTAL_POOL
+    star_multiplier: float = STAR_MULTIPLIER
+    thresholds: tuple = TIER_THRESHOLDS
+
+    def __post_init__(self):
+        """档位查找 (searchsorted) 要求阈值严格递增、都在 max_total_pool 之下，这里统一检查。"""
+        object.__setattr__(self, "thresholds", tuple(self.thresholds))
+        values = (self.minimum_bid, self.max_total_pool, self.star_multiplier) + self.thresholds
+        if not all(isinstance(v, (int, float, np.integer, np.floating)) and math.isfinite(v) for v in values):
+            raise ValueError(f"规则常量必须是有限的数: {self}")
+        if self.minimum_bid <= 0:
+            raise ValueError(f"minimum_bid 必须大于 0: {self.minimum_bid}")
+        bounds = (0,) + self.thresholds + (self.max_total_pool,)
+        if any(b <= a for a, b in zip(bounds, bounds[1:])):
+            raise ValueError(f"阈值必须为正、严格递增且小于 max_total_pool ({self.max_total_pool}): {self.thresholds}")
+
+    @cached_property
+    def bounds(self):
+        """每一档 P_total 的上限（含），升序。第 k 档（k 从 0 开始）的星星基数为 k+1。"""
+        bounds = np.asarray(tuple(self.thresholds) + (self.max_total_pool,), dtype=float)
+        bounds.setflags(write=False)
+        return bounds
+
+    @cached_property
+    def lower_bounds(self):
+        """每一档 P_total 的下限（不含）：第 0 档为 0，之后为上一档的上限。"""
+        lower = np.concatenate(([0.0], self.bounds[:-1]))
+        lower.setflags(write=False)
+        return lower
+
+    @property
+    def n_tiers(self):
+        return len(self.bounds)
+
+    @cached_property
+    def version_key(self):
+        """由全部规则常量计算的短哈希，规则一变就变。用来给预计算的缓存文件做版本号。"""
+        fields = (self.minimum_bid, self.max_total_pool, self.star_multiplier) + tuple(self.thresholds)
+        return hashlib.sha1(repr(tuple(float(v) for v in fields)).encode()).hexdigest()[:12]
+
+
+DEFAULT_RULES = Rules()
+
+
+def base_stars(p_total, rules=DEFAULT_RULES):
+    """
+    根据总点数池 (P_total) 计算星星基数（即所在档位，1..n_tiers）。
+    P_total <= 0 或超过 max_total_pool 时为 0。
+    """
+    p_total = np.asarray(p_total)
+    # 第一个满足 p_total <= bounds[i] 的 i，即所在档位的下标
+    tier = np.searchsorted(rules.bounds, p_total, side="left")
+    stars = np.where((p_total > 0) & (tier < rules.n_tiers), tier + 1, 0)
+    return stars[()]
+
+
+def star_prize(p_total, rules=DEFAULT_RULES):
+    """最终星星奖励 = 星星基数 * star_multiplier。"""
+    return (base_stars(p_total, rules) * rules.star_multiplier)[()]
+
+
+def efficiency(your_bid_b, p_others, rules=DEFAULT_RULES):
+    """
+    划算度 = Star_Prize / P_total。
+    出价低于 minimum_bid、P_total <= 0 或超过 max_total_pool 时为 0。
+    """
+    your_bid_b = np.asarray(your_bid_b, dtype=float)
+    p_total = your_bid_b + np.asarray(p_others, dtype=float)
+    prize = star_prize(p_total, rules)
+    valid = (your_bid_b >= rules.minimum_bid) & (prize > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = np.where(valid, prize / p_total, 0.0)
+    return eff[()]
+
+
+def add_rule_arguments(parser, defaults=DEFAULT_RULES):
+    """给命令行工具加上覆盖规则常量的参数 (--minimum-bid 等)，配合 rules_from_args 使用。"""
+    parser.add_argument("--minimum-bid", type=float, default=defaults.minimum_bid)
+    parser.add_argument("--max-total-pool", type=float, default=defaults.max_total_pool)
+    parser.add_argument("--star-multiplier", type=float, default=defaults.star_multiplier)
+    parser.add_argument("--thresholds", type=lambda text: tuple(float(v) for v in text.split(",")),
+                        default=defaults.thresholds, help="逗号分隔的各档上限，例如 5000,7500,16000,17000,18000,19000")
+
+
+def rules_from_args(args):
+    """由 add_rule_arguments 的参数构造规则；规则不合法时以错误信息退出。"""
+    try:
+        return Rules(
+            minimum_bid=args.minimum_bid,
+            max_total_pool=args.max_total_pool,
+            star_multiplier=args.star_multiplier,
+            thresholds=tuple(args.thresholds),
+        )
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}") from None
@@ -0,0 +1,429 @@
+"""
+本地 HTTP/JSON 查询服务：给机器人用的“最优策略”接口，不用再抓取 Streamlit 页面。
+只导入 rules / solver（numpy），不加载 matplotlib / streamlit / pandas。
+
+    GET  /optimal?p_others=1300,16200&max_bid=3000&minimum_bid=500
+    POST /optimal  {"p_others": [1300, 16200], "max_bid": 3000, "rules": {"minimum_bid": 500}}
+    GET  /health   GET /stats
+
+默认使用 prove.py 的规则和出价上限（--preset prove：minimum_bid 500，B 不超过 B_PLOT_UPPER_LIMIT = 10000），
+所以 /optimal?p_others=0 给出的 500 与页面一致；--preset default 为 prover.rules 的默认规则、不限出价。
+请求里的 max_bid 和规则覆盖项 minimum_bid / max_total_pool / star_multiplier / thresholds（逗号分隔或数组）
+优先于预设。每个 P_others 返回 {"p_others", "bid", "p_total", "stars", "efficiency"}，
+不存在正划算度出价时 bid 为 null（与 prove.py 的“未能找到划算度为正的出价策略”对应）。
+
+- 缓存：(规则, max_bid, P_others) → 结果的进程内 LRU 缓存。
+- 求解：每轮事件循环里最先到达的 INLINE_MAX_VALUES 个未命中值直接用 solver.optimal_bid 就地求解；
+  其余的在这一轮结束时按 (规则, max_bid) 分组，每组调用一次向量化的 solver.optimal_bids。
+- 服务器：asyncio.Protocol 上的最小 HTTP/1.1 实现，支持 keep-alive 和流水线请求。
+
+用法:
+    python -m prover.service --port 8765
+    python -m prover.service --preset default --minimum-bid 300
+    curl 'http://127.0.0.1:8765/optimal?p_others=1300,16200'
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import math
+import sys
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .rules import DEFAULT_RULES, Rules, add_rule_arguments, rules_from_args, star_prize
+from .solver import optimal_bid, optimal_bids
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 100_000
+MAX_BATCH_VALUES = 65_536
+INLINE_MAX_VALUES = 32  # 每轮事件循环里就地求解的未命中值数
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1 << 20
+RULE_OVERRIDES = ("minimum_bid", "max_total_pool", "star_multiplier", "thresholds")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class Preset(NamedTuple):
+    rules: Rules
+    max_bid: float  # 请求没有给出 max_bid 时的出价上限，None 表示不限
+
+
+PRESETS = {
+    # 与 prove.py 相同：MINIMUM_BID = 500，出价不超过 B_PLOT_UPPER_LIMIT = 10000
+    "prove": Preset(dataclasses.replace(DEFAULT_RULES, minimum_bid=500), 10000.0),
+    "default": Preset(DEFAULT_RULES, None),
+}
+DEFAULT_PRESET = "prove"
+
+
+class QueryError(ValueError):
+    """请求参数不合法，返回 400。"""
+
+
+@lru_cache(maxsize=256)
+def _rules_with(base, overrides):
+    return dataclasses.replace(base, **dict(overrides))
+
+
+def _floats(value, name):
+    """数字、数字数组或逗号分隔的字符串 → float 列表。"""
+    if isinstance(value, str):
+        value = [v for v in value.split(",") if v.strip()]
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    try:
+        return [float(v) for v in value]
+    except (TypeError, ValueError):
+        raise QueryError(f"{name} must be a number or a list of numbers") from None
+
+
+def parse_query(params, base=DEFAULT_RULES, default_max_bid=None):
+    """
+    请求参数（GET 查询串或 POST JSON）→ (规则, max_bid, P_others 列表)。
+    规则覆盖项可以放在顶层，也可以放在 "rules" 对象里；没有 max_bid 时使用 default_max_bid。
+    """
+    if "p_others" not in params:
+        raise QueryError("missing p_others")
+    p_others = _floats(params["p_others"], "p_others")
+    if not all(map(math.isfinite, p_others)):
+        raise QueryError("p_others must be finite numbers")
+    max_bid = params.get("max_bid")
+    max_bid = default_max_bid if max_bid in (None, "") else _floats(max_bid, "max_bid")[0]
+    if max_bid is not None and math.isnan(max_bid):
+        raise QueryError("max_bid must be a number")
+    overrides = params.get("rules") or {}
+    if not isinstance(overrides, dict):
+        raise QueryError("rules must be an object")
+    overrides = dict(overrides)
+    overrides.update({k: params[k] for k in RULE_OVERRIDES if k in params})
+    unknown = set(overrides) - set(RULE_OVERRIDES)
+    if unknown:
+        raise QueryError(f"unknown rule fields: {', '.join(sorted(unknown))}")
+    for key, value in overrides.items():
+        values = _floats(value, key)
+        overrides[key] = tuple(values) if key == "thresholds" else values[0]
+    try:
+        rules = _rules_with(base, tuple(sorted(overrides.items()))) if overrides else base
+    except ValueError as exc:
+        # 非有限值、minimum_bid <= 0、阈值不递增或不低于 max_total_pool，见 Rules.__post_init__
+        raise QueryError(f"invalid rules: {exc}") from None
+    return rules, max_bid, p_others
+
+
+class _Query:
+    """一次查询：results 中未命中的位置求解后填入，然后调用 done(results)；求解失败时调用 done(异常)。"""
+    __slots__ = ("rules", "max_bid", "p_others", "results", "missing", "done")
+
+    def __init__(self, rules, max_bid, p_others, results, missing, done):
+        self.rules = rules
+        self.max_bid = max_bid
+        self.p_others = p_others
+        self.results = results
+        self.missing = missing
+        self.done = done
+
+
+class OptimalBidService:
+    """
+    带 LRU 缓存和批处理的最优出价求解，以及它的 HTTP 前端。只在事件循环线程里使用。
+    rules / max_bid 为请求没有覆盖时使用的规则和出价上限。
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, cache_size=DEFAULT_CACHE_SIZE, max_batch=MAX_BATCH_VALUES, max_bid=None,
+                 inline_max=INLINE_MAX_VALUES):
+        self.rules = rules
+        self.max_bid = max_bid
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.inline_max = inline_max
+        self.cache = OrderedDict()
+        self.pending = []  # 等到本轮事件循环结束时批量求解的 _Query
+        self._tick_scheduled = False
+        self._inline_left = inline_max  # 本轮事件循环里还可以就地求解的值数
+        self.stats = {"requests": 0, "values": 0, "cache_hits": 0, "inline": 0, "batches": 0, "solved": 0}
+
+    def submit(self, rules, max_bid, p_others, done):
+        """
+        查询与 p_others 一一对应的 (bid, p_total, stars, efficiency)，结果交给 done(results)。
+        全部命中缓存或就地求解时 done 在返回前调用，否则在本轮事件循环结束时批量求解后调用；
+        求解出错时 done 收到异常对象。
+        """
+        self.stats["requests"] += 1
+        self.stats["values"] += len(p_others)
+        cache = self.cache
+        results = [cache.get((rules, max_bid, p)) for p in p_others]
+        missing = [i for i, value in enumerate(results) if value is None]
+        self.stats["cache_hits"] += len(p_others) - len(missing)
+        for i, p in enumerate(p_others):
+            if results[i] is not None:
+                cache.move_to_end((rules, max_bid, p))
+        if not missing:
+            done(results)
+            return
+        query = _Query(rules, max_bid, p_others, results, missing, done)
+        self._schedule_tick()
+        if len(missing) <= self._inline_left:
+            self._inline_left -= len(missing)
+            self._solve_inline(query)
+        else:
+            self.pending.append(query)
+
+    async def query(self, rules, max_bid, p_others):
+        """submit 的协程版本，嵌入到其他 asyncio 程序里时使用。"""
+        future = asyncio.get_running_loop().create_future()
+        self.submit(rules, max_bid, p_others,
+                    lambda result: future.set_exception(result) if isinstance(result, Exception)
+                    else future.set_result(result))
+        return await future
+
+    def _schedule_tick(self):
+        if not self._tick_scheduled:
+            self._tick_scheduled = True
+            asyncio.get_running_loop().call_soon(self._end_tick)
+
+    def _end_tick(self):
+        """一轮事件循环结束：批量求解这一轮积累的未命中。"""
+        self._tick_scheduled = False
+        self._inline_left = self.inline_max
+        pending, self.pending = self.pending, []
+        batch, size = [], 0
+        for query in pending:
+            batch.append(query)
+            size += len(query.missing)
+            if size >= self.max_batch:
+                self.stats["batches"] += 1
+                self._solve(batch)
+                batch, size = [], 0
+        if batch:
+            self.stats["batches"] += 1
+            self._solve(batch)
+
+    def _solve_inline(self, query):
+        self.stats["inline"] += 1
+        try:
+            for i in query.missing:
+                p = query.p_others[i]
+                result = optimal_bid(p, query.rules, query.max_bid)
+                value = query.results[i] = (result.bid, result.p_total, float(result.stars), result.efficiency)
+                self.cache[(query.rules, query.max_bid, p)] = value
+        except Exception as exc:
+            query.done(exc)
+            return
+        self.stats["solved"] += len(query.missing)
+        self._evict()
+        query.done(query.results)
+
+    def _evict(self):
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _solve(self, batch):
+        groups = {}
+        for query in batch:
+            groups.setdefault((query.rules, query.max_bid), []).append(query)
+        for (rules, max_bid), queries in groups.items():
+            p_others = np.fromiter((query.p_others[i] for query in queries for i in query.missing), dtype=float)
+            try:
+                bids, effs = optimal_bids(p_others, rules, max_bid)
+                stars = np.where(bids >= 0, star_prize(p_others + np.maximum(bids, 0), rules), 0)
+            except Exception as exc:
+                for query in queries:
+                    query.done(exc)
+                continue
+            self.stats["solved"] += len(p_others)
+            values = iter([(b, p + max(b, 0), float(s), e)
+                           for p, b, s, e in zip(p_others.tolist(), bids.tolist(), stars.tolist(), effs.tolist())])
+            for query in queries:
+                for i in query.missing:
+                    value = query.results[i] = next(values)
+                    self.cache[(rules, max_bid, query.p_others[i])] = value
+        self._evict()
+        for query in batch:
+            if all(value is not None for value in query.results):
+                query.done(query.results)
+
+    def optimal_payload(self, rules, max_bid, p_others, results):
+        return {
+            "rules": rules.version_key,
+            "max_bid": max_bid,
+            "results": [{"p_others": p, "bid": bid if bid >= 0 else None, "p_total": p_total, "stars": stars,
+                         "efficiency": eff} for p, (bid, p_total, stars, eff) in zip(p_others, results)],
+        }
+
+    def dispatch(self, method, target, body, respond):
+        """处理一个请求，把 (状态码, JSON 对象) 交给 respond；/optimal 未命中缓存时可能在本轮事件循环之后才应答。"""
+        url = urlsplit(target)
+        if url.path == "/health":
+            return respond(200, {"status": "ok"})
+        if url.path == "/stats":
+            return respond(200, dict(self.stats, cache_size=len(self.cache)))
+        if url.path != "/optimal":
+            return respond(404, {"error": f"no route {url.path}"})
+        try:
+            if method == "GET":
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            elif method == "POST":
+                try:
+                    params = json.loads(body or b"{}")
+                except ValueError:
+                    raise QueryError("body is not valid JSON") from None
+                if not isinstance(params, dict):
+                    raise QueryError("body must be a JSON object")
+            else:
+                return respond(405, {"error": f"method {method} not allowed"})
+            rules, max_bid, p_others = parse_query(params, self.rules, self.max_bid)
+        except QueryError as exc:
+            return respond(400, {"error": str(exc)})
+        except Exception as exc:  # 不让一个坏请求断开连接，机器人总能拿到 JSON 错误
+            return respond(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def done(results):
+            if isinstance(results, Exception):
+                respond(500, {"error": f"{type(results).__name__}: {results}"})
+            else:
+                respond(200, self.optimal_payload(rules, max_bid, p_others, results))
+
+        self.submit(rules, max_bid, p_others, done)
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, ready=None):
+        """运行服务直到被取消。ready 为 asyncio.Event 时，开始监听后置位（测试 / 嵌入时使用）。"""
+        server = await asyncio.get_running_loop().create_server(lambda: _HttpConnection(self), host=host, port=port)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def _parse_head(head):
+    """请求行和头部 → (方法, 目标, 版本, 头部字典)；请求行不合法时为 None。"""
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], parts[2], headers
+
+
+class _HttpConnection(asyncio.Protocol):
+    """一个 HTTP/1.1 连接。流水线请求按到达顺序应答，一次读到的请求的应答合并成一次写。"""
+
+    def __init__(self, service):
+        self.service = service
+        self.transport = None
+        self.buffer = bytearray()
+        self.responses = deque()  # 按请求顺序排列的 [应答字节（未完成时为 None）, 发送后是否关闭连接]
+        self.closing = False
+        self.parsing = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data):
+        self.buffer += data
+        self.parsing = True
+        try:
+            while not self.closing:
+                end = self.buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(self.buffer) > MAX_HEADER_BYTES:
+                        self._reject(431, "request header too large")
+                    break
+                request = _parse_head(bytes(self.buffer[:end]))
+                if request is None:
+                    self._reject(400, "malformed request line")
+                    break
+                method, target, version, headers = request
+                length = headers.get("content-length", "0")
+                if not (length.isascii() and length.isdigit()):
+                    self._reject(400, "invalid Content-Length")
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    self._reject(413, "request body too large")
+                    break
+                if len(self.buffer) < end + 4 + length:
+                    break  # 请求体还没收全
+                body = bytes(self.buffer[end + 4:end + 4 + length])
+                del self.buffer[:end + 4 + length]
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                self.closing = not keep_alive
+                slot = [None, not keep_alive]
+                self.responses.append(slot)
+                self.service.dispatch(method, target, body,
+                                      lambda status, payload, slot=slot, version=version:
+                                      self._complete(slot, version, status, payload))
+        finally:
+            self.parsing = False
+        self._flush()
+
+    def _reject(self, status, message):
+        """不能继续解析的请求：应答错误后关闭连接。"""
+        self.closing = True
+        slot = [None, True]
+        self.responses.append(slot)
+        self._complete(slot, "HTTP/1.1", status, {"error": message})
+
+    def _complete(self, slot, version, status, payload):
+        data = json.dumps(payload).encode()
+        slot[0] = (f"{version if version.startswith('HTTP/') else 'HTTP/1.1'} {status} {REASONS[status]}\r\n"
+                   f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                   f"Connection: {'close' if slot[1] else 'keep-alive'}\r\n\r\n").encode() + data
+        if not self.parsing:
+            self._flush()
+
+    def _flush(self):
+        """按顺序发出已经完成的应答，遇到第一个未完成的为止。"""
+        out = []
+        close = False
+        while self.responses and self.responses[0][0] is not None:
+            data, close = self.responses.popleft()
+            out.append(data)
+            if close:
+                break
+        if self.transport is None or not out:
+            return
+        self.transport.write(b"".join(out))
+        if close:
+            self.responses.clear()
+            self.transport.close()
+
+
+def main(argv=None):
+    presets = argparse.ArgumentParser(add_help=False)
+    presets.add_argument("--preset", choices=sorted(PRESETS), default=DEFAULT_PRESET,
+                         help="基础规则和默认出价上限：prove 与 prove.py 相同 (minimum_bid 500，B <= 10000)，"
+                              "default 为 prover.rules 的默认规则、不限出价；下面的参数覆盖预设")
+    preset = PRESETS[presets.parse_known_args(argv)[0].preset]
+    parser = argparse.ArgumentParser(prog="python -m prover.service", description="最优出价的本地 HTTP/JSON 查询服务",
+                                     parents=[presets])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="LRU 缓存的结果条数")
+    parser.add_argument("--max-bid", type=float, default=preset.max_bid, help="请求没有给出 max_bid 时的出价上限")
+    add_rule_arguments(parser, preset.rules)
+    args = parser.parse_args(argv)
+
+    service = OptimalBidService(rules_from_args(args), args.cache_size, max_bid=args.max_bid)
+    print(f"serving on http://{args.host}:{args.port}/optimal", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+精确的最优出价求解。
+
+划算度 = Star_Prize / (B + P_others)：在同一档内 Star_Prize 不变、分母随 B 增大，
+所以每一档里最划算的出价就是“刚好进入这一档”的最小整数 B。
+只需检查每一档的下边界即可得到精确最优解，复杂度 O(档位数)，不需要在 linspace 上采样。
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from . import profiling
+from .rules import DEFAULT_RULES
+
+
+class OptimalBid(NamedTuple):
+    bid: int  # 最优出价 B，-1 表示不存在划算度为正的出价
+    p_total: float  # 出价后的总点数池
+    stars: float  # 该出价对应的 Star_Prize
+    efficiency: float  # 最高划算度
+    local_optima: list  # 每一档的局部最优 [(B, 划算度), ...]，按划算度从高到低排列
+
+
+def tier_candidates(p_others, rules=DEFAULT_RULES, max_bid=None):
+    """
+    每一档里划算度最高的整数出价及其划算度。
+
+    p_others / max_bid 可以是标量或数组（按广播规则）。
+    返回 (bids, effs)，形状为 broadcast(p_others, max_bid).shape + (n_tiers,)；
+    某一档不可达（超出该档上限、超出 max_bid）时 bid 为 -1、划算度为 0。
+    """
+    p_others = np.asarray(p_others, dtype=float)[..., None]
+    # 进入第 k 档需要 B + P_others > lower_bounds[k]，同时 B 不能低于最低出价
+    bids = np.maximum(np.floor(rules.lower_bounds - p_others) + 1, np.ceil(rules.minimum_bid))
+    p_total = bids + p_others
+    # Rules 保证 bounds 严格递增且最后一档就是 max_total_pool，所以每档的上限检查也覆盖了总池上限
+    valid = p_total <= rules.bounds
+    if max_bid is not None:
+        valid &= bids <= np.asarray(max_bid, dtype=float)[..., None]
+    prizes = np.arange(1, rules.n_tiers + 1) * rules.star_multiplier
+    effs = np.where(valid, prizes / p_total, 0.0)
+    valid &= effs > 0
+    return np.where(valid, bids, -1).astype(np.int64), np.where(valid, effs, 0.0)
+
+
+def optimal_bids(p_others, rules=DEFAULT_RULES, max_bid=None):
+    """
+    向量化的最优出价：对一整组 P_others（以及可选的出价上限 max_bid）一次求解。
+    返回 (bids, effs)，不存在正划算度出价的位置 bid 为 -1、划算度为 0。
+    划算度相同时取较小的出价。
+    """
+    bids, effs = tier_candidates(p_others, rules, max_bid)
+    best = np.argmax(effs, axis=-1)[..., None]
+    best_bids = np.take_along_axis(bids, best, axis=-1)[..., 0]
+    best_effs = np.take_along_axis(effs, best, axis=-1)[..., 0]
+    return best_bids[()], best_effs[()]
+
+
+@profiling.timed("solver.optimal_bid")
+def optimal_bid(p_others, rules=DEFAULT_RULES, max_bid=None):
+    """
+    单个 P_others 的精确最优出价，附带所有档位的局部最优排名。
+    与 tier_candidates 的计算相同，只是逐档用纯 Python 计算：单个值时省去十几次 NumPy 调用的固定开销。
+    """
+    p_others = float(p_others)
+    candidates = []
+    if math.isfinite(p_others):
+        minimum_bid = math.ceil(rules.minimum_bid)
+        for tier, (lower, upper) in enumerate(zip(rules.lower_bounds.tolist(), rules.bounds.tolist()), start=1):
+            bid = max(math.floor(lower - p_others) + 1, minimum_bid)
+            p_total = bid + p_others
+            if p_total > upper or (max_bid is not None and bid > max_bid):
+                continue
+            eff = tier * rules.star_multiplier / p_total
+            if eff > 0:
+                candidates.append((bid, eff, tier))
+    if not candidates:
+        return OptimalBid(-1, p_others, 0, 0.0, [])
+    # 稳定排序：划算度相同时较低的档（较小的出价）在前，与 optimal_bids 的 argmax 一致
+    candidates.sort(key=lambda candidate: -candidate[1])
+    bid, eff, tier = candidates[0]
+    return OptimalBid(bid, bid + p_others, tier * rules.star_multiplier, eff, [(b, e) for b, e, _ in candidates])
@@ -0,0 +1,84 @@
+"""
+atlas / sweep / frames 共用的两个存储工具。
+
+- publish_directory：缓存目录先写到旁边的临时目录，写完后改名成正式目录，读者不会看到写了一半的文件。
+- SharedArray + fill_shared：进程池的结果数组放在共享内存 (multiprocessing.shared_memory) 里，
+  各进程直接写入自己负责的部分，不经过 pickle 传回结果。
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+@contextmanager
+def publish_directory(path):
+    """
+    with publish_directory(path) as tmp: 在 tmp 里写文件，块正常结束后 tmp 替换为 path（旧目录被删除）。
+    块里出错时 tmp 被删除，path 保持原样。
+    """
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    try:
+        yield tmp
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # 另一个进程刚刚建好了同一个目录
+            if not os.path.isdir(path):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class SharedArray:
+    """
+    共享内存中的结果数组，在父进程里作为上下文管理器使用：把 spec 交给进程池里的 fill_shared，
+    退出时释放共享内存，所以结果要在退出前用 copy() 取出，也不要在外面保留 array 的视图。
+    """
+
+    def __init__(self, shape, dtype, fill=None):
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in shape)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.spec = (self._shm.name, shape, dtype.str)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+        if fill is not None:
+            self.array[...] = fill
+
+    def copy(self):
+        return self.array.copy()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.array = None  # 还有数组引用着缓冲区时 close() 会失败
+        try:
+            self._shm.unlink()
+            self._shm.close()
+        except BufferError:
+            if exc_type is None:
+                raise
+            # 出错时 traceback 里的栈帧可能还引用着数组，映射留到进程结束时释放
+        return False
+
+
+def fill_shared(specs, writer, *args):
+    """
+    在进程池中运行：按 specs 打开 SharedArray，调用 writer(*数组, *args) 写入结果后关闭，返回 writer 的返回值。
+    writer 必须是模块级函数（可以 pickle），且不保留数组的引用。
+    """
+    handles = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+    arrays = [np.ndarray(shape, dtype=dtype, buffer=shm.buf) for shm, (_, shape, dtype) in zip(handles, specs)]
+    result = writer(*arrays, *args)
+    del arrays
+    for shm in handles:
+        shm.close()
+    return result
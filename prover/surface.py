@@ -0,0 +1,55 @@
+"""
+3.py 的 (P_others, B) 划算度曲面：整块数组计算 + 沿档位边界的自适应加密。
+
+均匀网格会把 B + P_others = threshold 处的断层抹成斜坡，要靠加密整张网格才能看清。
+这里每一列（固定 P_others）在公共的 B 采样点之外，再加入该列上恰好落在边界两侧的
+B = threshold - P_others 和 threshold - P_others + 1，断层在曲面上就是陡直的台阶，
+而点数只增加 2 × 档位数 行。网格仍是结构化的 (rows, cols)，可以直接交给 plot_surface。
+"""
+import numpy as np
+
+from .rules import DEFAULT_RULES, efficiency
+
+MAX_SURFACE_FACES = 250_000
+
+
+def refined_grid(p_others_values, b_values, rules=DEFAULT_RULES):
+    """
+    返回 (X, Y)：X 为 P_others，Y 为 B，形状为 (len(b_values) + 2 * n_tiers, len(p_others_values))，
+    与 np.meshgrid(p_others_values, b_values) 的方向一致；每一列的 Y 升序、没有重复点（顶端补齐的行除外）。
+    超出 B 范围或与已有采样点重合的边界点是多余的，这样的列在顶端用 B 的最大值补齐行数
+    （只在曲面边缘产生退化的面片，不会在断层附近插入零宽度的面片）。
+    """
+    p_others_values = np.asarray(p_others_values, dtype=float)
+    b_values = np.asarray(b_values, dtype=float)
+    b_max = b_values.max()
+    critical = rules.bounds[:, None] - p_others_values[None, :]
+    extra = np.clip(np.concatenate((critical, critical + 1)), b_values.min(), b_max)
+    base = np.broadcast_to(b_values[:, None], (len(b_values), len(p_others_values)))
+    Y = np.sort(np.concatenate((base, extra)), axis=0)
+    # 列内的重复点换成 inf 再排序，移到列尾后改为 b_max
+    repeated = np.zeros(Y.shape, dtype=bool)
+    repeated[1:] = Y[1:] == Y[:-1]
+    if repeated.any():
+        Y[repeated] = np.inf
+        Y.sort(axis=0)
+        Y[np.isinf(Y)] = b_max
+    X = np.broadcast_to(p_others_values, Y.shape)
+    return X, Y
+
+
+def refined_surface(p_others_values, b_values, rules=DEFAULT_RULES):
+    """refined_grid 加上整块计算的划算度 Z。"""
+    X, Y = refined_grid(p_others_values, b_values, rules)
+    return X, Y, efficiency(Y, X, rules)
+
+
+def surface_counts(shape, max_faces=MAX_SURFACE_FACES):
+    """
+    plot_surface 的 rcount / ccount：尽量保留全部行（断层就在这些行上），
+    面片总数超过 max_faces 时只对列 (P_others 方向) 降采样，使大网格也能很快画出来。
+    """
+    rows, cols = shape
+    rcount = min(rows, max_faces)
+    ccount = max(1, min(cols, max_faces // rcount))
+    return {"rcount": rcount, "ccount": ccount}
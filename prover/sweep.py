@@ -0,0 +1,227 @@
+"""
+规则敏感性分析：对规则常量（MINIMUM_BID、MAX_TOTAL_POOL、STAR_MULTIPLIER、各档阈值）给出取值范围，
+计算笛卡尔积中每一套规则下、每个 P_others 的精确最优出价和最高划算度，并与基准规则比较。
+
+规则变体按块分给进程池，各进程直接写入共享内存中的结果数组 (storage.SharedArray)，
+不经过 pickle 传回结果；每个变体在整条 P_others 网格上调用一次向量化的 solver.optimal_bids。
+阈值不严格递增、或最后一个阈值不小于 max_total_pool 的组合不是合法规则，会被跳过。
+
+参数名：minimum_bid / max_total_pool / star_multiplier，t0..t5 为单个阈值（按 TIER_THRESHOLDS 顺序），
+shift 为所有阈值的整体平移量。范围写法与 prover.batch 相同（start:stop:step，包含 stop）。
+
+用法:
+    python -m prover.sweep --vary minimum_bid=100:1000:100 --vary t2=15000:17000:250
+    python -m prover.sweep --vary shift=-2000:2000:100 --vary star_multiplier=3:6:1 -o sweep.npz
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from . import profiling
+from .ranges import parse_range
+from .rules import DEFAULT_RULES, Rules, add_rule_arguments, rules_from_args
+from .solver import optimal_bids
+from .storage import SharedArray, fill_shared
+
+RULE_FIELDS = ("minimum_bid", "max_total_pool", "star_multiplier")
+SHIFT = "shift"
+MIN_VARIANTS_PER_TASK = 64
+
+
+class SweepResult(NamedTuple):
+    names: tuple  # 变化的参数名
+    params: np.ndarray  # (变体数, 参数数)，每一行是一个合法变体的参数取值
+    rules: list  # 每个变体对应的 Rules
+    p_others: np.ndarray
+    bids: np.ndarray  # (变体数, P_others 数)，-1 表示没有正划算度的出价
+    effs: np.ndarray  # (变体数, P_others 数)
+    baseline_bids: np.ndarray
+    baseline_effs: np.ndarray
+    skipped: int  # 不合法而被跳过的组合数
+
+
+def parse_vary(text):
+    """'name=start:stop:step' → (name, 取值数组)。"""
+    name, sep, values = text.partition("=")
+    name = name.strip()
+    if not sep or not (name in RULE_FIELDS or name == SHIFT or (name[:1] == "t" and name[1:].isdigit())):
+        raise argparse.ArgumentTypeError(f"无法识别的参数 {text!r}，应为 name=start:stop:step")
+    return name, parse_range(values)
+
+
+def variant_rules(names, values, base=DEFAULT_RULES):
+    """由一组参数取值构造规则；组合不合法时返回 None。"""
+    fields = {}
+    thresholds = list(base.thresholds)
+    shift = 0.0
+    for name, value in zip(names, values):
+        if name in RULE_FIELDS:
+            fields[name] = float(value)
+        elif name == SHIFT:
+            shift = float(value)
+        else:
+            index = int(name[1:])
+            if index >= len(thresholds):
+                raise ValueError(f"{name} 超出阈值个数 {len(thresholds)}")
+            thresholds[index] = float(value)
+    try:
+        return Rules(
+            minimum_bid=fields.get("minimum_bid", base.minimum_bid),
+            max_total_pool=fields.get("max_total_pool", base.max_total_pool),
+            star_multiplier=fields.get("star_multiplier", base.star_multiplier),
+            thresholds=tuple(t + shift for t in thresholds),
+        )
+    except ValueError:
+        return None
+
+
+def _sweep_rows(bids, effs, start, rules_chunk, p_others):
+    """把 rules_chunk 的结果写入 bids / effs 的 [start, start + len) 行；进程池里由 fill_shared 调用。"""
+    for i, rules in enumerate(rules_chunk, start=start):
+        bids[i], effs[i] = optimal_bids(p_others, rules)
+    return len(rules_chunk)
+
+
+@profiling.timed("sweep.run")
+def sweep(vary, p_others, base=DEFAULT_RULES, workers=None):
+    """
+    vary 为 [(参数名, 取值数组), ...]，对其笛卡尔积求解。
+    workers 为进程数（默认 CPU 核数）；变体较少或 workers=1 时在当前进程内计算。
+    """
+    names = tuple(name for name, _ in vary)
+    p_others = np.asarray(p_others, dtype=float)
+    params, rules_list = [], []
+    skipped = 0
+    for values in itertools.product(*(values for _, values in vary)):
+        rules = variant_rules(names, values, base)
+        if rules is None:
+            skipped += 1
+            continue
+        params.append(values)
+        rules_list.append(rules)
+    params = np.asarray(params, dtype=float).reshape(len(rules_list), len(names))
+    shape = (len(rules_list), len(p_others))
+    baseline_bids, baseline_effs = optimal_bids(p_others, base)
+
+    workers = workers or os.cpu_count() or 1
+    n_tasks = min(workers * 4, -(-len(rules_list) // MIN_VARIANTS_PER_TASK))
+    if workers <= 1 or n_tasks <= 1:
+        bids = np.empty(shape, dtype=np.int32)
+        effs = np.empty(shape, dtype=np.float32)
+        _sweep_rows(bids, effs, 0, rules_list, p_others)
+        return SweepResult(names, params, rules_list, p_others, bids, effs, baseline_bids, baseline_effs, skipped)
+
+    bounds = np.linspace(0, len(rules_list), n_tasks + 1).astype(int)
+    with SharedArray(shape, np.int32) as shared_bids, SharedArray(shape, np.float32) as shared_effs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fill_shared, (shared_bids.spec, shared_effs.spec), _sweep_rows,
+                                   lo, rules_list[lo:hi], p_others)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+            for future in futures:
+                future.result()
+        bids, effs = shared_bids.copy(), shared_effs.copy()
+    return SweepResult(names, params, rules_list, p_others, bids, effs, baseline_bids, baseline_effs, skipped)
+
+
+def _masked_stat(func, values, mask, axis):
+    """只在 mask 为真的位置上统计；一个都没有时为 NaN。"""
+    fill = {np.mean: 0.0, np.max: -np.inf, np.min: np.inf}[func]
+    values = np.where(mask, values, fill)
+    out = np.sum(values, axis=axis) / np.maximum(mask.sum(axis=axis), 1) if func is np.mean else func(values, axis=axis)
+    return np.where(mask.any(axis=axis), out, np.nan)
+
+
+def variant_summary(result):
+    """
+    每个变体相对基准规则的变化：最优出价改变的 P_others 比例（包括有无出价的改变）；
+    出价平均 / 最大偏移和最高划算度的平均变化只统计两边都有出价的 P_others，
+    其余（至少一边是 -1）的个数记在 no_bid 里。
+    """
+    both = (result.bids >= 0) & (result.baseline_bids >= 0)
+    delta_bid = np.abs(result.bids - result.baseline_bids).astype(float)
+    return {
+        "changed": (result.bids != result.baseline_bids).mean(axis=1),
+        "mean_abs_delta_bid": _masked_stat(np.mean, delta_bid, both, axis=1),
+        "max_abs_delta_bid": _masked_stat(np.max, delta_bid, both, axis=1),
+        "mean_delta_eff": _masked_stat(np.mean, result.effs - result.baseline_effs, both, axis=1),
+        "no_bid": (~both).sum(axis=1),
+    }
+
+
+def p_others_summary(result):
+    """
+    每个 P_others 在所有变体下最优出价与最高划算度的范围（只统计有出价的变体，一个都没有时为 NaN），
+    没有正划算度出价的变体个数，以及最优出价与基准不同的变体比例。
+    """
+    valid = result.bids >= 0
+    bids = result.bids.astype(float)
+    return {
+        "min_bid": _masked_stat(np.min, bids, valid, axis=0),
+        "max_bid": _masked_stat(np.max, bids, valid, axis=0),
+        "min_eff": _masked_stat(np.min, result.effs, valid, axis=0),
+        "max_eff": _masked_stat(np.max, result.effs, valid, axis=0),
+        "no_bid": (~valid).sum(axis=0),
+        "changed": (result.bids != result.baseline_bids).mean(axis=0),
+    }
+
+
+def _format_params(names, values):
+    return " ".join(f"{name}={value:g}" for name, value in zip(names, values))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m prover.sweep", description="规则常量的参数扫描 / 敏感性分析")
+    parser.add_argument("--vary", type=parse_vary, action="append", required=True,
+                        help="name=start:stop:step，可重复；name 为 minimum_bid / max_total_pool / "
+                             "star_multiplier / t0..t5 / shift")
+    parser.add_argument("--p-others", type=parse_range, default=None,
+                        help="P_others 网格 start:stop:step（默认 0:max_total_pool:100）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--top", type=int, default=10, help="输出变化最大的前几个变体")
+    parser.add_argument("-o", "--output", help="把完整结果保存为 .npz")
+    add_rule_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base = rules_from_args(args)
+    p_others = args.p_others if args.p_others is not None else np.arange(0, base.max_total_pool + 1, 100)
+    t0 = time.perf_counter()
+    result = sweep(args.vary, p_others, base, args.workers)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(result.rules)} variants x {len(result.p_others)} P_others in {elapsed:.2f}s"
+          f" ({result.skipped} invalid combinations skipped)", file=sys.stderr)
+    if not result.rules:
+        return
+
+    per_variant = variant_summary(result)
+    order = np.argsort(-np.nan_to_num(per_variant["mean_abs_delta_bid"], nan=-1), kind="stable")[:args.top]
+    print("variants with the largest optimal-bid shift (|dB| and dEff over P_others where both rules have a bid):")
+    print(f"{'changed':>8} | {'mean|dB|':>9} | {'max|dB|':>8} | {'mean dEff':>10} | {'no bid':>6} | params")
+    for i in order:
+        print(f"{per_variant['changed'][i]:>8.1%} | {per_variant['mean_abs_delta_bid'][i]:>9.1f} | "
+              f"{per_variant['max_abs_delta_bid'][i]:>8.0f} | {per_variant['mean_delta_eff'][i]:>+10.5f} | "
+              f"{per_variant['no_bid'][i]:>6} | {_format_params(result.names, result.params[i])}")
+
+    per_p = p_others_summary(result)
+    print()
+    print(f"{'P_others':>9} | {'base B':>6} | {'B range':>13} | {'base eff':>8} | {'eff range':>16} | "
+          f"{'no bid':>6} | {'changed':>7}")
+    for j, p in enumerate(result.p_others):
+        print(f"{p:>9.0f} | {result.baseline_bids[j]:>6} | {per_p['min_bid'][j]:>6.0f}..{per_p['max_bid'][j]:<5.0f} | "
+              f"{result.baseline_effs[j]:>8.5f} | {per_p['min_eff'][j]:.5f}..{per_p['max_eff'][j]:.5f} | "
+              f"{per_p['no_bid'][j]:>6} | {per_p['changed'][j]:>7.1%}")
+
+    if args.output:
+        np.savez(args.output, names=np.asarray(result.names), params=result.params, p_others=result.p_others,
+                 bids=result.bids, effs=result.effs, baseline_bids=result.baseline_bids,
+                 baseline_effs=result.baseline_effs)
+        print(f"saved {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
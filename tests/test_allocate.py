@@ -0,0 +1,94 @@
+"""allocate 的分组背包与逐个整数出价的穷举对比，以及预算的边界情况。"""
+import numpy as np
+import pytest
+
+from prover.allocate import Contest, allocate
+from prover.rules import DEFAULT_RULES, Rules, star_prize
+
+SMALL = Rules(minimum_bid=100, max_total_pool=3000, star_multiplier=5, thresholds=(500, 1000, 1500, 2000, 2500))
+
+
+def stars_by_bid(contest, budget):
+    """出价 0..budget 各自赢得的星星：低于最低出价或爆池为 0。"""
+    bids = np.arange(budget + 1)
+    stars = star_prize(contest.p_others + bids, contest.rules).astype(float)
+    return np.where(bids >= contest.rules.minimum_bid, stars, 0.0)
+
+
+def brute_force(contests, budget):
+    """
+    best[s] = 总花费恰好不超过 s 时的最多星星，每场比赛枚举全部整数出价（不用断点论证）。
+    返回 (最多星星, 达到它的最小花费)。
+    """
+    best = np.zeros(budget + 1)
+    for contest in contests:
+        value = stars_by_bid(contest, budget)
+        # new[s] = max over b <= s of best[s - b] + value[b]
+        totals = np.full((budget + 1, budget + 1), -np.inf)
+        s, b = np.indices(totals.shape)
+        ok = b <= s
+        totals[ok] = best[(s - b)[ok]] + value[b[ok]]
+        best = totals.max(axis=1)
+    return best[-1], int(np.argmax(best >= best[-1] - 1e-9))
+
+
+def random_contest(rng):
+    rules = Rules(minimum_bid=float(rng.integers(50, 300)), max_total_pool=3000, star_multiplier=5,
+                  thresholds=SMALL.thresholds)
+    return Contest(float(rng.integers(0, 3000)), rules)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_allocation_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    contests = [random_contest(rng) for _ in range(rng.integers(1, 4))]
+    budget = int(rng.integers(0, 1500))
+    result = allocate(contests, budget)
+    expected_stars, expected_spent = brute_force(contests, budget)
+
+    assert result.total_stars == pytest.approx(expected_stars)
+    assert result.spent == expected_spent == result.bids.sum()
+    for contest, bid, stars in zip(contests, result.bids, result.stars):
+        assert stars == stars_by_bid(contest, int(bid))[bid]
+
+
+def test_two_contests_exhaustively():
+    contests = [Contest(400, SMALL), Contest(1900, SMALL)]
+    budget = 1200
+    v1, v2 = stars_by_bid(contests[0], budget), stars_by_bid(contests[1], budget)
+    totals = v1[:, None] + v2[None, :]
+    spend = np.add.outer(np.arange(budget + 1), np.arange(budget + 1))
+    totals[spend > budget] = -1
+    result = allocate(contests, budget)
+    assert result.total_stars == totals.max()
+    assert result.spent == spend[totals == totals.max()].min()
+
+
+def test_budget_below_minimum_bid_buys_nothing():
+    result = allocate([Contest(100), Contest(5000)], DEFAULT_RULES.minimum_bid - 1)
+    assert result.bids.tolist() == [0, 0]
+    assert (result.total_stars, result.spent) == (0.0, 0)
+
+
+def test_exactly_the_minimum_bid():
+    # 只够出一次最低价：投到 5000 那场能跨过第一档，星星更多
+    result = allocate([Contest(100), Contest(5000)], DEFAULT_RULES.minimum_bid)
+    assert result.bids.tolist() == [0, DEFAULT_RULES.minimum_bid]
+    assert result.total_stars == star_prize(5000 + DEFAULT_RULES.minimum_bid, DEFAULT_RULES)
+
+
+def test_no_contests():
+    result = allocate([], 1000)
+    assert result.bids.tolist() == [] and result.stars.tolist() == []
+    assert (result.total_stars, result.spent) == (0.0, 0)
+
+
+def test_zero_and_negative_budget():
+    assert allocate([Contest(100)], 0).bids.tolist() == [0]
+    with pytest.raises(ValueError):
+        allocate([Contest(100)], -5)
+
+
+def test_full_pool_is_skipped():
+    result = allocate([Contest(DEFAULT_RULES.max_total_pool), Contest(1000)], 10_000)
+    assert result.bids[0] == 0 and result.bids[1] > 0
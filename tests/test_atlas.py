@@ -0,0 +1,42 @@
+"""atlas 查表与 rules / solver 直接计算的结果对比。"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from prover.atlas import load_atlas
+from prover.rules import DEFAULT_RULES, base_stars, efficiency
+from prover.solver import optimal_bids
+
+
+@pytest.fixture(scope="module", params=[100, 500], ids=lambda m: f"minimum_bid={m}")
+def atlas(request, tmp_path_factory):
+    rules = dataclasses.replace(DEFAULT_RULES, minimum_bid=request.param)
+    return load_atlas(rules, str(tmp_path_factory.mktemp("atlas")))
+
+
+def test_optimal_matches_solver(atlas):
+    p_others = np.arange(atlas.max_p_others + 1)
+    bids, effs = atlas.optimal(p_others)
+    expected_bids, expected_effs = optimal_bids(p_others, atlas.rules)
+    np.testing.assert_array_equal(bids, expected_bids)
+    np.testing.assert_allclose(effs, expected_effs, rtol=1e-6)
+    assert atlas.optimal(-1) == (-1, 0.0)
+    assert atlas.optimal(atlas.max_p_others + 1) == (-1, 0.0)
+
+
+def test_efficiency_and_grid_match_rules(atlas):
+    rng = np.random.default_rng(0)
+    p_others = rng.integers(0, atlas.max_p_others + 1, 5000)
+    bids = rng.integers(atlas.minimum_bid, atlas.max_total_pool + 1, 5000)
+    expected = efficiency(bids, p_others, atlas.rules)
+    np.testing.assert_allclose(atlas.efficiency(bids, p_others), expected, rtol=1e-6)
+    np.testing.assert_allclose(atlas.grid[p_others, bids - atlas.minimum_bid], expected, rtol=1e-6)
+
+
+def test_tiers_are_plain_integers(atlas):
+    p_total = np.array([-1, 0, 1, 5000, 5001, 19001, 22000, 22001])
+    np.testing.assert_array_equal(atlas.tiers(p_total), base_stars(p_total, atlas.rules))
+    # 乘以很大的倍数也不会按 uint8 溢出
+    assert atlas.tiers(22000) * 1000 == 7000
+    assert atlas.tiers(p_total).dtype == np.int64
@@ -0,0 +1,86 @@
+"""批量计算：每一块的列类型固定，分块写出与一次写出的结果相同；空着的出价和坏行的处理。"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from prover.batch import DTYPES, iter_file_chunks, iter_range_chunks, scenario_table, write_chunks
+from prover.rules import DEFAULT_RULES, efficiency
+from prover.solver import optimal_bids
+
+
+def test_scenario_table_columns_and_values():
+    table = scenario_table(np.array([0, 1300, 21950]), None)
+    assert dict(table.dtypes) == {name: np.dtype(dtype) for name, dtype in DTYPES.items()}
+    bids, effs = optimal_bids([0, 1300, 21950])
+    np.testing.assert_array_equal(table["optimal_bid"], bids)
+    # 没有正划算度出价时按 0 出价输出
+    assert table["bid"].tolist() == [max(b, 0) for b in bids]
+    np.testing.assert_allclose(table["efficiency"], efficiency(table["bid"], table["p_others"]))
+
+
+def test_scenario_table_rejects_fractional_bids():
+    with pytest.raises(ValueError):
+        scenario_table(np.array([1300.0]), np.array([500.5]))
+
+
+def test_blank_bids_use_the_optimal_bid(tmp_path):
+    path = tmp_path / "blank.csv"
+    path.write_text("p_others,bid\n1300,500\n16000,\n21950,\n", encoding="utf-8")
+    (table,) = iter_file_chunks(str(path))
+    bids, _ = optimal_bids([1300, 16000, 21950])
+    assert table["bid"].tolist() == [500, bids[1], 0]
+    assert table["optimal_bid"].tolist() == bids.tolist()
+
+
+@pytest.mark.parametrize("rows, message", [
+    ("1300,-5\n5000,-100\n7000,200\n", "bid 不能为负（第 1, 2 行）"),
+    ("1300,500\n5000,100\n7000,200.5\n", "bid 必须是整数点数（第 3 行）"),
+    ("1300,500\n,100\n", "p_others 必须是有限的数（第 2 行）"),
+])
+def test_bad_rows_are_reported_with_row_numbers(tmp_path, rows, message):
+    path = tmp_path / "bad.csv"
+    path.write_text("p_others,bid\n" + rows, encoding="utf-8")
+    with pytest.raises(ValueError) as exc:
+        list(iter_file_chunks(str(path), chunk_rows=2))
+    assert str(exc.value) == message
+
+
+def test_negative_bids_are_rejected_not_clamped():
+    with pytest.raises(ValueError, match="不能为负"):
+        scenario_table(np.array([1300, 5000]), np.array([500, -100]))
+    with pytest.raises(ValueError, match="不能为负"):
+        list(iter_range_chunks(np.arange(0, 1001, 500), np.array([-100, 100])))
+
+
+@pytest.fixture
+def mixed_input(tmp_path):
+    # 第一块全是整数、第二块出现小数：按块推断类型时 Parquet schema 会不一致
+    path = tmp_path / "scenarios.csv"
+    pd.DataFrame({"p_others": [0, 1300, 5000, 1299.5, 16000.25, 21000],
+                  "bid": [100, 500, 2500, 3701, 1000, 200]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_parquet_chunks_share_one_schema(mixed_input, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = str(tmp_path / "out.parquet")
+    assert write_chunks(iter_file_chunks(mixed_input, DEFAULT_RULES, chunk_rows=3), output) == 6
+    chunked = pd.read_parquet(output)
+    whole = scenario_table(*pd.read_csv(mixed_input)[["p_others", "bid"]].to_numpy().T)
+    pd.testing.assert_frame_equal(chunked, whole)
+
+
+def test_csv_format_is_stable_across_chunks(mixed_input, tmp_path):
+    chunked, whole = str(tmp_path / "chunked.csv"), str(tmp_path / "whole.csv")
+    write_chunks(iter_file_chunks(mixed_input, DEFAULT_RULES, chunk_rows=3), chunked)
+    write_chunks(iter_file_chunks(mixed_input, DEFAULT_RULES, chunk_rows=100), whole)
+    with open(chunked, encoding="utf-8") as a, open(whole, encoding="utf-8") as b:
+        assert a.read() == b.read()
+
+
+def test_range_chunks_cover_the_cartesian_product():
+    p_others, bids = np.arange(0, 1001, 250), np.arange(100, 401, 100)
+    table = pd.concat(iter_range_chunks(p_others, bids, chunk_rows=7), ignore_index=True)
+    assert len(table) == len(p_others) * len(bids)
+    np.testing.assert_array_equal(table["p_others"], np.repeat(p_others, len(bids)))
+    np.testing.assert_array_equal(table["bid"], np.tile(bids, len(p_others)))
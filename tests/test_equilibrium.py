@@ -0,0 +1,53 @@
+"""多人均衡：pure 收敛时没有人想改出价；mixed 的 residual 与按历史出价穷举得到的可剥削度一致。"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from prover.equilibrium import best_responses, solve_equilibrium
+from prover.rules import DEFAULT_RULES, efficiency
+
+RULES = dataclasses.replace(DEFAULT_RULES, minimum_bid=500)
+
+
+def budgets(n):
+    return np.random.default_rng(0).uniform(500, 5000, n)
+
+
+@pytest.mark.parametrize("n", [2, 5, 20])
+def test_pure_equilibrium_has_no_profitable_deviation(n):
+    result = solve_equilibrium(budgets(n), RULES, mode="pure", seed=0)
+    assert result.converged
+    br, _ = best_responses(result.bids.astype(np.int64), budgets(n), RULES)
+    np.testing.assert_array_equal(br, result.bids)
+    assert result.residual == 0.0
+
+
+@pytest.mark.parametrize("n", [2, 5])
+def test_mixed_finds_the_pure_equilibrium_of_small_games(n):
+    mixed = solve_equilibrium(budgets(n), RULES, mode="mixed")
+    pure = solve_equilibrium(budgets(n), RULES, mode="pure", seed=0)
+    assert mixed.converged
+    assert mixed.residual <= 1e-3
+    # 第 0 轮所有人不出价，之后每一轮都出纯策略均衡的出价
+    np.testing.assert_allclose(mixed.bids, pure.bids * (mixed.iterations - 1) / mixed.iterations)
+
+
+def test_mixed_residual_is_the_exploitability_of_the_empirical_play():
+    n, rounds = 4, 6
+    game = budgets(n)
+    results = [solve_equilibrium(game, RULES, mode="mixed", max_iter=t, tol=0) for t in range(1, rounds + 1)]
+    # 由前后两次的平均出价还原每一轮实际的出价
+    totals = [np.zeros(n)] + [r.bids * r.iterations for r in results]
+    profiles = np.array([b - a for a, b in zip(totals, totals[1:])])
+    p_others = profiles.sum(axis=1, keepdims=True) - profiles
+    candidates = np.arange(0, int(game.max()) + 1)
+    best, mixed = [], []
+    for i in range(n):
+        expected = efficiency(candidates[:, None], p_others[:, i], RULES).mean(axis=1)
+        best.append(expected[candidates <= game[i]].max())
+        mixed.append(np.mean([expected[int(b)] for b in profiles[:, i]]))
+    last = results[-1]
+    np.testing.assert_allclose(last.efficiencies, mixed)
+    assert last.residual == pytest.approx((np.sum(best) - np.sum(mixed)) / np.sum(best))
+    np.testing.assert_allclose(last.participation, (profiles > 0).mean(axis=0))
@@ -0,0 +1,70 @@
+"""帧缓存：目录按规则和渲染参数区分（改了设置就不会命中旧缓存），每帧的最优点与 optimal_bid 一致。"""
+import dataclasses
+import os
+
+import numpy as np
+import pytest
+
+from prover.curve import b_plot_limit
+from prover.frames import frame_optimum, frame_p_others, frames_path, load_frames
+from prover.rules import DEFAULT_RULES, efficiency, star_prize
+from prover.solver import optimal_bid
+
+TINY = {"b_plot_upper_limit": 10000, "step": 5000, "dpi": 20}
+
+
+@pytest.mark.parametrize("changes", [
+    {"step": 50},
+    {"dpi": 80},
+    {"b_plot_upper_limit": 5000},
+    {"rules": dataclasses.replace(DEFAULT_RULES, minimum_bid=500)},
+    {"rules": dataclasses.replace(DEFAULT_RULES, max_total_pool=21000)},
+    {"rules": dataclasses.replace(DEFAULT_RULES, thresholds=(5000, 7500, 16000, 17000, 18000, 19500))},
+], ids=repr)
+def test_any_settings_change_uses_another_cache(tmp_path, changes):
+    settings = dict(TINY, rules=DEFAULT_RULES, directory=str(tmp_path))
+    assert frames_path(**settings) == frames_path(**dict(settings))
+    assert frames_path(**settings) != frames_path(**dict(settings, **changes))
+
+
+def test_built_cache_is_reused_only_for_the_same_settings(tmp_path):
+    directory = str(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        load_frames(directory=directory, build=False, **TINY)
+    cache = load_frames(directory=directory, workers=1, **TINY)
+    assert len(cache.frames) == len(frame_p_others(DEFAULT_RULES, TINY["step"]))
+    assert cache.frame(1).shape == (cache.index["frame_height"], cache.index["frame_width"], 3)
+    assert load_frames(directory=directory, build=False, **TINY).path == cache.path
+
+    changed = dataclasses.replace(DEFAULT_RULES, minimum_bid=500)
+    with pytest.raises(FileNotFoundError):
+        load_frames(changed, directory=directory, build=False, **TINY)
+    with pytest.raises(FileNotFoundError):
+        load_frames(directory=directory, build=False, **dict(TINY, dpi=30))
+    assert os.listdir(directory) == [os.path.basename(cache.path)]
+
+
+@pytest.mark.parametrize("upper", [10000, 3000, 800])
+def test_frame_optimum_matches_optimal_bid(upper):
+    for p_others in frame_p_others(DEFAULT_RULES, 100):
+        limit = b_plot_limit(p_others, DEFAULT_RULES, upper)
+        optimum = optimal_bid(p_others, DEFAULT_RULES, max_bid=limit)
+        frame = frame_optimum(p_others, DEFAULT_RULES, upper)
+        if optimum.bid == -1:
+            assert frame["optimal_b"] is None and frame["efficiency"] == 0
+            continue
+        assert frame["optimal_b"] == optimum.bid <= limit
+        assert frame["efficiency"] == pytest.approx(optimum.efficiency)
+        assert frame["stars"] == star_prize(p_others + optimum.bid, DEFAULT_RULES)
+
+
+def test_frame_optimum_is_the_best_integer_bid_on_the_plot():
+    for p_others in (0, 4200, 7400, 15900, 18500, 21900):
+        limit = int(b_plot_limit(p_others, DEFAULT_RULES, 3000))
+        effs = efficiency(np.arange(limit + 1), p_others, DEFAULT_RULES)
+        frame = frame_optimum(p_others, DEFAULT_RULES, 3000)
+        if effs.max() <= 0:
+            assert frame["optimal_b"] is None
+        else:
+            assert frame["optimal_b"] == int(np.argmax(effs))
+            assert frame["efficiency"] == pytest.approx(effs.max())
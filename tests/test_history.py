@@ -0,0 +1,121 @@
+"""HistoryStore：导入 / 追加、键索引，以及 final_pool_distribution 与逐行筛选的结果对比。"""
+import numpy as np
+import pytest
+
+from prover.history import HistoryStore, _keys
+from prover.rules import DEFAULT_RULES, base_stars
+
+
+def random_contests(n_contests, seed, first_id=0):
+    """每场比赛在截止前 0..60 分钟之间若干个（非整数分钟的）快照，池子随时间增长。"""
+    rng = np.random.default_rng(seed)
+    contests = []
+    for contest_id in range(first_id, first_id + n_contests):
+        minutes = np.sort(rng.uniform(0, 60, rng.integers(5, 40)))[::-1]
+        pools = np.cumsum(rng.uniform(0, 600, len(minutes))) + rng.uniform(0, 8000)
+        final_pool = pools[-1] + rng.uniform(0, 3000)
+        my_bid = float(rng.choice([0, 500, 1200]))
+        contests.append((contest_id, minutes, pools.astype(np.float32), np.float32(final_pool), my_bid))
+    return contests
+
+
+def add_all(store, contests):
+    for contest_id, minutes, pools, final_pool, my_bid in contests:
+        store.add_contest(contest_id, minutes, pools, final_pool, my_bid)
+
+
+def brute_force(contests, p_others, minutes_before_close, pool_tolerance, minutes_tolerance):
+    """逐场比赛筛选：容差之内、最接近该时刻的快照（并列取先出现的），返回 {contest_id: (当时的池子, 最终池子)}。"""
+    expected = {}
+    for contest_id, minutes, pools, final_pool, _ in contests:
+        distance = np.abs(minutes.astype(np.float32).astype(float) - minutes_before_close)
+        match = (np.abs(pools.astype(float) - p_others) <= pool_tolerance) & (distance <= minutes_tolerance)
+        if match.any():
+            best = np.flatnonzero(match)[np.argmin(distance[match])]
+            expected[contest_id] = (float(pools[best]), float(final_pool))
+    return expected
+
+
+@pytest.fixture
+def contests():
+    return random_contests(300, seed=1)
+
+
+def test_append_and_row_counts(tmp_path, contests):
+    store = HistoryStore(str(tmp_path))
+    assert store.row_counts() == (0, 0)
+    add_all(store, contests[:10])
+    snapshots = sum(len(minutes) for _, minutes, _, _, _ in contests[:10])
+    assert store.row_counts() == (snapshots, 10)
+    contest_id, minutes, pools, final_pool, my_bid = contests[0]
+    np.testing.assert_array_equal(store.trajectories.column("pool")[:len(pools)], pools)
+    assert store.outcomes.column("final_pool")[0] == final_pool
+    assert store.outcomes.column("tier")[0] == base_stars(final_pool, DEFAULT_RULES)
+
+    reopened = HistoryStore(str(tmp_path))
+    assert reopened.row_counts() == store.row_counts()
+
+
+def test_interrupted_append_is_truncated(tmp_path, contests):
+    store = HistoryStore(str(tmp_path))
+    add_all(store, contests[:3])
+    rows = len(store.trajectories)
+    # 模拟写到一半中断：只有一列多写了几行
+    with open(store.trajectories._file("pool"), "ab") as f:
+        f.write(np.zeros(5, dtype=np.float32).tobytes())
+    assert len(store.trajectories) == rows
+    add_all(store, contests[3:4])
+    assert len(store.trajectories) == rows + len(contests[3][1])
+    np.testing.assert_array_equal(store.trajectories.column("pool")[rows:], contests[3][2])
+
+
+def test_import_csv(tmp_path, contests):
+    import pandas as pd
+
+    traj = pd.DataFrame([(cid, m, p) for cid, minutes, pools, _, _ in contests[:20] for m, p in zip(minutes, pools)],
+                        columns=["contest_id", "minutes_before_close", "pool"])
+    outcomes = pd.DataFrame([(cid, final, bid) for cid, _, _, final, bid in contests[:20]],
+                            columns=["contest_id", "final_pool", "my_bid"])
+    traj.to_csv(tmp_path / "traj.csv", index=False)
+    outcomes.to_csv(tmp_path / "outcomes.csv", index=False)
+    store = HistoryStore(str(tmp_path / "store"))
+    imported = store.import_csv(str(tmp_path / "traj.csv"), str(tmp_path / "outcomes.csv"), chunk_rows=50)
+    assert imported == {"trajectories": len(traj), "outcomes": 20}
+    np.testing.assert_allclose(store.trajectories.column("pool"), traj["pool"], rtol=1e-6)
+    stars = np.where(outcomes["my_bid"] >= DEFAULT_RULES.minimum_bid,
+                     base_stars(outcomes["final_pool"].to_numpy(), DEFAULT_RULES) * DEFAULT_RULES.star_multiplier, 0)
+    np.testing.assert_allclose(store.outcomes.column("stars"), stars)
+
+
+def test_key_index_is_sorted_and_updated_incrementally(tmp_path, contests):
+    store = HistoryStore(str(tmp_path))
+    add_all(store, contests[:100])
+    keys, order = store.trajectory_index()
+    add_all(store, contests[100:])
+    keys, order = HistoryStore(str(tmp_path)).trajectory_index()  # 从磁盘上的旧索引增量合并
+    table = store.trajectories
+    expected = _keys(table.column("minutes_before_close"), table.column("pool"))
+    assert np.all(np.diff(keys) >= 0)
+    np.testing.assert_array_equal(np.sort(order), np.arange(len(table)))
+    np.testing.assert_array_equal(expected[order], keys)
+
+
+@pytest.mark.parametrize("p_others, minutes, pool_tolerance, minutes_tolerance", [
+    (8000, 30, 250, 1),
+    (12345.5, 12.25, 100, 0.5),
+    (16200, 45, 1000, 3),
+    (3000, 0, 500, 2),
+    (50000, 30, 250, 1),
+])
+def test_final_pool_distribution_matches_brute_force(tmp_path, contests, p_others, minutes, pool_tolerance,
+                                                     minutes_tolerance):
+    store = HistoryStore(str(tmp_path))
+    add_all(store, contests)
+    result = store.final_pool_distribution(p_others, minutes, pool_tolerance, minutes_tolerance)
+    expected = brute_force(contests, p_others, minutes, pool_tolerance, minutes_tolerance)
+    assert result.contest_ids.tolist() == sorted(expected)
+    assert result.pool_at_t.tolist() == [expected[c][0] for c in sorted(expected)]
+    assert result.final_pool.tolist() == [expected[c][1] for c in sorted(expected)]
+    histogram = result.histogram()
+    assert histogram.sum() == len(expected)
+    assert len(histogram) == int(DEFAULT_RULES.max_total_pool) + 2
@@ -0,0 +1,57 @@
+"""live.parse_event 的输入检查，以及 consume 推送给 sink 的结果。"""
+import asyncio
+import json
+
+import pytest
+
+from prover.live import LatestSlot, LiveOptimizer, consume, parse_event, read_state
+from prover.solver import optimal_bid
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("16200", (16200.0, None)),
+    ('{"p_others": 16200, "max_bid": 3000}', (16200.0, 3000.0)),
+    ('{"pool": 1300.5}', (1300.5, None)),
+    ('{"p_others": 1300, "max_bid": null}', (1300.0, None)),
+])
+def test_valid_events(line, expected):
+    assert parse_event(line) == expected
+
+
+@pytest.mark.parametrize("line", [
+    "", "x", "NaN", "Infinity", "-Infinity", "true", '"16200"',
+    '{"p_others": NaN}', '{"p_others": Infinity}', '{"p_others": true}', '{"p_others": "16200"}',
+    '{"p_others": 16200, "max_bid": NaN}', '{"p_others": 16200, "max_bid": false}',
+    '{"p_others": 16200, "max_bid": "3000"}', '{"max_bid": 3000}',
+])
+def test_invalid_events_are_dropped(line):
+    assert parse_event(line) is None
+
+
+def test_consume_skips_invalid_lines_and_counts_them():
+    updates = []
+
+    async def feed():
+        slot = LatestSlot()
+        task = asyncio.create_task(consume(slot, LiveOptimizer(), [updates.append]))
+        slot.put("NaN")
+        await asyncio.sleep(0)
+        slot.put('{"p_others": 16200}')
+        await asyncio.sleep(0)
+        slot.close()
+        await task
+
+    asyncio.run(feed())
+    (update,) = updates
+    assert update.p_others == 16200.0
+    assert update.bid == optimal_bid(16200.0).bid
+    assert update.coalesced == 2
+    assert update.latency_us > 0
+
+
+def test_read_state_ignores_non_finite_pools(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text('{"seq": 1, "p_others": NaN}', encoding="utf-8")
+    assert read_state(str(path)) is None
+    path.write_text(json.dumps({"seq": 2, "p_others": 16200.0}), encoding="utf-8")
+    assert read_state(str(path))["seq"] == 2
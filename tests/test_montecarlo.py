@@ -0,0 +1,71 @@
+"""montecarlo：直方图的形状和确定性，以及 evaluate 与逐个情景直接计算的结果对比。"""
+import numpy as np
+import pytest
+
+from prover.montecarlo import EmpiricalArrivals, PoissonArrivals, evaluate, late_arrival_histogram, simulate
+from prover.rules import DEFAULT_RULES, efficiency, star_prize
+
+N_BINS = int(DEFAULT_RULES.max_total_pool) + 2
+
+
+@pytest.mark.parametrize("n_scenarios", [0, -5])
+def test_non_positive_scenario_count_is_rejected(n_scenarios):
+    with pytest.raises(ValueError):
+        late_arrival_histogram(PoissonArrivals(3, 800), n_scenarios)
+
+
+def test_empty_histogram_is_rejected():
+    with pytest.raises(ValueError):
+        evaluate(16000, [500, 1000], np.zeros(N_BINS, dtype=np.int64))
+
+
+@pytest.mark.parametrize("n_scenarios, chunk_size", [(1, 1000), (999, 1000), (2500, 1000)])
+def test_histogram_counts_every_scenario(n_scenarios, chunk_size):
+    histogram = late_arrival_histogram(PoissonArrivals(3, 800), n_scenarios, chunk_size=chunk_size, seed=0)
+    assert isinstance(histogram, np.ndarray)
+    assert histogram.dtype == np.int64 and histogram.shape == (N_BINS,)
+    assert histogram.sum() == n_scenarios
+
+
+def test_histogram_is_reproducible_across_workers():
+    sampler = PoissonArrivals(5, 900)
+    serial = late_arrival_histogram(sampler, 5000, chunk_size=1000, seed=7)
+    parallel = late_arrival_histogram(sampler, 5000, chunk_size=1000, workers=2, seed=7)
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_arrivals_beyond_the_cap_land_in_the_last_bin():
+    histogram = late_arrival_histogram(EmpiricalArrivals((0.0, 100.4, 30000.0)), 3000, seed=0)
+    assert set(np.flatnonzero(histogram)) == {0, 100, N_BINS - 1}
+
+
+def test_poisson_without_arrivals_is_zero():
+    histogram = late_arrival_histogram(PoissonArrivals(0, 800), 100, seed=0)
+    assert histogram[0] == 100
+
+
+def test_evaluate_matches_direct_computation():
+    samples = np.random.default_rng(0).integers(0, 7000, 400)
+    histogram = np.bincount(samples, minlength=N_BINS)
+    p_others = 14000
+    bids = np.array([0, 99, 100, 500, 1001, 2001, 3001, 4001, 8001])
+    result = evaluate(p_others, bids, histogram, DEFAULT_RULES, quantiles=(0.05, 0.95), chunk=4)
+
+    for i, bid in enumerate(bids):
+        effs = efficiency(bid, p_others + samples, DEFAULT_RULES)
+        prizes = np.where(bid >= DEFAULT_RULES.minimum_bid, star_prize(p_others + bid + samples, DEFAULT_RULES), 0)
+        assert result.expected_efficiency[i] == pytest.approx(effs.mean())
+        assert result.expected_stars[i] == pytest.approx(prizes.mean())
+        assert result.overflow_probability[i] == pytest.approx(
+            np.mean(p_others + bid + samples > DEFAULT_RULES.max_total_pool))
+        # 加权分位数：累积权重首次达到 q 的样本值
+        ordered = np.sort(effs)
+        assert result.efficiency_low[i] == ordered[int(np.ceil(0.05 * len(ordered))) - 1]
+        assert result.efficiency_high[i] == ordered[int(np.ceil(0.95 * len(ordered))) - 1]
+
+
+def test_simulate_is_histogram_then_evaluate():
+    sampler = PoissonArrivals(4, 700)
+    direct = simulate(16000, [500, 1000], sampler, n_scenarios=2000, seed=3)
+    histogram = late_arrival_histogram(sampler, 2000, seed=3)
+    np.testing.assert_array_equal(direct.expected_efficiency, evaluate(16000, [500, 1000], histogram).expected_efficiency)
@@ -0,0 +1,119 @@
+"""profiling：开关、phase / timed / count 的记录、分位数估计、snapshot / 报告，以及命令行入口。"""
+import json
+import sys
+import time
+
+import pytest
+
+from prover import profiling
+
+
+@pytest.fixture(autouse=True)
+def clean_profiling():
+    was_enabled = profiling.enabled()
+    profiling.reset()
+    yield
+    profiling.enable(was_enabled)
+    profiling.reset()
+
+
+def test_disabled_records_nothing():
+    profiling.enable(False)
+
+    @profiling.timed("f")
+    def f(x):
+        return x * 2
+
+    with profiling.phase("p"):
+        pass
+    assert f(3) == 6
+    profiling.count("c")
+    assert profiling.snapshot() == {"enabled": False, "phases": {}, "counters": {}}
+
+
+def test_phase_timed_and_count():
+    @profiling.timed("f")
+    def f(x):
+        return x * 2
+
+    profiling.enable()
+    assert f.__name__ == "f" and f(3) == 6
+    with pytest.raises(ZeroDivisionError):
+        with profiling.phase("p"):
+            time.sleep(0.002)
+            1 / 0  # 出错时也记录耗时
+    profiling.count("c")
+    profiling.count("c", 4)
+    data = profiling.snapshot()
+    assert data["enabled"] is True
+    assert data["counters"] == {"c": 5}
+    assert data["phases"]["f"]["count"] == data["phases"]["p"]["count"] == 1
+    assert data["phases"]["p"]["min_s"] >= 0.002
+    assert list(data["phases"]) == ["p", "f"]  # 按总耗时从高到低
+
+
+def test_switch_is_checked_at_call_time():
+    @profiling.timed("f")
+    def f():
+        pass
+
+    f()
+    profiling.enable()
+    f()
+    f()
+    profiling.enable(False)
+    f()
+    assert profiling.snapshot()["phases"]["f"]["count"] == 2
+
+
+def test_quantiles_from_buckets():
+    stats = profiling.PhaseStats()
+    for _ in range(100):
+        stats.add(3e-6)  # [2, 4) 微秒的桶
+    for _ in range(5):
+        stats.add(1e-3)  # [512, 1024) 微秒的桶，但不超过最大值
+    assert stats.quantile(0.5) == pytest.approx(4e-6)
+    assert stats.quantile(0.95) == pytest.approx(4e-6)
+    assert stats.quantile(0.99) == pytest.approx(1e-3)
+    assert stats.quantile(1.0) == pytest.approx(1e-3)
+    data = stats.as_dict()
+    assert data["count"] == 105 and data["histogram_us"] == {"<4": 100, "<1024": 5}
+    assert data["mean_s"] == pytest.approx((100 * 3e-6 + 5 * 1e-3) / 105)
+    assert (data["min_s"], data["max_s"]) == (3e-6, 1e-3)
+
+
+def test_extreme_durations_stay_in_range():
+    stats = profiling.PhaseStats()
+    stats.add(0.0)
+    stats.add(1e6)  # 超出最后一个桶的上界
+    assert stats.buckets[0] == 1 and stats.buckets[-1] == 1
+    assert profiling.PhaseStats().as_dict()["mean_s"] == 0.0
+
+
+def test_reset_and_report(tmp_path):
+    profiling.enable()
+    profiling.record("solver.optimal_bids", 0.0015)
+    profiling.count("redraw.full", 3)
+    report = profiling.format_report()
+    assert "solver.optimal_bids" in report and "redraw.full" in report
+    profiling.to_json(str(tmp_path / "phases.json"))
+    with open(tmp_path / "phases.json", encoding="utf-8") as f:
+        assert json.load(f)["phases"]["solver.optimal_bids"]["total_s"] == pytest.approx(0.0015)
+    profiling.reset()
+    assert profiling.snapshot()["phases"] == {} and profiling.snapshot()["counters"] == {}
+
+
+def test_main_runs_a_script_with_profiling_on(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(sys, "argv", list(sys.argv))  # main 会改写 sys.argv
+    script = tmp_path / "target.py"
+    script.write_text("import sys\n"
+                      "from prover import profiling\n"
+                      "with profiling.phase('script.work'):\n"
+                      "    profiling.count('script.args', len(sys.argv))\n")
+    profiling.main(["--json", str(tmp_path / "out.json"), str(script), "a", "b"])
+    with open(tmp_path / "out.json", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["enabled"] is True
+    assert data["counters"] == {"script.args": 3}
+    assert data["phases"]["script.work"]["count"] == 1
+    assert "script.work" in capsys.readouterr().err
@@ -0,0 +1,25 @@
+"""ranges.parse_range，以及只解析范围参数的模块不会导入 pandas / pyarrow。"""
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from prover.ranges import parse_range
+
+
+def test_parse_range():
+    assert parse_range("100:1000:300").tolist() == [100, 400, 700, 1000]
+    assert parse_range("100:1000:300").dtype == np.int64
+    assert parse_range("0:1:0.25").tolist() == [0, 0.25, 0.5, 0.75, 1]
+    assert parse_range("3:5").tolist() == [3, 4, 5]
+    assert parse_range("16200").tolist() == [16200.0]
+    with pytest.raises(ValueError):
+        parse_range("a:b")
+
+
+@pytest.mark.parametrize("module", ["prover.heatmap", "prover.sweep", "prover.ranges"])
+def test_module_does_not_import_pandas(module):
+    code = f"import sys, {module}; print(sorted({{'pandas', 'pyarrow'}} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
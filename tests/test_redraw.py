@@ -0,0 +1,185 @@
+"""BlitRedraw 的节流和防重入（用不依赖 GUI 的假画布驱动），以及预计算曲线的查表。"""
+import numpy as np
+import pytest
+
+from prover import profiling
+from prover.redraw import BlitRedraw, EfficiencyCurves, ylim_level
+from prover.rules import DEFAULT_RULES, efficiency
+from prover.solver import optimal_bid
+
+
+class FakeTimer:
+    """只记录状态的定时器：测试里手动调用 fire() 代替事件循环。"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.running = False
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def fire(self):
+        for callback in self.callbacks:
+            callback()
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.handlers = {}
+        self.timer = None
+        self.calls = []
+
+    def mpl_connect(self, event, handler):
+        self.handlers[event] = handler
+
+    def new_timer(self, interval):
+        self.timer = FakeTimer()
+        return self.timer
+
+    def draw_idle(self):
+        self.calls.append("draw")
+        if "draw_event" in self.handlers:  # 完整绘制结束时 matplotlib 会发出 draw_event
+            self.handlers["draw_event"](None)
+
+    def copy_from_bbox(self, bbox):
+        return "background"
+
+    def restore_region(self, background):
+        assert background == "background"
+
+    def blit(self, bbox):
+        self.calls.append("blit")
+
+
+class FakeFigure:
+    bbox = None
+
+    def __init__(self):
+        self.canvas = FakeCanvas()
+
+    def draw_artist(self, artist):
+        pass
+
+
+class FakeAxes:
+    def __init__(self):
+        self.figure = FakeFigure()
+        self.ylims = []
+
+    def set_ylim(self, bottom, top):
+        self.ylims.append(top)
+
+
+class FakeArtist:
+    animated = False
+
+    def set_animated(self, on):
+        self.animated = on
+
+
+@pytest.fixture
+def counters():
+    was_enabled = profiling.enabled()
+    profiling.reset()
+    profiling.enable()
+    yield lambda: profiling.snapshot()["counters"]
+    profiling.enable(was_enabled)
+    profiling.reset()
+
+
+def make_redraw(update, **kwargs):
+    ax = FakeAxes()
+    artists = [FakeArtist(), FakeArtist()]
+    return BlitRedraw(ax, artists, update, **kwargs), ax, artists
+
+
+def test_first_request_draws_and_later_ones_are_throttled(counters):
+    seen = []
+    redraw, ax, artists = make_redraw(lambda value: seen.append(value) or 1.0)
+    canvas = ax.figure.canvas
+    assert all(artist.animated for artist in artists)
+
+    redraw.request(1)  # 第一个事件立即重绘（第一次是完整绘制），并启动定时器
+    assert seen == [1] and canvas.calls == ["draw"] and canvas.timer.running
+    for value in (2, 3, 4):  # 同一帧间隔内的事件只保留最新的值
+        redraw.request(value)
+    assert seen == [1]
+    canvas.timer.fire()
+    assert seen == [1, 4] and canvas.calls == ["draw", "blit"]  # Y 档位没变：只 blit
+    canvas.timer.fire()  # 没有新请求：定时器停下，下一个事件再立即重绘
+    assert not canvas.timer.running
+    redraw.request(5)
+    assert seen == [1, 4, 5] and canvas.timer.running
+    assert counters()["redraw.coalesced"] == 2
+    assert counters()["redraw.full"] == 1
+
+
+def test_level_change_forces_a_full_draw():
+    levels = {1: 1.0, 2: 1.0, 3: 2.0}
+    redraw, ax, _ = make_redraw(levels.get, interval_ms=0)
+    for value in (1, 2, 3):
+        redraw.request(value)
+    assert ax.figure.canvas.calls == ["draw", "blit", "draw"]
+    assert ax.ylims == [1.0, 2.0]
+
+
+def test_reentrant_requests_are_dropped(counters):
+    seen = []
+
+    def update(value):
+        seen.append(value)
+        redraw.request(value + 100)  # 比如 update 里 set_val 触发了控件回调
+        return 1.0
+
+    redraw, _, _ = make_redraw(update, interval_ms=0)
+    redraw.request(1)
+    redraw.request(2)
+    assert seen == [1, 2]
+    assert counters()["redraw.reentrant"] == 2
+
+
+def test_busy_flag_is_cleared_after_an_error():
+    def update(value):
+        if value == 1:
+            raise RuntimeError
+        return 1.0
+
+    redraw, ax, _ = make_redraw(update, interval_ms=0)
+    with pytest.raises(RuntimeError):
+        redraw.request(1)
+    redraw.request(2)
+    assert ax.figure.canvas.calls == ["draw"]
+
+
+def test_without_blit_every_request_draws_synchronously():
+    redraw, ax, artists = make_redraw(lambda value: 1.0, blit=False)
+    for value in range(3):
+        redraw.request(value)
+    assert ax.figure.canvas.calls == ["draw"] * 3
+    assert ax.figure.canvas.timer is None
+    assert not any(artist.animated for artist in artists)
+
+
+def test_curves_lookup_matches_the_solver():
+    b_values = np.linspace(100, 10000, 300)
+    steps = np.arange(0, 21901, 100)
+    curves = EfficiencyCurves(b_values, steps, DEFAULT_RULES, max_bid=10000)
+    for p_others in (0, 4900, 12345.5, 21900):  # 档位上的查表，以及不在档位上的现算
+        y, bid, eff = curves.lookup(p_others)
+        optimum = optimal_bid(p_others, DEFAULT_RULES, 10000)
+        np.testing.assert_allclose(y, efficiency(b_values, p_others, DEFAULT_RULES))
+        assert (bid, eff) == (int(optimum.bid), pytest.approx(optimum.efficiency))
+
+
+def test_ylim_levels_are_stable_and_leave_headroom():
+    for eff in (0.0, 0.0005, 0.001, 0.00123, 0.004):
+        level = ylim_level(eff)
+        assert level >= max(0.001, eff * 1.15) * (1 - 1e-12)
+        assert ylim_level(eff * 1.0001) in (level, level * 1.25)
+    assert ylim_level(0.0) == ylim_level(0.0008) == 0.001
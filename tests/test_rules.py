@@ -0,0 +1,49 @@
+"""Rules 的合法性检查，以及星星 / 划算度在总池上限处的行为。"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from prover.rules import DEFAULT_RULES, Rules, base_stars, efficiency
+from prover.solver import optimal_bids
+from prover.sweep import variant_rules
+
+
+@pytest.mark.parametrize("changes", [
+    {"minimum_bid": 0},
+    {"minimum_bid": -5},
+    {"minimum_bid": float("nan")},
+    {"star_multiplier": float("nan")},
+    {"star_multiplier": float("inf")},
+    {"max_total_pool": 10000},
+    {"max_total_pool": 19000},
+    {"thresholds": (5000, 5000, 16000, 17000, 18000, 19000)},
+    {"thresholds": (7500, 5000, 16000, 17000, 18000, 19000)},
+    {"thresholds": (0, 7500, 16000, 17000, 18000, 19000)},
+    {"thresholds": (5000, float("nan"), 16000, 17000, 18000, 19000)},
+], ids=repr)
+def test_invalid_rules_are_rejected(changes):
+    with pytest.raises(ValueError):
+        dataclasses.replace(DEFAULT_RULES, **changes)
+
+
+def test_thresholds_are_stored_as_a_hashable_tuple():
+    rules = Rules(thresholds=[5000, 7500, 16000, 17000, 18000, 19000])
+    assert rules == DEFAULT_RULES
+    assert hash(rules) == hash(DEFAULT_RULES)
+    assert rules.version_key == DEFAULT_RULES.version_key
+
+
+def test_nothing_above_the_cap():
+    rules = dataclasses.replace(DEFAULT_RULES, max_total_pool=19500)
+    assert base_stars(np.array([19500, 19500.5, 22000]), rules).tolist() == [7, 0, 0]
+    assert efficiency(1000, 18600, rules) == 0
+    bids, _ = optimal_bids(np.arange(0, 19501, 50), rules)
+    assert (np.arange(0, 19501, 50) + bids)[bids >= 0].max() <= 19500
+
+
+def test_sweep_skips_invalid_variants():
+    assert variant_rules(("t0",), (8000,)) is None
+    assert variant_rules(("max_total_pool",), (18000,)) is None
+    assert variant_rules(("minimum_bid",), (0,)) is None
+    assert variant_rules(("shift",), (500,)).thresholds == (5500, 8000, 16500, 17500, 18500, 19500)
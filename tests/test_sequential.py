@@ -0,0 +1,65 @@
+"""序贯博弈的逆向归纳（后缀最大值）与小池子上逐个出价穷举的记忆化搜索对比。"""
+from functools import lru_cache
+
+import numpy as np
+import pytest
+
+from prover.rules import Rules
+from prover.sequential import _suffix_best, pool_efficiency, solve_sequential
+
+SMALL_RULES = [
+    Rules(minimum_bid=3, max_total_pool=40, thresholds=(10, 20, 25, 30, 35)),
+    Rules(minimum_bid=1, max_total_pool=30, thresholds=(4, 9, 16, 22, 27)),
+    Rules(minimum_bid=7, max_total_pool=60, star_multiplier=3, thresholds=(12, 30, 31, 45, 50)),
+]
+
+
+def exhaustive(n_bidders, rules):
+    """
+    search(k, p) = 还剩 k 人、池子为 p 时的 (出价, 最终池子)：逐个尝试所有合法出价，
+    取最终划算度最大、其次出价最小的；最大划算度不为正时不参加。
+    """
+    top, minimum_bid = int(rules.max_total_pool), int(rules.minimum_bid)
+
+    @lru_cache(maxsize=None)
+    def search(k, p):
+        if k == 0:
+            return 0, p
+        best_bid, best_eff = 0, 0.0
+        for b in range(minimum_bid, top - p + 1):
+            eff = float(pool_efficiency(search(k - 1, p + b)[1], rules))
+            if eff > best_eff:
+                best_bid, best_eff = b, eff
+        return best_bid, search(k - 1, p + best_bid)[1]
+
+    return search
+
+
+@pytest.mark.parametrize("rules", SMALL_RULES, ids=["min3", "min1", "min7"])
+@pytest.mark.parametrize("n_bidders", [1, 2, 3, 6])
+def test_backward_induction_matches_exhaustive_search(rules, n_bidders):
+    policy = solve_sequential(n_bidders, rules)
+    search = exhaustive(n_bidders, rules)
+    for position in range(n_bidders):
+        remaining = n_bidders - position
+        expected = [search(remaining, p) for p in range(int(rules.max_total_pool) + 1)]
+        assert policy.bids[position].tolist() == [b for b, _ in expected]
+        assert policy.final_pool[position].tolist() == [f for _, f in expected]
+
+
+def test_play_follows_the_table():
+    rules = SMALL_RULES[0]
+    policy = solve_sequential(5, rules)
+    for start in range(0, 41, 4):
+        path, final = policy.play(start)
+        assert final == policy.final_pool[0, start] <= rules.max_total_pool
+        assert all(bid == 0 or bid >= rules.minimum_bid for _, _, bid in path)
+    assert policy.bid(0, 41) == 0  # 已经爆池
+    assert policy.efficiency(0, 41) == 0
+
+
+def test_suffix_best_picks_the_first_maximum():
+    values = np.array([1.0, 3.0, 2.0, 3.0, 0.5, 0.5])
+    best, first = _suffix_best(values)
+    assert best.tolist() == [3.0, 3.0, 3.0, 3.0, 0.5, 0.5]
+    assert first.tolist() == [1, 1, 3, 3, 4, 5]
@@ -0,0 +1,130 @@
+"""HTTP 查询服务：预设规则、请求解析、缓存 / 就地求解 / 批处理的结果一致，以及 HTTP 层的错误处理。"""
+import asyncio
+import json
+
+import pytest
+
+from prover.service import PRESETS, OptimalBidService, QueryError, _HttpConnection, parse_query
+from prover.solver import optimal_bid
+
+PROVE = PRESETS["prove"]
+
+
+class FakeTransport:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+
+def responses(data):
+    """把连续的 HTTP 应答拆成 [(状态码, Connection 头, JSON 对象), ...]。"""
+    result = []
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode().split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        length = int(headers["Content-Length"])
+        result.append((int(lines[0].split()[1]), headers["Connection"], json.loads(data[:length])))
+        data = data[length:]
+    return result
+
+
+def exchange(*chunks, service=None):
+    """把 chunks 依次交给一个连接，跑完本轮事件循环后返回 (应答列表, 连接是否已关闭)。"""
+    async def run():
+        connection = _HttpConnection(service or OptimalBidService(PROVE.rules, max_bid=PROVE.max_bid))
+        transport = FakeTransport()
+        connection.connection_made(transport)
+        for chunk in chunks:
+            connection.data_received(chunk)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return responses(transport.data), transport.closed
+    return asyncio.run(run())
+
+
+def test_prove_preset_matches_prove_py():
+    # prove.py: MINIMUM_BID = 500，出价不超过 B_PLOT_UPPER_LIMIT = 10000
+    rules, max_bid, p_others = parse_query({"p_others": "0,1300,5000"}, PROVE.rules, PROVE.max_bid)
+    assert (rules.minimum_bid, max_bid) == (500, 10000)
+    (status, _, payload), = exchange(b"GET /optimal?p_others=0 HTTP/1.1\r\n\r\n")[0]
+    assert status == 200 and payload["results"][0]["bid"] == 500
+
+
+def test_parse_query_overrides_and_errors():
+    rules, max_bid, p_others = parse_query({"p_others": [1300], "max_bid": "3000", "rules": {"minimum_bid": 100}},
+                                           PROVE.rules, PROVE.max_bid)
+    assert (rules.minimum_bid, max_bid, p_others) == (100, 3000, [1300.0])
+    for params in ({}, {"p_others": "x"}, {"p_others": "nan"}, {"p_others": 1, "rules": "x"},
+                   {"p_others": 1, "rules": {"colour": 1}}, {"p_others": 1, "thresholds": "5,4"},
+                   {"p_others": 1, "max_bid": "nan"}):
+        with pytest.raises(QueryError):
+            parse_query(params)
+
+
+@pytest.mark.parametrize("query", [
+    "max_total_pool=10000",
+    "minimum_bid=-5",
+    "minimum_bid=0",
+    "star_multiplier=nan",
+    "max_total_pool=inf",
+    "thresholds=5000,7500,16000,17000,18000,23000",
+    "thresholds=0,7500",
+])
+def test_invalid_rule_overrides_are_a_400(query):
+    with pytest.raises(QueryError):
+        parse_query(dict(pair.split("=") for pair in f"p_others=15000&{query}".split("&")), PROVE.rules)
+    (status, _, payload), = exchange(f"GET /optimal?p_others=15000&{query} HTTP/1.1\r\n\r\n".encode())[0]
+    assert status == 400 and "invalid rules" in payload["error"]
+
+
+def test_inline_and_batched_results_agree():
+    service = OptimalBidService(PROVE.rules, max_bid=PROVE.max_bid, inline_max=4)
+    values = [0, 1300.5, 4999, 7400, 16000, 21600]
+
+    async def run():
+        # 同一轮里：第一个请求就地求解，超出额度的留到本轮结束时批量求解
+        return await asyncio.gather(*(service.query(PROVE.rules, PROVE.max_bid, [p]) for p in values),
+                                    service.query(PROVE.rules, PROVE.max_bid, [p + 1 for p in values]))
+    *singles, batch = asyncio.run(run())
+    assert service.stats["inline"] >= 1 and service.stats["batches"] >= 1
+    for p, (result,) in zip(values + [p + 1 for p in values], singles + [[r] for r in batch]):
+        expected = optimal_bid(p, PROVE.rules, PROVE.max_bid)
+        assert result == (expected.bid, expected.p_total, expected.stars, pytest.approx(expected.efficiency))
+    hits = service.stats["cache_hits"]
+    asyncio.run(run())
+    assert service.stats["cache_hits"] == hits + 2 * len(values)
+
+
+def test_pipelined_requests_answer_in_order():
+    body = json.dumps({"p_others": [16200]}).encode()
+    requests = (b"GET /optimal?p_others=1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,"
+                b"31,32,33,34,35 HTTP/1.1\r\n\r\n"
+                b"GET /health HTTP/1.1\r\n\r\n"
+                b"POST /optimal HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body[:5]))
+    answers, closed = exchange(requests, body[5:] + b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert [status for status, _, _ in answers] == [200, 200, 200, 200]
+    assert len(answers[0][2]["results"]) == 35
+    assert answers[1][2] == {"status": "ok"}
+    assert answers[2][2]["results"][0]["bid"] == optimal_bid(16200, PROVE.rules, PROVE.max_bid).bid
+    assert answers[3][1] == "close" and closed
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-3", b"+3", b"1.5", "²".encode("latin-1")])
+def test_invalid_content_length_is_a_400(length):
+    (status, connection, payload), = exchange(b"POST /optimal HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")[0]
+    assert (status, connection, payload) == (400, "close", {"error": "invalid Content-Length"})
+
+
+def test_bad_requests_get_json_errors():
+    assert exchange(b"POST /optimal HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n")[0][0][0] == 413
+    assert exchange(b"nonsense\r\n\r\n")[0][0][0] == 400
+    assert exchange(b"GET /" + b"x" * 70000)[0][0][0] == 431
+    assert [a[0] for a in exchange(b"GET /nope HTTP/1.1\r\n\r\nDELETE /optimal HTTP/1.1\r\n\r\n"
+                                   b"GET /optimal?p_others=1&rules=x HTTP/1.1\r\n\r\n")[0]] == [404, 405, 400]
@@ -0,0 +1,90 @@
+"""solver.optimal_bids / optimal_bid 与逐个整数出价穷举的结果对比。"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from prover.rules import DEFAULT_RULES, efficiency, star_prize
+from prover.solver import optimal_bid, optimal_bids
+
+
+def brute_force(p_others, rules, max_bid=None):
+    """枚举所有整数出价 B，返回划算度最高者中最小的 B；没有正划算度时为 (-1, 0)。"""
+    top = rules.max_total_pool if max_bid is None else max_bid
+    bids = np.arange(0, int(top) + 1)
+    effs = efficiency(bids, p_others, rules)
+    best = int(np.argmax(effs))
+    if effs[best] <= 0:
+        return -1, 0.0
+    return int(bids[best]), float(effs[best])
+
+
+RULES = [DEFAULT_RULES, dataclasses.replace(DEFAULT_RULES, minimum_bid=500)]
+INTEGER_P_OTHERS = np.arange(0, 22001, 250)
+FRACTIONAL_P_OTHERS = np.array([0.5, 1299.5, 4999.25, 4999.75, 7400.4, 15999.9, 16000.1, 21399.5, 21500.5])
+
+
+@pytest.mark.parametrize("rules", RULES, ids=lambda r: f"minimum_bid={r.minimum_bid:g}")
+@pytest.mark.parametrize("p_others", [INTEGER_P_OTHERS, FRACTIONAL_P_OTHERS], ids=["integer", "fractional"])
+def test_optimal_bids_matches_brute_force(rules, p_others):
+    bids, effs = optimal_bids(p_others, rules)
+    for p, bid, eff in zip(p_others, bids, effs):
+        expected_bid, expected_eff = brute_force(p, rules)
+        assert bid == expected_bid, p
+        assert eff == pytest.approx(expected_eff)
+
+
+@pytest.mark.parametrize("rules", RULES, ids=lambda r: f"minimum_bid={r.minimum_bid:g}")
+@pytest.mark.parametrize("max_bid", [600, 3000, 10000])
+def test_optimal_bids_respects_max_bid(rules, max_bid):
+    p_others = np.concatenate((INTEGER_P_OTHERS, FRACTIONAL_P_OTHERS))
+    bids, effs = optimal_bids(p_others, rules, max_bid)
+    for p, bid, eff in zip(p_others, bids, effs):
+        expected_bid, expected_eff = brute_force(p, rules, max_bid)
+        assert bid == expected_bid, p
+        assert eff == pytest.approx(expected_eff)
+
+
+def test_ties_take_the_smaller_bid():
+    # 1 档出价 50 (5/50) 与 2 档出价 100 (10/100) 的划算度相同
+    rules = dataclasses.replace(DEFAULT_RULES, minimum_bid=50, thresholds=(99.5, 200, 16000, 17000, 18000, 19000))
+    bid, eff = optimal_bids(0.0, rules)
+    assert (bid, eff) == (50, pytest.approx(0.1))
+    assert brute_force(0.0, rules) == (50, pytest.approx(0.1))
+    assert optimal_bid(0.0, rules).local_optima[:2] == [(50, pytest.approx(0.1)), (100, pytest.approx(0.1))]
+
+
+def test_optimal_bid_agrees_with_vectorised_solver():
+    for p in np.concatenate((INTEGER_P_OTHERS, FRACTIONAL_P_OTHERS)):
+        result = optimal_bid(p)
+        bid, eff = optimal_bids(p)
+        assert result.bid == bid
+        assert result.efficiency == pytest.approx(eff)
+        if bid >= 0:
+            assert result.p_total == pytest.approx(p + bid)
+            assert result.local_optima[0] == (result.bid, pytest.approx(result.efficiency))
+
+
+def test_no_positive_bid_when_pool_is_full():
+    bids, effs = optimal_bids([DEFAULT_RULES.max_total_pool, 21950.0])
+    assert bids.tolist() == [-1, -1]
+    assert effs.tolist() == [0.0, 0.0]
+    assert optimal_bid(21950.0).bid == -1
+
+
+@pytest.mark.parametrize("rules", RULES, ids=lambda r: f"minimum_bid={r.minimum_bid:g}")
+@pytest.mark.parametrize("max_bid", [None, 600, 10000])
+def test_scalar_optimal_bid_matches_optimal_bids(rules, max_bid):
+    p_others = np.concatenate((np.arange(-300, 22301, 37), FRACTIONAL_P_OTHERS))
+    bids, effs = optimal_bids(p_others, rules, max_bid)
+    for p, bid, eff in zip(p_others, bids, effs):
+        result = optimal_bid(p, rules, max_bid)
+        assert (result.bid, result.efficiency) == (bid, eff), p
+        assert result.stars == (star_prize(p + bid, rules) if bid >= 0 else 0)
+
+
+@pytest.mark.parametrize("p_others", [float("nan"), float("inf"), -float("inf")])
+def test_non_finite_p_others_has_no_bid(p_others):
+    assert optimal_bid(p_others).bid == -1
+    with np.errstate(invalid="ignore"):
+        assert optimal_bids([p_others])[0].tolist() == [-1]
@@ -0,0 +1,58 @@
+"""storage.publish_directory / SharedArray，以及 sweep 进程池路径与进程内路径的结果对比。"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from prover.ranges import parse_range
+from prover.storage import SharedArray, fill_shared, publish_directory
+from prover.sweep import sweep
+
+
+def _write_rows(squares, start, stop):
+    squares[start:stop] = np.arange(start, stop) ** 2
+    return stop - start
+
+
+def test_publish_directory_replaces_old_contents(tmp_path):
+    path = str(tmp_path / "cache")
+    for name in ("old.txt", "new.txt"):
+        with publish_directory(path) as tmp:
+            assert not os.path.exists(os.path.join(path, name))
+            with open(os.path.join(tmp, name), "w") as f:
+                f.write(name)
+    assert os.listdir(path) == ["new.txt"]
+    assert os.listdir(tmp_path) == ["cache"]
+
+
+def test_publish_directory_keeps_old_contents_on_error(tmp_path):
+    path = str(tmp_path / "cache")
+    with publish_directory(path) as tmp:
+        open(os.path.join(tmp, "old.txt"), "w").close()
+    with pytest.raises(RuntimeError):
+        with publish_directory(path) as tmp:
+            open(os.path.join(tmp, "new.txt"), "w").close()
+            raise RuntimeError
+    assert os.listdir(path) == ["old.txt"]
+    assert os.listdir(tmp_path) == ["cache"]
+
+
+def test_shared_array_is_filled_by_the_pool():
+    with SharedArray((100,), np.int64, fill=-1) as shared:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(fill_shared, (shared.spec,), _write_rows, lo, lo + 25) for lo in (0, 25, 50)]
+            assert [future.result() for future in futures] == [25, 25, 25]
+        result = shared.copy()
+    assert shared.array is None
+    assert result[:75].tolist() == [i * i for i in range(75)]
+    assert (result[75:] == -1).all()
+
+
+def test_sweep_pool_matches_in_process():
+    vary = [("minimum_bid", parse_range("100:1000:50")), ("shift", parse_range("-1000:1000:250"))]
+    p_others = np.arange(0, 22001, 500)
+    serial = sweep(vary, p_others, workers=1)
+    pooled = sweep(vary, p_others, workers=2)
+    np.testing.assert_array_equal(serial.bids, pooled.bids)
+    np.testing.assert_array_equal(serial.effs, pooled.effs)
@@ -0,0 +1,59 @@
+"""refined_grid：每列包含边界两侧的 B、升序且不重复；surface_counts 的面片数上限。"""
+import numpy as np
+import pytest
+
+from prover.rules import DEFAULT_RULES
+from prover.surface import MAX_SURFACE_FACES, refined_grid, refined_surface, surface_counts
+
+GRIDS = {
+    "linspace": (np.linspace(0, 21900, 60), np.linspace(100, 5000, 50)),
+    "logspace": (np.linspace(0, 21900, 50), np.logspace(np.log10(100), np.log10(5000), 50)),
+    # P_others 和 B 都是 100 的倍数：边界点与公共采样点大量重合
+    "aligned": (np.arange(0, 22001, 100), np.arange(100, 5001, 100)),
+}
+
+
+@pytest.mark.parametrize("name", GRIDS)
+def test_columns_are_sorted_unique_and_contain_the_bounds(name):
+    p_others_values, b_values = GRIDS[name]
+    X, Y = refined_grid(p_others_values, b_values)
+    n_tiers = len(DEFAULT_RULES.bounds)
+    assert X.shape == Y.shape == (len(b_values) + 2 * n_tiers, len(p_others_values))
+    np.testing.assert_array_equal(X, np.broadcast_to(p_others_values, X.shape))
+
+    b_min, b_max = b_values.min(), b_values.max()
+    for p, column in zip(p_others_values, Y.T):
+        critical = DEFAULT_RULES.bounds - p
+        expected = np.union1d(b_values, np.clip(np.concatenate((critical, critical + 1)), b_min, b_max))
+        distinct = len(expected)
+        np.testing.assert_array_equal(column[:distinct], expected)  # 严格升序、不重复
+        assert (column[distinct:] == b_max).all()  # 只在顶端补齐
+
+
+def test_surface_has_a_step_at_every_bound():
+    p_others_values, b_values = GRIDS["linspace"]
+    X, Y, Z = refined_surface(p_others_values, b_values)
+    for col, p in enumerate(p_others_values):
+        for bound in DEFAULT_RULES.bounds[:-1]:  # 最后一个是总池上限：再多 1 就爆池
+            b = bound - p
+            if b_values.min() <= b and b + 1 <= b_values.max():
+                below = Z[Y[:, col] == b, col]
+                above = Z[Y[:, col] == b + 1, col]
+                assert len(below) == len(above) == 1
+                assert above[0] > below[0]  # 跨过边界多一档星星
+
+
+@pytest.mark.parametrize("shape, expected", [
+    ((100, 100), {"rcount": 100, "ccount": 100}),
+    ((1014, 1000), {"rcount": 1014, "ccount": MAX_SURFACE_FACES // 1014}),
+    ((MAX_SURFACE_FACES + 5, 10), {"rcount": MAX_SURFACE_FACES, "ccount": 1}),
+    ((1, 1), {"rcount": 1, "ccount": 1}),
+], ids=str)
+def test_surface_counts(shape, expected):
+    counts = surface_counts(shape)
+    assert counts == expected
+    assert counts["rcount"] * counts["ccount"] <= max(MAX_SURFACE_FACES, 1)
+
+
+def test_surface_counts_custom_limit():
+    assert surface_counts((50, 400), max_faces=1000) == {"rcount": 50, "ccount": 20}
@@ -0,0 +1,42 @@
+"""sweep 的汇总统计：-1（没有正划算度的出价）不参与出价偏移和范围的统计，单独计数。"""
+import numpy as np
+
+from prover.ranges import parse_range
+from prover.sweep import SweepResult, p_others_summary, sweep, variant_summary
+
+
+def make_result(bids, effs, baseline_bids, baseline_effs):
+    bids, effs = np.asarray(bids), np.asarray(effs, dtype=float)
+    return SweepResult(("x",), np.arange(len(bids), dtype=float)[:, None], [None] * len(bids),
+                       np.arange(bids.shape[1], dtype=float), bids, effs, np.asarray(baseline_bids),
+                       np.asarray(baseline_effs, dtype=float), 0)
+
+
+def test_no_bid_rows_are_masked_and_counted():
+    result = make_result(bids=[[500, -1, 700], [-1, -1, -1]], effs=[[0.01, 0.0, 0.005], [0.0, 0.0, 0.0]],
+                         baseline_bids=[400, 300, -1], baseline_effs=[0.012, 0.004, 0.0])
+    per_variant = variant_summary(result)
+    np.testing.assert_allclose(per_variant["changed"], [1.0, 2 / 3])
+    np.testing.assert_allclose(per_variant["mean_abs_delta_bid"], [100.0, np.nan])
+    np.testing.assert_allclose(per_variant["max_abs_delta_bid"], [100.0, np.nan])
+    np.testing.assert_allclose(per_variant["mean_delta_eff"], [-0.002, np.nan])
+    assert per_variant["no_bid"].tolist() == [2, 3]
+
+    per_p = p_others_summary(result)
+    np.testing.assert_allclose(per_p["min_bid"], [500, np.nan, 700])
+    np.testing.assert_allclose(per_p["max_bid"], [500, np.nan, 700])
+    np.testing.assert_allclose(per_p["min_eff"], [0.01, np.nan, 0.005])
+    assert per_p["no_bid"].tolist() == [1, 2, 1]
+    np.testing.assert_allclose(per_p["changed"], [1.0, 1.0, 0.5])
+
+
+def test_summaries_of_a_real_sweep_ignore_the_full_pool():
+    result = sweep([("minimum_bid", parse_range("100:1000:100"))], np.arange(0, 22001, 500), workers=1)
+    per_variant = variant_summary(result)
+    assert per_variant["max_abs_delta_bid"].max() < 22000
+    assert (per_variant["no_bid"] >= 1).all()  # P_others = 22000 时谁都不能出价
+    per_p = p_others_summary(result)
+    valid = ~np.isnan(per_p["min_bid"])
+    assert (per_p["min_bid"][valid] >= 100).all()
+    assert (per_p["min_eff"][valid] > 0).all()
+    assert np.isnan(per_p["min_bid"][-1]) and per_p["no_bid"][-1] == len(result.rules)